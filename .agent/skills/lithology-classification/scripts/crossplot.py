@@ -1,9 +1,510 @@
+import json
+import os
+import uuid
 import numpy as np
 import pandas as pd
 import re
-from typing import Dict, Any, List, Optional
+import threading
+from functools import lru_cache
+from typing import Dict, Any, List, Mapping, Optional
 from backend.core.curve_mapper import get_curve_mapper
 
+try:
+    import numexpr
+    from numexpr.necompiler import getExprNames
+    _EVAL_ENGINE = 'numexpr'
+except ImportError:
+    numexpr = None
+    _EVAL_ENGINE = 'python'
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from numba import guvectorize
+except ImportError:  # optional accelerator
+    guvectorize = None
+
+# Scatter points sent to the frontend
+MAX_PLOT_POINTS = 5000
+
+# M-N plot mineral points (fresh mud), row order matches _MN_NAMES
+_MN_NAMES = ["Sandstone", "Limestone", "Dolomite", "Anhydrite", "Shale (Typ)"]
+_MN_CENTROIDS = np.array([
+    [0.81, 0.63],
+    [0.827, 0.585],
+    [0.778, 0.516],
+    [0.70, 0.50],
+    [0.60, 0.55],
+])
+
+
+# Limestone-scale density porosity: (2.71 - RHOB) * _INV_LIME_PHI (matrix 2.71, fluid 1.0)
+_INV_LIME_PHI = 1.0 / (2.71 - 1.0)
+
+# N-D count vector order (classify_nd_batch / _analyze_nd)
+_ND_CLASSES = ["Sandstone", "Limestone", "Dolomite", "Shale"]
+
+
+def _classify_nd_loop(rhob, nphi, slots, out):
+    """
+    Per-well N-D tally; `slots` only sizes the output (k = 4). Non-finite samples are skipped.
+    """
+    for j in range(out.shape[0]):
+        out[j] = 0
+    for i in range(rhob.shape[0]):
+        r = rhob[i]
+        n = nphi[i]
+        if not (np.isfinite(r) and np.isfinite(n)):
+            continue
+        sep = (2.71 - r) * _INV_LIME_PHI - n
+        if n > 0.40 or sep < -0.15:
+            out[3] += 1
+        elif sep > 0.03:
+            out[0] += 1
+        elif sep >= -0.03:
+            out[1] += 1
+        else:
+            out[2] += 1  # -0.15 <= sep < -0.03: anything lower is shale
+
+
+def _classify_nd_numpy(rhob: np.ndarray, nphi: np.ndarray) -> np.ndarray:
+    """
+    NumPy version of the N-D tally over (K, N) arrays; returns (K, 4) counts.
+    """
+    valid = np.isfinite(rhob) & np.isfinite(nphi)
+    with np.errstate(invalid='ignore'):
+        # Density porosity on limestone matrix (2.71 g/cc) vs. neutron porosity
+        sep = (2.71 - rhob) * _INV_LIME_PHI - nphi
+        # Mutually exclusive masks in priority order (shale wins)
+        shale = valid & ((nphi > 0.40) | (sep < -0.15))
+        rest = valid & ~shale
+        sand = rest & (sep > 0.03)
+        lime = rest & (np.abs(sep) <= 0.03)
+        dolo = rest & (sep < -0.03)
+    return np.stack([
+        np.count_nonzero(sand, axis=-1),
+        np.count_nonzero(lime, axis=-1),
+        np.count_nonzero(dolo, axis=-1),
+        np.count_nonzero(shale, axis=-1),
+    ], axis=-1).astype(np.int64)
+
+
+# Compiled on first use per target, not at import: the registry imports this script
+# eagerly and most requests never classify
+_nd_kernels: Dict[str, Any] = {}
+_nd_kernels_lock = threading.Lock()
+
+_ND_SLOTS = np.zeros(len(_ND_CLASSES), dtype=np.int64)
+
+
+def _nd_kernel(target: str):
+    kernel = _nd_kernels.get(target)
+    if kernel is None:
+        with _nd_kernels_lock:
+            kernel = _nd_kernels.get(target)
+            if kernel is None:
+                kernel = _nd_kernels[target] = guvectorize(
+                    ["void(f8[:], f8[:], i8[:], i8[:])"], "(n),(n),(k)->(k)", target=target
+                )(_classify_nd_loop)
+    return kernel
+
+
+def classify_nd_batch(rhob: Any, nphi: Any, parallel: bool = False) -> np.ndarray:
+    """
+    Neutron-Density lithology counts for many wells at once.
+    rhob/nphi are (K, N) arrays (pad shorter wells with NaN); returns (K, 4) int64 counts
+    in _ND_CLASSES order. Uses a Numba kernel when available.
+    
+    parallel=True spreads the wells over Numba's thread pool. It is for offline batch
+    scripts only and takes effect only on the main thread: a parallel region first
+    entered from a worker thread hangs interpreter exit on the TBB layer, so the agent
+    path (tools run on pool threads) always uses the serial kernel.
+    """
+    rhob = np.ascontiguousarray(rhob, dtype=np.float64)
+    nphi = np.ascontiguousarray(nphi, dtype=np.float64)
+    if guvectorize is None:
+        return _classify_nd_numpy(rhob, nphi)
+    use_pool = parallel and threading.current_thread() is threading.main_thread()
+    return _nd_kernel('parallel' if use_pool else 'cpu')(rhob, nphi, _ND_SLOTS)
+
+
+def _to_float_array(values: Any) -> np.ndarray:
+    """
+    Convert a curve (list with None gaps or ndarray) to float64 in one pass; None -> NaN.
+    """
+    return np.asarray(values, dtype=np.float64)
+
+
+# Identifier-like tokens in an axis / filter expression
+_TOKEN_RE = re.compile(r'\b[A-Za-z_]\w*\b')
+
+
+def _alias_table(curves: Dict[str, Any], matched_map: Mapping[str, str]) -> Dict[str, str]:
+    """
+    {standard_name: input_name} for standard names not already present as inputs
+    ('RHOB' -> 'DEN'). If several inputs map to one standard name, the first in input order wins.
+    """
+    aliases = {}
+    for orig_name in curves:
+        std_name = matched_map.get(orig_name)
+        if std_name and std_name not in curves and std_name not in aliases:
+            aliases[std_name] = orig_name
+    return aliases
+
+
+def _rewrite_aliases(expr: str, aliases: Mapping[str, str]) -> str:
+    """
+    Replace standard-name tokens with the input curve names so the frame never
+    needs duplicate alias columns ('304800 / DT' -> '304800 / AC').
+    """
+    if not aliases or not expr:
+        return expr
+    return _TOKEN_RE.sub(lambda m: aliases.get(m.group(0), m.group(0)), expr)
+
+
+def _build_frame(curves: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Build the DataFrame with every input curve as a float64 buffer, under its input name.
+    Standard names are handled by rewriting expressions (see _rewrite_aliases).
+    """
+    std_data = {}
+    for k, v in curves.items():
+        try:
+            std_data[k] = _to_float_array(v)
+        except (TypeError, ValueError):
+            std_data[k] = np.asarray(v, dtype=object)
+
+    if len({a.shape for a in std_data.values()}) > 1:
+        # Ragged curves: keep the old index-aligned behaviour
+        return pd.DataFrame({k: pd.Series(v) for k, v in std_data.items()})
+    return pd.DataFrame(std_data, copy=False)
+
+
+@lru_cache(maxsize=256)
+def _expr_names(expr: str) -> Optional[tuple]:
+    """
+    Variable names referenced by a numexpr expression (None if numexpr can't parse it).
+    """
+    try:
+        names, _ = getExprNames(expr, {})
+    except Exception:
+        return None
+    return tuple(names)
+
+
+@lru_cache(maxsize=256)
+def _compile_expr(expr: str, sig: tuple):
+    """
+    Compiled numexpr program, keyed by expression and (name, dtype) signature.
+    """
+    return numexpr.NumExpr(expr, signature=list(sig))
+
+
+def _compiled_eval(df: pd.DataFrame, expr: str) -> Optional[np.ndarray]:
+    """
+    Evaluate with a cached compiled numexpr program when every name is a float64 column.
+    Returns None when the expression is not eligible.
+    """
+    names = _expr_names(expr)
+    if names is None:
+        return None
+    arrays = []
+    for name in names:
+        if name not in df.columns or df[name].dtype != np.float64:
+            return None
+        arrays.append(df[name].to_numpy())
+    try:
+        program = _compile_expr(expr, tuple((name, np.double) for name in names))
+        return program(*arrays)
+    except Exception:
+        return None
+
+
+def _eval_expression(df: pd.DataFrame, expr: str) -> Any:
+    """
+    Evaluate an axis expression with a cached numexpr program; fall back to
+    DataFrame.eval (numexpr, then Python engine) for anything else.
+    """
+    if _EVAL_ENGINE == 'numexpr':
+        result = _compiled_eval(df, expr)
+        if result is not None:
+            return result
+        try:
+            return df.eval(expr, engine='numexpr')
+        except Exception:
+            pass
+    return df.eval(expr, engine='python')
+
+
+def _apply_filter(df: pd.DataFrame, query: str) -> pd.DataFrame:
+    """
+    Row filter for filter_query; the compiled numexpr path is shared with axis expressions.
+    """
+    if _EVAL_ENGINE == 'numexpr':
+        mask = _compiled_eval(df, query)
+        if mask is not None and mask.dtype == np.bool_ and mask.shape == (len(df),):
+            return df[mask]
+    return df.query(query, local_dict={})
+
+
+def _write_chart_payload(filepath: str, payload: Dict[str, Any]) -> None:
+    """
+    Serialize the chart payload ('source' is an (N, 4) float ndarray) and move it into place
+    atomically, so the frontend never reads a half-written file.
+    """
+    tmp_path = filepath + ".tmp"
+    try:
+        if orjson is not None:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(tmp_path, 'w') as f:
+                json.dump({**payload, "source": payload["source"].tolist()}, f)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _eval_to_array(df: pd.DataFrame, expr: str) -> np.ndarray:
+    """
+    Evaluate an expression to a float64 array of len(df) (scalars are broadcast).
+    """
+    values = np.asarray(_eval_expression(df, expr), dtype=np.float64)
+    if values.ndim == 0:
+        return np.full(len(df), float(values))
+    return values
+
+
+def _analyze_nd(curves: Dict[str, Any], rhob_name: str, nphi_name: str) -> Dict[str, Any]:
+    """
+    Legacy Neutron-Density lithology classification (limestone-scale separation).
+    """
+    if rhob_name not in curves or nphi_name not in curves:
+        return {"error": f"Curves '{rhob_name}'/'{nphi_name}' not found"}
+
+    rhob = _to_float_array(curves[rhob_name])
+    nphi = _to_float_array(curves[nphi_name])
+    if rhob.shape != nphi.shape:
+        size = min(rhob.size, nphi.size)
+        rhob, nphi = rhob[:size], nphi[:size]
+
+    counts = dict(zip(_ND_CLASSES, classify_nd_batch(rhob[None, :], nphi[None, :])[0].tolist()))
+    total = sum(counts.values())
+    if total == 0:
+        return {"error": "No valid RHOB/NPHI samples"}
+
+    dominant = max(counts, key=counts.get)
+    return {
+        "status": "success",
+        "plot_type": "ND",
+        "interpretation": dominant,
+        "confidence": round(counts[dominant] / total, 2),
+        "lithology_distribution": {k: round(v / total * 100, 1) for k, v in counts.items()},
+        "data_points": total
+    }
+
+
+def _analyze_mn(curves: Dict[str, Any], rhob_name: str, nphi_name: str, dt_name: str) -> Dict[str, Any]:
+    """
+    Legacy M-N plot lithology classification (nearest mineral point of the averaged M/N).
+    """
+    if rhob_name not in curves or nphi_name not in curves or dt_name not in curves:
+        return {"error": f"Curves '{rhob_name}'/'{nphi_name}'/'{dt_name}' not found"}
+
+    r = _to_float_array(curves[rhob_name])
+    n = _to_float_array(curves[nphi_name])
+    d = _to_float_array(curves[dt_name])
+    # Fresh-mud fluid parameters; RHOB within 0.01 g/cc of the fluid density (or below
+    # it) is bad data whose M/N would blow up, so those samples are dropped
+    rho_f, nphi_f, dt_f = 1.0, 1.0, 189.0
+    mask = np.isfinite(r) & np.isfinite(n) & np.isfinite(d) & (r - rho_f > 0.01)
+    r, n, d = r[mask], n[mask], d[mask]
+    if r.size == 0:
+        return {"error": "No valid RHOB/NPHI/DT samples"}
+
+    inv_denom = 1.0 / (r - rho_f)
+    M = 0.01 * (dt_f - d) * inv_denom
+    N = (nphi_f - n) * inv_denom
+
+    avg_M = float(np.mean(M))
+    avg_N = float(np.mean(N))
+
+    dist = np.linalg.norm(_MN_CENTROIDS - np.array([avg_M, avg_N]), axis=1)
+    best_match = _MN_NAMES[int(dist.argmin())]
+    distances = dict(zip(_MN_NAMES, dist.tolist()))
+
+    # Per-sample nearest mineral point
+    labels = np.hypot(M[:, None] - _MN_CENTROIDS[:, 0], N[:, None] - _MN_CENTROIDS[:, 1]).argmin(axis=1)
+    counts = np.bincount(labels, minlength=len(_MN_NAMES))
+
+    return {
+        "status": "success",
+        "plot_type": "MN",
+        "interpretation": best_match,
+        "confidence": round(max(0.0, 1.0 - distances[best_match] / 0.1), 2),
+        "avg_M": avg_M,
+        "avg_N": avg_N,
+        "distances": {k: round(v, 4) for k, v in distances.items()},
+        "lithology_distribution": {
+            name: round(c / r.size * 100, 1) for name, c in zip(_MN_NAMES, counts.tolist())
+        },
+        "data_points": int(r.size)
+    }
+
+
+# --- Semantic concept resolution ---
+# Each resolver maps the set of available curve names to a pandas expression (or None).
+
+def _first_present(cols: set, candidates: tuple) -> Optional[str]:
+    for cand in candidates:
+        if cand in cols:
+            return cand
+    return None
+
+
+def _resolve_vp(cols: set) -> Optional[str]:
+    # 1. Direct Curve
+    direct = _first_present(cols, ("VP", "VEL", "P_VEL"))
+    if direct:
+        return direct
+    # 2. Derive from Sonic (DT)
+    if "DT" in cols:
+        # Check unit heuristic: DT usually 40-150. 
+        # If us/ft -> m/s: 304800/DT. If us/m -> m/s: 1000000/DT
+        # Robust default for Oil & Gas is us/ft.
+        return "304800 / DT"
+    return None
+
+
+def _resolve_vs(cols: set) -> Optional[str]:
+    direct = _first_present(cols, ("VS", "S_VEL"))
+    if direct:
+        return direct
+    if "DTS" in cols:
+        return "304800 / DTS"
+    return None
+
+
+def _resolve_ai(cols: set) -> Optional[str]:
+    direct = _first_present(cols, ("AI", "IP"))
+    if direct:
+        return direct
+    # Derive: Vp * RHOB
+    vp_expr = _resolve_vp(cols)
+    if vp_expr and "RHOB" in cols:
+        return f"({vp_expr}) * RHOB"
+    return None
+
+
+def _resolve_si(cols: set) -> Optional[str]:
+    if "SI" in cols:
+        return "SI"
+    vs_expr = _resolve_vs(cols)
+    if vs_expr and "RHOB" in cols:
+        return f"({vs_expr}) * RHOB"
+    return None
+
+
+def _resolve_density(cols: set) -> Optional[str]:
+    # Check col existence to avoid eval error later
+    return _first_present(cols, ("RHOB", "DEN"))
+
+
+def _resolve_porosity(cols: set) -> Optional[str]:
+    # Priority: Effective -> Total -> Neutron
+    return _first_present(cols, ("PHIE", "POR_EFF", "PHIT", "POR", "NPHI"))
+
+
+def _resolve_dphi(cols: set) -> Optional[str]:
+    if "DPHI" in cols:
+        return "DPHI"
+    if "RHOB" in cols:
+        # Default Sandstone matrix (2.65), Fluid (1.0)
+        return "(2.65 - RHOB) / (2.65 - 1.0)"
+    return None
+
+
+def _resolve_poisson(cols: set) -> Optional[str]:
+    # PR = (0.5 * (DTs/DT)^2 - 1) / ((DTs/DT)^2 - 1)
+    if "DTS" in cols and "DT" in cols:
+        return "(0.5 * (DTS/DT)**2 - 1) / ((DTS/DT)**2 - 1)"
+    return None
+
+
+def _resolve_vpvs(cols: set) -> Optional[str]:
+    if "DTS" in cols and "DT" in cols:
+        return "DTS / DT"  # Vp/Vs = DTS/DT
+    return None
+
+
+_CONCEPT_RESOLVERS = {
+    "VP": _resolve_vp,
+    "VS": _resolve_vs,
+    "AI": _resolve_ai,
+    "SI": _resolve_si,
+    "RHOB": _resolve_density,
+    "POROSITY": _resolve_porosity,
+    "DPHI": _resolve_dphi,
+    "POISSON": _resolve_poisson,
+    "VPVS": _resolve_vpvs,
+}
+
+# {upper-case alias: canonical concept}, built once
+_CONCEPT_ALIASES = {}
+for _canon, _aliases in {
+    "VP": ["VELOCITY", "VP", "P_VEL", "速度", "纵波速度", "纵波"],
+    "VS": ["VS", "S_VEL", "横波速度", "横波"],
+    "AI": ["IMPEDANCE", "AI", "IP", "Z_P", "阻抗", "纵波阻抗", "波阻抗"],
+    "SI": ["SI", "IS", "Z_S", "横波阻抗"],
+    "RHOB": ["DENSITY", "DEN", "RHOB", "密度"],
+    "POROSITY": ["POROSITY", "POR", "PHI", "孔隙度", "总孔隙度"],
+    "DPHI": ["DPHI", "DENSITY_POROSITY", "密度孔隙度"],
+    "POISSON": ["POISSON", "PR", "NU", "泊松比"],
+    "VPVS": ["VPVS", "VP/VS", "RATIO", "波速比"],
+}.items():
+    for _alias in _aliases:
+        _CONCEPT_ALIASES[_alias] = _canon
+del _canon, _aliases, _alias
+
+
+def resolve_concept(concept: str, cols: set) -> Optional[str]:
+    """
+    Resolves a high-level concept (e.g. 'Velocity') to a valid Pandas expression
+    based on available curve names. Non-concepts are returned unchanged.
+    """
+    if not concept:
+        return concept
+    canon = _CONCEPT_ALIASES.get(concept.strip().upper())
+    if canon is None:
+        return concept
+    return _CONCEPT_RESOLVERS[canon](cols)
+
+
+def _raw_axis_arrays(
+    curves: Dict[str, Any], available: set, depth_col: Optional[str], exprs: tuple
+) -> Optional[tuple]:
+    """
+    (x, y, color, depth) float64 arrays when every expression is a plain input curve name
+    that concept resolution would leave unchanged; None otherwise.
+    """
+    for expr in exprs:
+        if not expr or expr not in curves or resolve_concept(expr, available) != expr:
+            return None
+    try:
+        arrays = [_to_float_array(curves[expr]) for expr in exprs]
+        arrays.append(_to_float_array(curves[depth_col]) if depth_col else np.zeros(arrays[0].shape))
+    except (TypeError, ValueError):
+        return None
+    if any(a.ndim != 1 or a.shape != arrays[0].shape for a in arrays):
+        return None
+    return tuple(arrays)
+
+
 def analyze_crossplot(
     log_data: Dict[str, Any],
     x_expression: str = None,
@@ -38,189 +539,116 @@ def analyze_crossplot(
     if not curves:
         return {"error": "No curve data provided"}
         
+    # Map the keys to Standard Names, e.g. "AC" -> "DT", "DEN" -> "RHOB"
+    # (memoized by the mapper per curve set, like the agents' lookups)
     mapper = get_curve_mapper()
-    # We map the keys to find matches, then rename the input dict/lines
-    # Ideally we'd get a full mapping df, but for now let's map keys to Standard Names
-    # e.g. "AC" -> "DT", "DEN" -> "RHOB"
-    mapped_result = mapper.map_curves(list(curves.keys()))
-    matched_map = mapped_result['matched'] # { 'AC': 'DT', 'DEN': 'RHOB' ... }
+    matched_map = mapper.matched_curves(curves.keys()) # { 'AC': 'DT', ... }
     
-    # Build a standardized dictionary: { 'DT': [values], 'RHOB': [values] ... }
-    # Priority: if multiple input curves map to same standard, take the first one found (arbitrary but stable)
-    std_data = {}
+    # Legacy fixed-type analysis: analyze_crossplot(data, type="ND" | "MN")
+    legacy_type = (type or "").upper()
+    if legacy_type in ("ND", "MN") and not (x_expression or y_expression or presets):
+        # First matching curve of each type in input order, as the agents pick it
+        std_to_orig = mapper.curves_by_type(curves.keys())
+        def pick(name, std):
+            return name if name in curves else std_to_orig.get(std, name)
+        if legacy_type == "ND":
+            return _analyze_nd(curves, pick(rhob_curve, 'RHOB'), pick(nphi_curve, 'NPHI'))
+        return _analyze_mn(curves, pick(rhob_curve, 'RHOB'), pick(nphi_curve, 'NPHI'), pick(dt_curve, 'DT'))
     
-    # First pass: Copy unmapped curves as is (to preserve original names if needed)
-    for k, v in curves.items():
-        std_data[k] = v
-        
-    # Second pass: Apply standard aliases (overwrite or add)
-    for orig_name, std_name in matched_map.items():
-        if std_name and std_name not in std_data:
-             std_data[std_name] = curves[orig_name]
-
-    # Create DataFrame
-    df = pd.DataFrame(dict([ (k,pd.Series(v)) for k,v in std_data.items() ]))
+    aliases = _alias_table(curves, matched_map)
+    # Names usable in expressions: input curves plus their standard aliases
+    available = set(curves) | set(aliases)
+    # Depth column, by standard name or its alias (e.g. 'DEPT')
+    depth_col = 'DEPTH' if 'DEPTH' in curves else aliases.get('DEPTH')
     
-    # --- 2. Data Filtering ---
-    # Convert 'DEPTH' column if it exists (CurveMapper creates 'DEPTH' alias usually)
-    if 'DEPTH' in df.columns:
-        if depth_start is not None:
-            df = df[df['DEPTH'] >= depth_start]
-        if depth_end is not None:
-            df = df[df['DEPTH'] <= depth_end]
+    fast_arrays = None
+    if not (presets or filter_query) and depth_start is None and depth_end is None:
+        fast_arrays = _raw_axis_arrays(curves, available, depth_col, (x_expression, y_expression, color_expression))
     
-    # Semantic Resolution Helper
-    def resolve_concept(concept: str, context_df: pd.DataFrame) -> str:
-        """
-        Resolves a high-level concept (e.g. 'Velocity') to a valid Pandas expression 
-        based on available columns.
-        """
-        c = concept.strip().upper()
-        cols = context_df.columns
-        
-        # --- A. Velocity (P/S) ---
-        if c in ["VELOCITY", "VP", "P_VEL", "速度", "纵波速度", "纵波"]:
-            # 1. Direct Curve
-            for cand in ["VP", "VEL", "P_VEL"]:
-                if cand in cols: return cand
-            # 2. Derive from Sonic (DT)
-            if "DT" in cols:
-                # Check unit heuristic: DT usually 40-150. 
-                # If us/ft -> m/s: 304800/DT. If us/m -> m/s: 1000000/DT
-                # Robust default for Oil & Gas is us/ft.
-                return "304800 / DT" 
-            return None # Fail
-            
-        if c in ["VS", "S_VEL", "横波速度", "横波"]:
-            for cand in ["VS", "S_VEL"]:
-                if cand in cols: return cand
-            if "DTS" in cols:
-                return "304800 / DTS"
-            return None
-
-        # --- B. Impedance (P/S) ---
-        if c in ["IMPEDANCE", "AI", "IP", "Z_P", "阻抗", "纵波阻抗", "波阻抗"]:
-            if "AI" in cols: return "AI"
-            if "IP" in cols: return "IP"
-            # Derive: Vp * RHOB
-            vp_expr = resolve_concept("VP", context_df)
-            if vp_expr and "RHOB" in cols:
-                return f"({vp_expr}) * RHOB"
-            return None
-            
-        if c in ["SI", "IS", "Z_S", "横波阻抗"]:
-            if "SI" in cols: return "SI"
-            vs_expr = resolve_concept("VS", context_df)
-            if vs_expr and "RHOB" in cols:
-                return f"({vs_expr}) * RHOB"
-            return None
-            
-        # --- Density ---
-        if c in ["DENSITY", "DEN", "RHOB", "密度"]:
-            if "RHOB" in cols: return "RHOB"
-            # Fallback: maybe just return 'RHOB' anyway if we assume standard mapping happened?
-            # But safer to check col existence to avoid eval error later.
-            if "DEN" in cols: return "DEN"
-            return None
-
-        # --- C. Porosity ---
-        if c in ["POROSITY", "POR", "PHI", "孔隙度", "总孔隙度"]:
-            # Priority: Effective -> Total -> Neutron
-            for cand in ["PHIE", "POR_EFF", "PHIT", "POR", "NPHI"]:
-                if cand in cols: return cand
-            return None
-            
-        if c in ["DPHI", "DENSITY_POROSITY", "密度孔隙度"]:
-            if "DPHI" in cols: return "DPHI"
-            if "RHOB" in cols:
-                # Default Sandstone matrix (2.65), Fluid (1.0)
-                return "(2.65 - RHOB) / (2.65 - 1.0)"
-            return None
-            
-        # --- D. Elastic Moduli (Expansion) ---
-        if c in ["POISSON", "PR", "NU", "泊松比"]:
-            # nu = 0.5 * (Vp/Vs^2 - 2) / (Vp/Vs^2 - 1) ... simplified:
-            # PR = (0.5 * (DTs/DT)^2 - 1) / ((DTs/DT)^2 - 1)
-            if "DTS" in cols and "DT" in cols:
-                return "(0.5 * (DTS/DT)**2 - 1) / ((DTS/DT)**2 - 1)"
-            return None
-            
-        if c in ["VPVS", "VP/VS", "RATIO", "波速比"]:
-             if "DTS" in cols and "DT" in cols:
-                 return "DTS / DT" # Slowness ratio is equivalent/inverse depending on def, but Vp/Vs = Dts/Dt
-             return None
-
-        # --- E. Fallback: Return original if not a concept ---
-        return concept
-
-    # --- 3. Parse Expressions ---
-    # First, handle presets
-    if presets:
-        p = presets.upper()
-        if p == "ND": # Neutron-Density
-            x_expression = "NPHI" 
-            y_expression = "RHOB"
-        elif p in ["PICKETT", "皮克特"]: # Rt vs Porosity (Log-Log)
-            x_expression = resolve_concept("POROSITY", df) or "NPHI"
-            y_expression = "RES_DEEP" # Need standard alias mapping for RT
-            # Pickett usually requires Log scales, handled in frontend config
-        elif p == "BUCKLES": # Sw vs Porosity
-            x_expression = resolve_concept("POROSITY", df) or "PHIE"
-            y_expression = "SAT_WATER"
+    if fast_arrays is not None:
+        # Fast path: axes are plain curve names, so no DataFrame / eval is needed
+        final_x, final_y, final_c = x_expression, y_expression, color_expression
+        x_vals, y_vals, c_vals, d_vals = fast_arrays
+    else:
+        df = _build_frame(curves)
+    
+        # --- 2. Data Filtering ---
+        if depth_col:
+            if depth_start is not None:
+                df = df[df[depth_col] >= depth_start]
+            if depth_end is not None:
+                df = df[df[depth_col] <= depth_end]
+    
+        # --- 3. Parse Expressions ---
+        # First, handle presets
+        if presets:
+            p = presets.upper()
+            if p == "ND": # Neutron-Density
+                x_expression = "NPHI" 
+                y_expression = "RHOB"
+            elif p in ["PICKETT", "皮克特"]: # Rt vs Porosity (Log-Log)
+                x_expression = resolve_concept("POROSITY", available) or "NPHI"
+                y_expression = "RES_DEEP" # Need standard alias mapping for RT
+                # Pickett usually requires Log scales, handled in frontend config
+            elif p == "BUCKLES": # Sw vs Porosity
+                x_expression = resolve_concept("POROSITY", available) or "PHIE"
+                y_expression = "SAT_WATER"
     
-    # Resolve semantic terms in expressions
-    # This assumes the expression IS the concept (e.g. x="Velocity"). 
-    # For complex math like "Velocity * 2", a simple replace might be risky but we'll try basic substitution?
-    # For now, let's assume the user input is predominantly a single concept OR a raw formulas.
-    # We will try to resolve the WHOLE string first.
+        # Resolve semantic terms in expressions
+        # This assumes the expression IS the concept (e.g. x="Velocity"). 
+        # For complex math like "Velocity * 2", a simple replace might be risky but we'll try basic substitution?
+        # For now, let's assume the user input is predominantly a single concept OR a raw formulas.
+        # We will try to resolve the WHOLE string first.
     
-    final_x = resolve_concept(x_expression, df) or x_expression
-    final_y = resolve_concept(y_expression, df) or y_expression
-    final_c = resolve_concept(color_expression, df) or color_expression or "GR"
+        final_x = resolve_concept(x_expression, available) or x_expression
+        final_y = resolve_concept(y_expression, available) or y_expression
+        final_c = resolve_concept(color_expression, available) or color_expression or "GR"
     
-    if not final_x or not final_y:
-        return {"error": f"Could not resolve axes. Input: X='{x_expression}', Y='{y_expression}'"}
+        if not final_x or not final_y:
+            return {"error": f"Could not resolve axes. Input: X='{x_expression}', Y='{y_expression}'"}
 
-    # --- 4. Calculation ---
-    try:
-        if filter_query:
-            df = df.query(filter_query, local_dict={})
-            
-        df['__X'] = df.eval(final_x, engine='python')
-        df['__Y'] = df.eval(final_y, engine='python')
-        # Handle color expression failure gracefully
+        # --- 4. Calculation ---
         try:
-            df['__C'] = df.eval(final_c, engine='python')
-        except:
-            df['__C'] = 0
+            if filter_query:
+                df = _apply_filter(df, _rewrite_aliases(filter_query, aliases))
+            
+            # Evaluate straight into arrays; df itself is never mutated
+            x_vals = _eval_to_array(df, _rewrite_aliases(final_x, aliases))
+            y_vals = _eval_to_array(df, _rewrite_aliases(final_y, aliases))
+            # Handle color expression failure gracefully
+            try:
+                c_vals = _eval_to_array(df, _rewrite_aliases(final_c, aliases))
+            except Exception:
+                c_vals = np.zeros(len(df))
+
+        except Exception as e:
+             return {"error": f"Calculation error: {str(e)}", "details": f"X: {final_x}, Y: {final_y}"}
 
-    except Exception as e:
-         return {"error": f"Calculation error: {str(e)}", "details": f"X: {final_x}, Y: {final_y}"}
+        d_vals = df[depth_col].to_numpy(dtype=np.float64) if depth_col else np.zeros(len(df))
          
     # Clean and Limit
-    plot_cols = ['__X', '__Y', '__C']
-    df_clean = df.dropna(subset=plot_cols)
-    if df_clean.empty:
+    mask = np.isfinite(x_vals) & np.isfinite(y_vals) & np.isfinite(c_vals)
+    x_vals, y_vals, c_vals, d_vals = x_vals[mask], y_vals[mask], c_vals[mask], d_vals[mask]
+    n_points = int(x_vals.size)
+    if n_points == 0:
         return {"error": "No valid data points available for plotting"}
         
-    if len(df_clean) > 5000:
-        df_clean = df_clean.sample(5000)
+    if n_points > MAX_PLOT_POINTS:
+        # Fixed seed keeps re-plots stable; sorted indices keep depth order and memory locality
+        idx = np.random.default_rng(0).choice(n_points, size=MAX_PLOT_POINTS, replace=False)
+        idx.sort()
+        x_vals, y_vals, c_vals, d_vals = x_vals[idx], y_vals[idx], c_vals[idx], d_vals[idx]
 
     # --- 5. ECharts Config Output ---
-    # --- 5. ECharts Config Output ---
-    output_data = []
-    x_vals = df_clean['__X'].values
-    y_vals = df_clean['__Y'].values
-    c_vals = df_clean['__C'].values
-    d_vals = df_clean['DEPTH'].values if 'DEPTH' in df_clean.columns else np.zeros(len(df_clean))
-    
-    for x,y,c,d in zip(x_vals, y_vals, c_vals, d_vals):
-        output_data.append([
-            round(float(x), 4), 
-            round(float(y), 4), 
-            round(float(c), 4), 
-            round(float(d), 2)
-        ])
+    # Rows of [x, y, color, depth] rounded in place in one preallocated buffer,
+    # serialized as an ndarray (no per-row Python lists)
+    output_data = np.empty((x_vals.size, 4), dtype=np.float64)
+    output_data[:, 0] = x_vals
+    output_data[:, 1] = y_vals
+    output_data[:, 2] = c_vals
+    output_data[:, 3] = d_vals
+    np.round(output_data[:, :3], 4, out=output_data[:, :3])
+    np.round(output_data[:, 3], 2, out=output_data[:, 3])
         
     # Determine Axis Types (Log scale for Resistivity?)
     x_type = "value"
@@ -328,10 +756,6 @@ def analyze_crossplot(
         echarts_option["series"].extend(overlays)
 
     # --- 7. Save Data to Static File (Phase 4 Optimization) ---
-    import uuid
-    import json
-    import os
-    
     chart_id = str(uuid.uuid4())
     filename = f"{chart_id}.json"
     static_dir = os.path.join("backend", "static", "charts")
@@ -345,8 +769,8 @@ def analyze_crossplot(
         "dimensions": ["x", "y", "color", "depth"]
     }
     
-    with open(filepath, 'w') as f:
-        json.dump(data_payload, f)
+    # Written before the URL is returned, so the frontend's fetch always finds the file
+    _write_chart_payload(filepath, data_payload)
         
     data_url = f"/static/charts/{filename}"
 
@@ -360,7 +784,7 @@ def analyze_crossplot(
     # Return concise summary + full config (Shell)
     return {
         "status": "success",
-        "data_points": len(df_clean),
+        "data_points": int(x_vals.size),
         "axis_formulas": {
             "x": final_x,
             "y": final_y,
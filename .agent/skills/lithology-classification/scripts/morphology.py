@@ -1,8 +1,150 @@
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple, Union
+from backend.core.log_data import LogData, as_log_data
+
+try:
+    from numba import njit
+except ImportError:  # optional accelerator
+    njit = None
+
+
+def _smoothed_slope_numpy(x: np.ndarray, y: np.ndarray, w: int) -> float:
+    """
+    Moving average of y over w samples (aligned to x[w-1:], like np.convolve 'valid')
+    and the least-squares slope through it, in raw units.
+    """
+    # Rolling mean via a single cumsum diff (equivalent to convolve 'valid')
+    c = np.concatenate(([0.0], np.cumsum(y, dtype=np.float64)))
+    y_smooth = (c[w:] - c[:-w]) / w
+    x_smooth = x[w-1:]
+    # Closed-form degree-1 least squares (no Vandermonde / lstsq)
+    # (Sum(dx) == 0, so the y mean drops out of the numerator)
+    dx = x_smooth - x_smooth.mean()
+    dxx = np.dot(dx, dx)
+    return float(np.dot(dx, y_smooth) / dxx) if dxx > 0 else 0.0
+
+
+def _smoothed_slope_loop(x, y, w):
+    """
+    Single-pass equivalent of _smoothed_slope_numpy: rolling sum for the moving
+    average, running sums for the closed-form fit. Compiled with Numba when available.
+    """
+    n = y.shape[0]
+    inv_w = 1.0 / w
+    x0 = x[w - 1]  # centre x for numerical stability; slope is unaffected
+    s = 0.0
+    for i in range(w - 1):
+        s += y[i]
+    sx = 0.0
+    sy = 0.0
+    sxy = 0.0
+    sxx = 0.0
+    m = 0
+    for i in range(w - 1, n):
+        s += y[i]
+        if i >= w:
+            s -= y[i - w]
+        ys = s * inv_w
+        xs = x[i] - x0
+        sx += xs
+        sy += ys
+        sxy += xs * ys
+        sxx += xs * xs
+        m += 1
+    den = m * sxx - sx * sx
+    return (m * sxy - sx * sy) / den if den != 0.0 else 0.0
+
+
+if njit is not None:
+    _smoothed_slope = njit(fastmath=True, cache=True)(_smoothed_slope_loop)
+else:
+    _smoothed_slope = _smoothed_slope_numpy
+
+
+def _curve_stats_numpy(x: np.ndarray, y: np.ndarray, w: int) -> Tuple[float, ...]:
+    """
+    Shape statistics of y(x):
+    (y_min, y_max, x_min, x_max, y_mean, arc_length, chord_length, slope_raw, rcg).
+    Arc/chord lengths and RCG are on min-max normalized axes; they are 0 / 0.5 when
+    either range is flat (the caller reports a constant curve in that case).
+    """
+    y_min, y_max = float(y.min()), float(y.max())
+    x_min, x_max = float(x.min()), float(x.max())
+    y_mean = float(y.mean())
+    y_range = y_max - y_min
+    x_range = x_max - x_min
+    if y_range == 0 or x_range == 0:
+        return y_min, y_max, x_min, x_max, y_mean, 0.0, 0.0, 0.0, 0.5
+
+    # Min-max scaling only rescales the diffs
+    arc_length = float(np.hypot(np.diff(y) / y_range, np.diff(x) / x_range).sum())
+    chord_length = float(np.hypot((y[-1] - y[0]) / y_range, (x[-1] - x[0]) / x_range))
+    slope_raw = _smoothed_slope_numpy(x, y, w)
+
+    # Sum(x_norm * y_norm) / Sum(y_norm); the y range cancels
+    y_off = y - y_min
+    y_mass = float(y_off.sum())
+    rcg = float(np.dot(x - x_min, y_off)) / (x_range * y_mass) if y_mass > 0 else 0.5
+    return y_min, y_max, x_min, x_max, y_mean, arc_length, chord_length, slope_raw, rcg
+
+
+def _curve_stats_loop(x, y, w):
+    """
+    Fused equivalent of _curve_stats_numpy: one pass for min/max/sum, one pass for
+    arc length and RCG sums, plus the rolling fit. Compiled with Numba when available.
+    """
+    n = y.shape[0]
+    y_min = y[0]
+    y_max = y[0]
+    x_min = x[0]
+    x_max = x[0]
+    y_sum = 0.0
+    for i in range(n):
+        yi = y[i]
+        xi = x[i]
+        y_sum += yi
+        if yi < y_min:
+            y_min = yi
+        elif yi > y_max:
+            y_max = yi
+        if xi < x_min:
+            x_min = xi
+        elif xi > x_max:
+            x_max = xi
+    y_mean = y_sum / n
+    y_range = y_max - y_min
+    x_range = x_max - x_min
+    if y_range == 0.0 or x_range == 0.0:
+        return y_min, y_max, x_min, x_max, y_mean, 0.0, 0.0, 0.0, 0.5
+
+    inv_y = 1.0 / y_range
+    inv_x = 1.0 / x_range
+    arc_length = 0.0
+    y_mass = 0.0
+    xy_mass = 0.0
+    for i in range(n):
+        y_off = y[i] - y_min
+        y_mass += y_off
+        xy_mass += (x[i] - x_min) * y_off
+        if i > 0:
+            dy = (y[i] - y[i - 1]) * inv_y
+            dx = (x[i] - x[i - 1]) * inv_x
+            arc_length += np.sqrt(dy * dy + dx * dx)
+    cy = (y[n - 1] - y[0]) * inv_y
+    cx = (x[n - 1] - x[0]) * inv_x
+    chord_length = np.sqrt(cy * cy + cx * cx)
+    slope_raw = _smoothed_slope(x, y, w)
+    rcg = xy_mass * inv_x / y_mass if y_mass > 0.0 else 0.5
+    return y_min, y_max, x_min, x_max, y_mean, arc_length, chord_length, slope_raw, rcg
+
+
+if njit is not None:
+    _curve_stats = njit(fastmath=True, cache=True)(_curve_stats_loop)
+else:
+    _curve_stats = _curve_stats_numpy
 
 def identify_curve_shape(
-    log_data: Dict[str, Any],
+    log_data: Union[LogData, Dict[str, Any]],
     curve_name: str = "GR",
     depth_start: float = None,
     depth_end: float = None,
@@ -25,27 +167,30 @@ def identify_curve_shape(
     3. Linear Trend (Slope): Global trend direction.
     
     Args:
-        log_data: Dictionary containing 'curves' with numpy arrays.
+        log_data: LogData, or dictionary containing 'curves' (lists with None gaps or numpy arrays).
+                  Pass a LogData when chaining tools so curves are packed and NaN-scanned once.
         curve_name: Name of the curve to analyze (usually GR).
     """
-    curves = log_data.get('curves', {})
-    depth_curve = curves.get('DEPTH') or curves.get('Depth') or curves.get('DEPT')
+    log = as_log_data(log_data, (curve_name, 'DEPTH', 'Depth', 'DEPT'))
+    depth_name = next((k for k in ('DEPTH', 'Depth', 'DEPT') if k in log), None)
     
     # 1. Retrieve and Validate Data
-    if curve_name not in curves:
+    if curve_name not in log:
         return {"error": f"Curve {curve_name} not found"}
-    if depth_curve is None:
+    if depth_name is None:
         return {"error": "Depth curve not found"}
         
-    raw_vals = np.array(curves[curve_name])
-    depth_vals = np.array(depth_curve)
+    # float64 row views of the packed block (no per-call coercion)
+    raw_vals = log.get_curve(curve_name)
+    depth_vals = log.get_curve(depth_name)
     
-    # 2. Slice Data (Handle NaNs)
-    mask = ~np.isnan(raw_vals) & ~np.isnan(depth_vals)
+    # 2. Slice Data (Handle NaNs): cached finite masks, one scratch buffer, updated in place
+    mask = np.logical_and(log.finite(curve_name), log.finite(depth_name))
+    scratch = np.empty_like(mask)
     if depth_start is not None:
-        mask &= (depth_vals >= depth_start)
+        mask &= np.greater_equal(depth_vals, depth_start, out=scratch)
     if depth_end is not None:
-        mask &= (depth_vals <= depth_end)
+        mask &= np.less_equal(depth_vals, depth_end, out=scratch)
         
     y = raw_vals[mask]
     x = depth_vals[mask] # Depth increases downwards
@@ -54,44 +199,28 @@ def identify_curve_shape(
         return {"shape": "Undefined (Insufficient Data)", "trend": 0}
 
     # 3. Normalization (Min-Max to 0-1) for Geometric Calculations
-    # Essential for Serration Index to be unit-independent
-    y_min, y_max = np.min(y), np.max(y)
-    x_min, x_max = np.min(x), np.max(x)
+    # Essential for Serration Index to be unit-independent.
+    # All statistics come from one fused pass (see _curve_stats); smoothing window w=1 means no smoothing
+    w = max(1, min(window_size, len(y)//2))
+    (y_min, y_max, x_min, x_max, y_mean,
+     arc_length, chord_length, slope_raw, rcg) = _curve_stats(x, y, w)
     
     if y_max - y_min == 0 or x_max - x_min == 0:
         return {"shape": "Box (Linear)", "description": "Constant value"}
 
-    y_norm = (y - y_min) / (y_max - y_min)
-    x_norm = (x - x_min) / (x_max - x_min)
+    y_range = y_max - y_min
+    x_range = x_max - x_min
 
     # 4. Calculate Parameters
     
     # A. Serration Index (SI)
-    # Arc Length (sum of segments)
-    dy = np.diff(y_norm)
-    dx = np.diff(x_norm)
-    arc_length = np.sum(np.sqrt(dy**2 + dx**2))
-    # Chord Length (Euclidean distance start to end)
-    chord_length = np.sqrt((y_norm[-1] - y_norm[0])**2 + (x_norm[-1] - x_norm[0])**2)
-    
+    # Arc Length (sum of segments) / Chord Length (Euclidean distance start to end)
     # Avoid div by zero (though handled by flat check above)
     serration_index = arc_length / chord_length if chord_length > 0 else 1.0
     
     # B. Linear Slope (of smoothed data to avoid noise affecting trend)
-    # Smoothing window
-    w = min(window_size, len(y)//2)
-    if w > 1:
-        kernel = np.ones(w) / w
-        y_smooth = np.convolve(y, kernel, mode='valid')
-        x_smooth = x[w-1:]
-        # Recalculate norms for slope? No, use raw slope or normalized slope.
-        # Normalized slope is better for generalized thresholds.
-        # Let's use normalized coordinates for slope to match limits.
-        y_s_norm = (y_smooth - y_min) / (y_max - y_min)
-        x_s_norm = (x_smooth - x_min) / (x_max - x_min)
-        slope_norm, _ = np.polyfit(x_s_norm, y_s_norm, 1)
-    else:
-        slope_norm, _ = np.polyfit(x_norm, y_norm, 1)
+    # Normalized slope is better for generalized thresholds (min-max scaling is affine)
+    slope_norm = slope_raw * x_range / y_range
         
     # C. Relative Center of Gravity (RCG)
     # RCG = Sum(Depth_i * GR_i) / Sum(GR_i)  (Using normalized Depth 0-1)
@@ -104,7 +233,7 @@ def identify_curve_shape(
     # -> High GR values are at large x_norm. -> High RCG.
     # Wait, simple Sum(x*GR)/Sum(GR) is the weighted average DEPTH of the GR "mass".
     
-    rcg = np.sum(x_norm * y_norm) / np.sum(y_norm) if np.sum(y_norm) > 0 else 0.5
+    # (rcg from _curve_stats; 0.5 when the curve has no "mass")
     
     # 5. Classification Logic
     # Thresholds are empirical
@@ -150,7 +279,7 @@ def identify_curve_shape(
             "serration_index": round(float(serration_index), 2),
             "slope_norm": round(float(slope_norm), 2),
             "rcg": round(float(rcg), 2),
-            "avg_value": float(np.mean(y)),
+            "avg_value": float(y_mean),
             "total_change": float(y[-1] - y[0])
         }
     }
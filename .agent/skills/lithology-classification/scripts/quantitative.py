@@ -1,8 +1,14 @@
+import math
 import numpy as np
 from typing import Dict, Any, Union, Optional
+from backend.core.log_data import LogData, as_log_data
+
+# Larionov exponents as natural-log rates: 2^(k * IGR) - 1 == expm1(k * ln2 * IGR)
+_LN2_37 = 3.7 * math.log(2)
+_LN2_20 = 2.0 * math.log(2)
 
 def calculate_vsh(
-    log_data: Dict[str, Any],
+    log_data: Union[LogData, Dict[str, Any]],
     gr_curve: str = "GR",
     method: str = "larionov_tertiary",
     gr_min: Optional[float] = None,
@@ -12,7 +18,8 @@ def calculate_vsh(
     Calculate Shale Volume (Vsh) from Gamma Ray.
     
     Args:
-        log_data: Dictionary containing 'curves' -> {curve_name: [values]}
+        log_data: LogData, or dictionary containing 'curves' -> {curve_name: [values]}
+                  (lists with None gaps or numpy arrays)
         gr_curve: Name of the GR curve (default "GR")
         method: Calculation method:
                - "linear": Basic linear index
@@ -26,23 +33,28 @@ def calculate_vsh(
     Returns:
         Dict containing average Vsh, Vsh curve values, and parameters used.
     """
-    curves = log_data.get('curves', {})
+    log = as_log_data(log_data, (gr_curve,))
     
     # Locate GR curve
     # Support aliasing if "GR" not found directly but passed in log_data under matched name
-    if gr_curve not in curves:
+    if gr_curve not in log:
         # Fallback logic could go here, for now assume agent passes correct name
         return {"error": f"Curve '{gr_curve}' not found in data"}
         
-    gr_values = np.array([v for v in curves[gr_curve] if v is not None])
+    # Drop gaps / non-finite samples with the cached finite mask
+    gr_values = log.get_curve(gr_curve)[log.finite(gr_curve)]
     
     if len(gr_values) == 0:
         return {"error": "Empty GR curve"}
 
     # Determine Baselines
     # Robust statistics: use percentiles to avoid outliers affecting min/max
-    _min = float(np.percentile(gr_values, 5)) if gr_min is None else gr_min
-    _max = float(np.percentile(gr_values, 95)) if gr_max is None else gr_max
+    # (one multi-q percentile call = one partition of the data)
+    if gr_min is None and gr_max is None:
+        _min, _max = (float(v) for v in np.percentile(gr_values, [5, 95]))
+    else:
+        _min = float(np.percentile(gr_values, 5)) if gr_min is None else gr_min
+        _max = float(np.percentile(gr_values, 95)) if gr_max is None else gr_max
     
     # Avoid localized division by zero
     denom = _max - _min
@@ -51,41 +63,50 @@ def calculate_vsh(
         
     # 1. Linear Index (IGR)
     # Clip values to 0-1 range
-    # Ensure compatible shapes by using compatible types
-    # Handle scalar broadcast
-    igr = (gr_values - _min) / denom
-    igr = np.clip(igr, 0, 1)
+    # One N-sized buffer: IGR is computed into it and every correction below works in place
+    igr = np.subtract(gr_values, _min, dtype=np.float64)
+    np.divide(igr, denom, out=igr)
+    np.clip(igr, 0.0, 1.0, out=igr)
+    vsh = igr
     
     # 2. Apply Corrections
     if method == "linear":
-        vsh = igr
+        pass
     elif method == "larionov_tertiary":
         # Formula: 0.083 * (2^(3.7 * IGR) - 1)
-        vsh = 0.083 * (2**(3.7 * igr) - 1)
+        _larionov_inplace(vsh, _LN2_37, 0.083)
     elif method == "larionov_old":
         # Formula: 0.33 * (2^(2 * IGR) - 1)
-        vsh = 0.33 * (2**(2 * igr) - 1)
+        _larionov_inplace(vsh, _LN2_20, 0.33)
     elif method == "steiber":
         # Formula: IGR / (3 - 2 * IGR)
         # Avoid div by zero if IGR > 1.5 (unlikely due to clip)
-        vsh = igr / (3 - 2 * igr)
+        den = np.multiply(vsh, -2.0)
+        den += 3.0
+        np.divide(vsh, den, out=vsh)
     elif method == "clavier":
         # Formula: 1.7 - sqrt(3.38 - (IGR + 0.7)^2)
         # Simplified approximate for Tertiary often used
-        vsh = 1.7 - np.sqrt(3.38 - (igr + 0.7)**2)
+        vsh += 0.7
+        np.square(vsh, out=vsh)
+        np.subtract(3.38, vsh, out=vsh)
+        np.sqrt(vsh, out=vsh)
+        np.subtract(1.7, vsh, out=vsh)
     else:
         # Default to larionov_tertiary for safety if unknown
-        vsh = 0.083 * (2**(3.7 * igr) - 1)
+        _larionov_inplace(vsh, _LN2_37, 0.083)
         method = f"{method} (unknown, used larionov_tertiary)"
         
     # Clip final result
-    vsh = np.clip(vsh, 0, 1)
+    np.clip(vsh, 0.0, 1.0, out=vsh)
+    avg_vsh = float(vsh.mean())
+    p10_vsh, p90_vsh = (float(v) for v in np.percentile(vsh, [10, 90]))
     
     return {
         "method": method,
-        "average_vsh": float(np.mean(vsh)),
-        "p10_vsh": float(np.percentile(vsh, 10)),
-        "p90_vsh": float(np.percentile(vsh, 90)),
+        "average_vsh": avg_vsh,
+        "p10_vsh": p10_vsh,
+        "p90_vsh": p90_vsh,
         "parameters": {
             "gr_min": _min,
             "gr_max": _max,
@@ -94,9 +115,17 @@ def calculate_vsh(
         # return sample values for plotting/checking (limit to 10 for prompt economy?)
         # Agent usually needs aggregate, but maybe let's return stats only to save token space
         # Or return a simplified "classification" string
-        "interpretation": _interpret_vsh(np.mean(vsh))
+        "interpretation": _interpret_vsh(avg_vsh)
     }
 
+def _larionov_inplace(buf: np.ndarray, rate: float, scale: float) -> None:
+    """
+    buf <- scale * (exp(rate * buf) - 1), without temporaries.
+    """
+    buf *= rate
+    np.expm1(buf, out=buf)
+    buf *= scale
+
 def _interpret_vsh(avg_vsh: float) -> str:
     if avg_vsh < 0.15:
         return "Clean Sand (纯砂岩)"
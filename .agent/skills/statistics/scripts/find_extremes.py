@@ -1,9 +1,62 @@
-from typing import Dict, Any, List, Optional
-import pandas as pd
+from typing import Dict, Any, List, Optional, Union
 import numpy as np
+from backend.core.curve_mapper import get_curve_mapper
+from backend.core.log_data import LogData, as_log_data, curve_names
+
+try:
+    import bottleneck as bn
+except ImportError:  # optional accelerator
+    bn = None
+
+
+def _resolve_curve_name(curve_keys: tuple, requested: str) -> Optional[str]:
+    """
+    Actual curve name for a requested name or standard type (None if not found).
+    """
+    # First, check if it's a direct match
+    if requested in curve_keys:
+        return requested
+    
+    # Try CurveMapper to resolve standard type to actual curve name: one probe into the
+    # mapper's memoized {standard_type: first original name} for this curve set
+    try:
+        orig_name = get_curve_mapper().curves_by_type(curve_keys).get(requested.upper())
+        if orig_name is not None:
+            return orig_name
+    except Exception:
+        pass  # Fall through to case-insensitive check
+    
+    # Fallback: case-insensitive match
+    return next((k for k in curve_keys if k.upper() == requested.upper()), None)
+
+def _nan_extreme_index(values: np.ndarray, is_max: bool) -> Optional[int]:
+    """
+    Index of the first min/max in one NaN-skipping scan (no mask), or None when the curve
+    is all-NaN or the extreme is +/-inf (callers then fall back to the finite mask).
+    """
+    try:
+        if bn is not None:
+            idx = bn.nanargmax(values) if is_max else bn.nanargmin(values)
+        else:
+            idx = np.nanargmax(values) if is_max else np.nanargmin(values)
+    except ValueError:  # all-NaN slice
+        return None
+    return int(idx) if np.isfinite(values[idx]) else None
+
+def _extreme_result(curve: str, mode: str, value: float, depth: float, depth_in_range: np.ndarray) -> Dict[str, Any]:
+    return {
+        "curve": curve,
+        "mode": mode,
+        "value": float(value),
+        "depth": float(depth),
+        "depth_range_analyzed": {
+            "start": float(depth_in_range.min()),
+            "end": float(depth_in_range.max())
+        }
+    }
 
 def execute(
-    log_data: Dict[str, Any], 
+    log_data: Union[LogData, Dict[str, Any]], 
     curve_name: str, 
     mode: str = 'min', 
     start_depth: Optional[float] = None, 
@@ -13,7 +66,7 @@ def execute(
     Finds the extreme value (min or max) of a curve within a specific depth range.
     
     Args:
-        log_data: Standard log data dictionary containing 'curves' (dict of arrays).
+        log_data: LogData, or standard log data dictionary containing 'curves' (dict of arrays).
         curve_name: Name of the curve to analyze (e.g., 'GR', 'RHOB').
         mode: 'min' or 'max'.
         start_depth: Start depth to filter (inclusive).
@@ -22,78 +75,55 @@ def execute(
     Returns:
         JSON compatible dict with value, depth, and metadata.
     """
-    curves = log_data.get('curves', {})
+    curve_keys = tuple(curve_names(log_data))
     
     # Resolve curve name using CurveMapper
     # This allows using standard types like 'GR' even if the actual curve is 'GR_MERGE'
-    actual_curve_name = None
-    
-    # First, check if it's a direct match
-    if curve_name in curves:
-        actual_curve_name = curve_name
-    else:
-        # Try CurveMapper to resolve standard type to actual curve name
-        try:
-            from backend.core.curve_mapper import get_curve_mapper
-            mapper = get_curve_mapper()
-            mapping = mapper.map_curves(list(curves.keys()))
-            matched = mapping.get('matched', {})
-            
-            # Find which actual curve name maps to the requested standard type
-            for orig_name, std_type in matched.items():
-                if std_type.upper() == curve_name.upper():
-                    actual_curve_name = orig_name
-                    break
-        except Exception:
-            pass  # Fall through to case-insensitive check
-        
-        # Fallback: case-insensitive match
-        if not actual_curve_name:
-            match = next((k for k in curves.keys() if k.upper() == curve_name.upper()), None)
-            if match:
-                actual_curve_name = match
+    actual_curve_name = _resolve_curve_name(curve_keys, curve_name)
     
     if not actual_curve_name:
-        return {"error": f"Curve '{curve_name}' not found. Available curves: {list(curves.keys())}"}
+        return {"error": f"Curve '{curve_name}' not found. Available curves: {list(curve_keys)}"}
 
-    # Prepare DataFrame
+    # Prepare arrays
     # We need DEPTH and the Target Curve
-    depth_curve = next((k for k in curves.keys() if k.upper() in ['DEPTH', 'DEPT']), None)
+    depth_curve = next((k for k in curve_keys if k.upper() in ['DEPTH', 'DEPT']), None)
     if not depth_curve:
         return {"error": "Depth curve not found in data."}
         
-    df = pd.DataFrame({
-        'DEPTH': curves[depth_curve],
-        'VALUE': curves[actual_curve_name]
-    })
+    # Only the two curves read here are packed (a with_log_data() dict carries them already)
+    log = as_log_data(log_data, (depth_curve, actual_curve_name))
+    if actual_curve_name not in log or depth_curve not in log:
+        return {"error": f"Curve '{actual_curve_name}' or '{depth_curve}' is not numeric."}
     
-    # Drop N/A
-    df = df.dropna()
+    # float64 row views of the packed block
+    depth = log.get_curve(depth_curve)
+    values = log.get_curve(actual_curve_name)
+    is_max = mode.lower() == 'max'
     
-    # Filter by depth range
+    # Global min/max over a gap-free depth column: a single NaN-skipping scan, no mask
+    if start_depth is None and end_depth is None and log.finite(depth_curve).all():
+        target_idx = _nan_extreme_index(values, is_max)
+        if target_idx is not None:
+            finite_values = log.finite(actual_curve_name)
+            depth_in_range = depth if finite_values.all() else depth[finite_values]
+            return _extreme_result(actual_curve_name, mode, values[target_idx], depth[target_idx], depth_in_range)
+    
+    # Drop N/A (cached finite masks) and filter by depth range in a single mask
+    mask = log.finite(depth_curve) & log.finite(actual_curve_name)
     if start_depth is not None:
-        df = df[df['DEPTH'] >= start_depth]
+        mask &= depth >= start_depth
     if end_depth is not None:
-        df = df[df['DEPTH'] <= end_depth]
+        mask &= depth <= end_depth
         
-    if df.empty:
+    rows = np.flatnonzero(mask)
+    if rows.size == 0:
         return {"error": "No valid data found in the specified range."}
         
-    # Find Extreme
-    if mode.lower() == 'max':
-        target_idx = df['VALUE'].idxmax()
+    # Find Extreme (first occurrence, like idxmin/idxmax)
+    selected = values[rows]
+    if is_max:
+        target_idx = rows[selected.argmax()]
     else:
-        target_idx = df['VALUE'].idxmin()
+        target_idx = rows[selected.argmin()]
         
-    result_row = df.loc[target_idx]
-    
-    return {
-        "curve": actual_curve_name,
-        "mode": mode,
-        "value": float(result_row['VALUE']),
-        "depth": float(result_row['DEPTH']),
-        "depth_range_analyzed": {
-            "start": float(df['DEPTH'].min()),
-            "end": float(df['DEPTH'].max())
-        }
-    }
+    return _extreme_result(actual_curve_name, mode, values[target_idx], depth[target_idx], depth[rows])
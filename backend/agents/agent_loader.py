@@ -8,6 +8,8 @@ and dynamically instantiate agent classes without hardcoding imports.
 import yaml
 import importlib
 import logging
+import threading
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
@@ -16,8 +18,13 @@ logger = logging.getLogger(__name__)
 # Cache for loaded registry
 _registry_cache: Optional[Dict[str, Any]] = None
 _agents_cache: Optional[Dict[str, Any]] = None
+# Guards cache population; reentrant because load_agents() calls load_registry()
+_cache_lock = threading.RLock()
+# Derived views of the loaded agents: name -> (dependencies, value); reused while deps are the same objects
+_views_cache: Dict[str, Any] = {}
 
 
+@lru_cache(maxsize=1)
 def get_registry_path() -> Path:
     """Get the path to registry.yaml"""
     return Path(__file__).parent / "registry.yaml"
@@ -35,23 +42,29 @@ def load_registry(force_reload: bool = False) -> Dict[str, Any]:
     """
     global _registry_cache
     
-    if _registry_cache is not None and not force_reload:
-        return _registry_cache
+    # Lock-free fast path once the cache is populated
+    cached = _registry_cache
+    if cached is not None and not force_reload:
+        return cached
     
-    registry_path = get_registry_path()
-    
-    if not registry_path.exists():
-        logger.error(f"Registry file not found: {registry_path}")
-        return {"agents": []}
-    
-    try:
-        with open(registry_path, 'r', encoding='utf-8') as f:
-            _registry_cache = yaml.safe_load(f)
-            logger.info(f"Loaded {len(_registry_cache.get('agents', []))} agents from registry")
+    with _cache_lock:
+        if _registry_cache is not None and not force_reload:
             return _registry_cache
-    except Exception as e:
-        logger.error(f"Failed to load registry: {e}")
-        return {"agents": []}
+        
+        registry_path = get_registry_path()
+        
+        if not registry_path.exists():
+            logger.error(f"Registry file not found: {registry_path}")
+            return {"agents": []}
+        
+        try:
+            with open(registry_path, 'r', encoding='utf-8') as f:
+                _registry_cache = yaml.safe_load(f)
+                logger.info(f"Loaded {len(_registry_cache.get('agents', []))} agents from registry")
+                return _registry_cache
+        except Exception as e:
+            logger.error(f"Failed to load registry: {e}")
+            return {"agents": []}
 
 
 def load_agents(force_reload: bool = False) -> Dict[str, Dict[str, Any]]:
@@ -75,51 +88,73 @@ def load_agents(force_reload: bool = False) -> Dict[str, Dict[str, Any]]:
     """
     global _agents_cache
     
-    if _agents_cache is not None and not force_reload:
-        return _agents_cache
+    # Lock-free fast path once the cache is populated
+    cached = _agents_cache
+    if cached is not None and not force_reload:
+        return cached
     
-    registry = load_registry(force_reload)
-    agents = {}
+    with _cache_lock:
+        if _agents_cache is not None and not force_reload:
+            return _agents_cache
+        
+        registry = load_registry(force_reload)
+        agents = {}
     
-    for agent_def in registry.get('agents', []):
-        key = agent_def.get('key')
-        if not key:
-            logger.warning("Agent definition missing 'key', skipping")
-            continue
+        for agent_def in registry.get('agents', []):
+            key = agent_def.get('key')
+            if not key:
+                logger.warning("Agent definition missing 'key', skipping")
+                continue
         
-        try:
-            # Dynamic import
-            module_path = agent_def.get('module')
-            class_name = agent_def.get('class')
+            try:
+                # Dynamic import
+                module_path = agent_def.get('module')
+                class_name = agent_def.get('class')
             
-            if not module_path or not class_name:
-                logger.warning(f"Agent {key} missing module/class, skipping")
-                continue
+                if not module_path or not class_name:
+                    logger.warning(f"Agent {key} missing module/class, skipping")
+                    continue
             
-            module = importlib.import_module(module_path)
-            cls = getattr(module, class_name)
-            instance = cls()
+                module = importlib.import_module(module_path)
+                cls = getattr(module, class_name)
+                instance = cls()
             
-            agents[key] = {
-                'instance': instance,
-                'name': agent_def.get('name', key),
-                'abbr': agent_def.get('abbr', key[0]),
-                'color': agent_def.get('color', '#888888'),
-                'capabilities': agent_def.get('capabilities', []),
-                'keywords': agent_def.get('keywords', []),
-                'skill_packs': agent_def.get('skill_packs', agent_def.get('skills', [])),
-                'is_arbitrator': agent_def.get('is_arbitrator', False)
-            }
+                agents[key] = {
+                    'instance': instance,
+                    'name': agent_def.get('name', key),
+                    'abbr': agent_def.get('abbr', key[0]),
+                    'color': agent_def.get('color', '#888888'),
+                    'capabilities': agent_def.get('capabilities', []),
+                    'keywords': agent_def.get('keywords', []),
+                    'skill_packs': agent_def.get('skill_packs', agent_def.get('skills', [])),
+                    'is_arbitrator': agent_def.get('is_arbitrator', False)
+                }
             
-            logger.debug(f"Loaded agent: {key}")
+                logger.debug(f"Loaded agent: {key}")
             
-        except Exception as e:
-            logger.error(f"Failed to load agent {key}: {e}")
-            continue
+            except Exception as e:
+                logger.error(f"Failed to load agent {key}: {e}")
+                continue
     
-    _agents_cache = agents
-    logger.info(f"Successfully loaded {len(agents)} agents")
-    return agents
+        _agents_cache = agents
+        logger.info(f"Successfully loaded {len(agents)} agents")
+        return agents
+
+
+def _cached_view(name: str, build, *deps):
+    """
+    Return a view derived from load_agents() (and any extra deps), rebuilding it only
+    when the agents dict or one of the deps has been replaced (e.g. after a reload).
+    Views are shared; callers must not mutate them.
+    """
+    agents = load_agents()
+    key = (agents,) + deps
+    entry = _views_cache.get(name)
+    if entry is not None and len(entry[0]) == len(key) and all(a is b for a, b in zip(entry[0], key)):
+        return entry[1]
+    value = build(agents, *deps)
+    _views_cache[name] = (key, value)
+    return value
 
 
 def get_agent_skill_packs(agent_key: str) -> List[str]:
@@ -149,17 +184,18 @@ def get_agent_instance(key: str):
 
 def get_specialist_agents() -> Dict[str, Dict[str, Any]]:
     """Get all non-arbitrator agents"""
-    agents = load_agents()
-    return {k: v for k, v in agents.items() if not v.get('is_arbitrator', False)}
+    return _cached_view(
+        'specialists',
+        lambda agents: {k: v for k, v in agents.items() if not v.get('is_arbitrator', False)}
+    )
 
 
 def get_arbitrator() -> Optional[Dict[str, Any]]:
     """Get the arbitrator agent"""
-    agents = load_agents()
-    for key, agent in agents.items():
-        if agent.get('is_arbitrator', False):
-            return agent
-    return None
+    return _cached_view(
+        'arbitrator',
+        lambda agents: next((a for a in agents.values() if a.get('is_arbitrator', False)), None)
+    )
 
 
 def build_team_description() -> str:
@@ -167,6 +203,10 @@ def build_team_description() -> str:
     Build a human-readable description of all specialist agents
     for use in Arbitrator's prompt.
     """
+    return _cached_view('team_description', lambda agents: _build_team_description())
+
+
+def _build_team_description() -> str:
     specialists = get_specialist_agents()
     lines = []
     
@@ -184,7 +224,15 @@ def build_team_description_with_tools() -> str:
     """
     from backend.skills.registry import get_skill_registry
     registry = get_skill_registry()
-    
+    # Rebuilt when agents reload or the skill registry is replaced / rescanned
+    return _cached_view(
+        'team_description_with_tools',
+        lambda agents, reg, tools: _build_team_description_with_tools(reg),
+        registry, registry.tools
+    )
+
+
+def _build_team_description_with_tools(registry) -> str:
     specialists = get_specialist_agents()
     lines = []
     
@@ -220,8 +268,10 @@ def get_router_keywords() -> Dict[str, List[str]]:
     Returns:
         {'agent_key': ['keyword1', 'keyword2', ...]}
     """
-    specialists = get_specialist_agents()
-    return {key: info.get('keywords', []) for key, info in specialists.items()}
+    return _cached_view(
+        'router_keywords',
+        lambda agents: {key: info.get('keywords', []) for key, info in get_specialist_agents().items()}
+    )
 
 
 def get_frontend_agent_list() -> List[Dict[str, str]]:
@@ -231,8 +281,7 @@ def get_frontend_agent_list() -> List[Dict[str, str]]:
     Returns:
         [{'key': 'AgentKey', 'name': '中文名', 'abbr': 'X', 'color': '#hex'}, ...]
     """
-    agents = load_agents()
-    return [
+    return _cached_view('frontend_agent_list', lambda agents: [
         {
             'key': key,
             'name': info['name'],
@@ -240,12 +289,14 @@ def get_frontend_agent_list() -> List[Dict[str, str]]:
             'color': info['color']
         }
         for key, info in agents.items()
-    ]
+    ])
 
 
 def reload_registry():
     """Force reload the registry (useful after config changes)"""
     global _registry_cache, _agents_cache
-    _registry_cache = None
-    _agents_cache = None
-    return load_agents(force_reload=True)
+    with _cache_lock:
+        _registry_cache = None
+        _agents_cache = None
+        _views_cache.clear()
+        return load_agents(force_reload=True)
@@ -1,15 +1,112 @@
-from typing import Dict, Any, List, Optional
-from backend.agents.base_agent import BaseAgent
+from typing import Dict, Any, List, Optional, Tuple
+from backend.agents.base_agent import BaseAgent, error_excerpt, submit_speculative
 from backend.agents.agent_loader import (
     build_team_description, 
     build_team_description_with_tools,
+    get_agent_skills,
     get_specialist_agents
 )
-import json
+from backend.agents.memory import MemoryController, split_turns
+from backend.agents.routing_cache import build_routing_key, get_routing_cache
+from backend.core.analysis_logger import get_current_logger
+from backend.core.json_stream import StreamingJsonParser
+from backend.skills.registry import get_skill_registry
+from functools import lru_cache
 import logging
+import os
+import re
 
 logger = logging.getLogger(__name__)
 
+# Token budget for the discussion record in the Arbitrator prompt; older turns are
+# summarized beyond it so prompt size (and TTFT) stays flat as the discussion grows
+CONTEXT_BUDGET_TOKENS = int(os.getenv("ARBITRATOR_CONTEXT_BUDGET", "4000"))
+_MEMORY = MemoryController()
+
+# A lone specialist answer at or above this confidence is accepted as FINAL without an LLM call
+FAST_PATH_CONFIDENCE = 0.9
+
+# Specialist turn as written by the workflow: "<AgentKey>: Conf=<confidence>. <reasoning>"
+_SPECIALIST_TURN_RE = re.compile(r'^(\w+): Conf=(\S+?)\.(?:\s+|$)(.*)', re.DOTALL)
+
+# First context line carrying the user's question
+_USER_QUESTION_LINE_RE = re.compile(r'^.*(?:User Note:|重点:|用户问题:).*$', re.MULTILINE)
+
+def _prewarm_specialist(agent_key: str):
+    """
+    Load the specialist's skill docs and import its tool scripts into the shared caches
+    (run while the Arbitrator is still streaming its reasoning).
+    """
+    from backend.agents.skill_loader import build_agent_context
+    try:
+        skill_packs = get_agent_skills(agent_key)
+        build_agent_context(skill_packs)
+        get_skill_registry().preload_tools_for_agent(skill_packs)
+    except Exception as e:
+        logger.warning(f"Prewarm of {agent_key} failed: {e}")
+
+
+@lru_cache(maxsize=4)
+def _static_prompt(team_desc: str, specialist_keys: Tuple[str, ...]) -> str:
+    """
+    The Arbitrator's static prompt (roster, rules, output format), built once per roster.
+    Keyed on the roster text itself, so registry or tool reloads rebuild it; keys are sorted
+    by the caller so the prefix is byte-identical across turns and processes.
+    """
+    specialist_keys = list(specialist_keys)
+    return f"""
+你是首席解释工程师 (Arbitrator)，负责协调团队完成测井解释任务。
+
+## 你的团队成员 (含工具信息):
+{team_desc}
+
+## 你的任务:
+1. **综合分析**: 审阅所有已参与专家的分析结果
+2. **信息评估**: 判断是否还缺少关键信息来回答用户问题
+3. **智能调度**: 
+   - 如果检测到匹配的工具，**优先调度**拥有该工具的专家
+   - 如果专家声称"缺乏数据"但其拥有相关工具，要求其使用工具
+4. **最终决策**: 如果信息充分，给出最终结论
+
+## 调度规则 (重要!):
+1. 如果有"⭐工具匹配建议"，**必须优先**调度推荐的专家
+2. 如果专家说"超出专业范围"或"缺乏数据"，但其拥有相关工具，**要求其再次分析并使用工具**
+3. 避免重复调度同一专家超过2次
+4. 如果需要多位专家做**互不依赖**的分析 (如同一井段的岩性与电性)，可在 `next_agents` 中同时调度 (最多3位)，它们将并行执行
+
+## 输出规则:
+- 如果信息**不充分**，设置 `status: "NEED_MORE_INFO"` 并指定 `next_agent`
+- 如果信息**充分**，设置 `status: "FINAL"` 并给出 `decision`
+- `next_agent` 必须是以下之一: {specialist_keys}
+- 所有文本字段必须使用 **中文**
+
+## 输出格式 (严格JSON):
+{{
+    "status": "FINAL" | "NEED_MORE_INFO",
+    "next_agent": "AgentKey 或 null",
+    "question_for_agent": "向该专家提出的具体问题 或 null",
+    "next_agents": [{{"agent": "AgentKey", "question": "具体问题"}}] 或 null (仅并行调度多位专家时),
+    "decision": "最终结论 (仅当 status=FINAL 时)",
+    "confidence": 0.0-1.0,
+    "reasoning": "你的思考过程 (中文)"
+}}
+
+请仅返回JSON，不要包含其他文字。
+"""
+
+
+def _error_result(response_text: str) -> Dict[str, Any]:
+    """ERROR decision for a reply that could not be parsed or was cut off."""
+    return {
+        "status": "ERROR",
+        "decision": "解析错误",
+        "confidence": 0.0,
+        "next_agent": None,
+        "question_for_agent": None,
+        "reasoning": "LLM输出格式解析失败",
+        "raw_output": error_excerpt(response_text) or "No response"
+    }
+
 
 class ArbitratorAgent(BaseAgent):
     """
@@ -34,7 +131,6 @@ class ArbitratorAgent(BaseAgent):
         Returns:
             Dict mapping agent_key to list of matched tool names
         """
-        from backend.skills.registry import get_skill_registry
         registry = get_skill_registry()
         
         specialists = get_specialist_agents()
@@ -48,83 +144,134 @@ class ArbitratorAgent(BaseAgent):
         
         return matches
     
-    def _build_prompt(self, context: str, user_question: str = None) -> str:
-        """Build the arbitrator prompt with dynamic team and tool description."""
+    def _build_prompt(self, context: str, user_question: str = None) -> Tuple[str, str]:
+        """
+        Build the arbitrator prompt with dynamic team and tool description.
+        
+        Returns:
+            (static_part, dynamic_part): team roster, rules and output format, which only
+            change with the registry, and the tool hints plus discussion record of this turn.
+        """
         team_desc = build_team_description_with_tools()
-        specialist_keys = list(get_specialist_agents().keys())
+        specialist_keys = tuple(sorted(get_specialist_agents()))
         
         # Tool-based routing recommendation
         tool_recommendation = ""
         if user_question:
             matches = self._match_tools_to_question(user_question)
             if matches:
-                tool_recommendation = "## ⭐ 工具匹配建议 (基于用户问题关键词)\n"
-                for agent_key, tool_names in matches.items():
-                    tool_recommendation += f"- **{agent_key}** 有工具 `{', '.join(tool_names)}` 可回答此问题\n"
-                tool_recommendation += "\n> 请**优先调度**拥有匹配工具的专家！\n"
+                tool_recommendation = "".join([
+                    "## ⭐ 工具匹配建议 (基于用户问题关键词)\n",
+                    *(f"- **{agent_key}** 有工具 `{', '.join(tool_names)}` 可回答此问题\n"
+                      for agent_key, tool_names in matches.items()),
+                    "\n> 请**优先调度**拥有匹配工具的专家！\n",
+                ])
         
-        return f"""
-你是首席解释工程师 (Arbitrator)，负责协调团队完成测井解释任务。
-
-## 你的团队成员 (含工具信息):
-{team_desc}
-
+        static_part = _static_prompt(team_desc, specialist_keys)
+        discussion = _MEMORY.compress(context, CONTEXT_BUDGET_TOKENS, speakers=specialist_keys)
+        
+        dynamic_part = f"""
 {tool_recommendation}
 
 ## 当前讨论记录:
-{context}
-
-## 你的任务:
-1. **综合分析**: 审阅所有已参与专家的分析结果
-2. **信息评估**: 判断是否还缺少关键信息来回答用户问题
-3. **智能调度**: 
-   - 如果检测到匹配的工具，**优先调度**拥有该工具的专家
-   - 如果专家声称"缺乏数据"但其拥有相关工具，要求其使用工具
-4. **最终决策**: 如果信息充分，给出最终结论
-
-## 调度规则 (重要!):
-1. 如果上方有"⭐工具匹配建议"，**必须优先**调度推荐的专家
-2. 如果专家说"超出专业范围"或"缺乏数据"，但其拥有相关工具，**要求其再次分析并使用工具**
-3. 避免重复调度同一专家超过2次
-
-## 输出规则:
-- 如果信息**不充分**，设置 `status: "NEED_MORE_INFO"` 并指定 `next_agent`
-- 如果信息**充分**，设置 `status: "FINAL"` 并给出 `decision`
-- `next_agent` 必须是以下之一: {specialist_keys}
-- 所有文本字段必须使用 **中文**
-
-## 输出格式 (严格JSON):
-{{
-    "status": "FINAL" | "NEED_MORE_INFO",
-    "next_agent": "AgentKey 或 null",
-    "question_for_agent": "向该专家提出的具体问题 或 null",
-    "decision": "最终结论 (仅当 status=FINAL 时)",
-    "confidence": 0.0-1.0,
-    "reasoning": "你的思考过程 (中文)"
-}}
-
-请仅返回JSON，不要包含其他文字。
+{discussion}
 """
+        return static_part, dynamic_part
+
+    def _fast_path_decision(self, context: str, user_question: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        FINAL decision for the trivial case, or None to ask the LLM: exactly one specialist
+        has answered the current user question, with confidence >= FAST_PATH_CONFIDENCE,
+        and no other specialist holds a tool matching the question.
+        """
+        specialists = get_specialist_agents()
+        answers = {}
+        for turn in split_turns(context, specialists.keys()):
+            if turn.startswith(("User Note:", "User Follow-up:")):
+                answers = {}  # only answers to the latest user question count
+                continue
+            match = _SPECIALIST_TURN_RE.match(turn)
+            if match and match.group(1) in specialists:
+                try:
+                    answers[match.group(1)] = (float(match.group(2)), match.group(3).strip())
+                except ValueError:
+                    return None
+        
+        # Several answers need reconciling, which free text does not allow here
+        if len(answers) != 1:
+            return None
+        (agent_key, (confidence, reasoning)), = answers.items()
+        if confidence < FAST_PATH_CONFIDENCE or not reasoning:
+            return None
+        if user_question and set(self._match_tools_to_question(user_question)) - {agent_key}:
+            return None
+        
+        return {
+            "status": "FINAL",
+            "decision": reasoning,
+            "confidence": confidence,
+            "next_agent": None,
+            "question_for_agent": None,
+            "reasoning": f"仅 {agent_key} 作答且置信度 {confidence:.2f} (≥ {FAST_PATH_CONFIDENCE})，无其他待调度专家，直接采纳其结论。",
+            "fast_path": True
+        }
 
     def analyze(self, data: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
         """
         Arbitrate the discussion with dynamic team and tool awareness.
         """
-        # Extract user question from context if available
-        user_question = None
-        if context:
-            # Try to find user question in context
-            for line in context.split('\n'):
-                if 'User Note:' in line or '重点:' in line or '用户问题:' in line:
-                    user_question = line
-                    break
-            # Also check for specific keywords
-            if not user_question:
-                user_question = context  # Use full context as fallback
-        
-        prompt = self._build_prompt(context or "", user_question)
-        
-        response_text = self.think(prompt)
+        # Extract user question from context if available: the first marker line,
+        # else the full context as fallback (single regex pass, no line split)
+        match = _USER_QUESTION_LINE_RE.search(context) if context else None
+        user_question = match.group(0) if match else (context or None)
+        
+        # Same question, same discussion tail, same roster -> reuse the earlier dispatch
+        routing_cache = get_routing_cache()
+        cache_key = build_routing_key(user_question, context, get_specialist_agents().keys())
+        cached = routing_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Routing cache hit -> {cached.get('next_agent')}")
+            analysis_log = get_current_logger()
+            if analysis_log:
+                analysis_log.log_cache_hit()
+            return cached
+        
+        # High-confidence lone answer: conclude deterministically, the LLM would only copy it
+        fast = self._fast_path_decision(context or "", user_question)
+        if fast is not None:
+            logger.info(f"Arbitrator fast path: FINAL without LLM (conf={fast['confidence']:.2f})")
+            analysis_log = get_current_logger()
+            if analysis_log:
+                analysis_log.log_fast_path()
+            return fast
+        
+        static_part, dynamic_part = self._build_prompt(context or "", user_question)
+        
+        # Stream the reply: as soon as next_agent is complete, start warming that specialist
+        # while the model is still writing question_for_agent / reasoning
+        def on_field(key: str, value: Any):
+            if key == 'next_agent':
+                keys = [value]
+            elif key == 'next_agents' and isinstance(value, list):
+                keys = [d.get('agent') for d in value if isinstance(d, dict)]
+            else:
+                return
+            for agent_key in keys:
+                if agent_key in get_specialist_agents():
+                    logger.info(f"Prewarming {agent_key} while arbitration completes")
+                    submit_speculative(_prewarm_specialist, agent_key)
+        
+        parser = StreamingJsonParser(on_field=on_field)
+        chunks = []
+        try:
+            for chunk in self.think_stream(dynamic_part, static_context=static_part):
+                chunks.append(chunk)
+                parser.push(chunk)
+        except Exception:
+            # The stream broke off mid-reply (already logged by think_stream): the partial
+            # reply must not be taken as the decision
+            return _error_result("".join(chunks))
+        response_text = "".join(chunks)
         
         try:
             result = self.parse_json_response(response_text)
@@ -135,12 +282,28 @@ class ArbitratorAgent(BaseAgent):
                 result['status'] = 'DISCUSSION'  # Keep compatibility with workflow
             
             # Ensure next_agent is valid
+            valid_agents = get_specialist_agents()
             next_agent = result.get('next_agent')
             if next_agent:
-                valid_agents = get_specialist_agents()
                 if next_agent not in valid_agents:
                     logger.warning(f"Invalid next_agent: {next_agent}, clearing")
                     result['next_agent'] = None
+            
+            # Fan-out: keep valid, distinct {agent, question} entries; next_agent mirrors the first
+            fan_out = result.get('next_agents')
+            if fan_out:
+                cleaned = []
+                for entry in fan_out if isinstance(fan_out, list) else []:
+                    agent_key = entry.get('agent') if isinstance(entry, dict) else entry
+                    if agent_key in valid_agents and all(agent_key != d['agent'] for d in cleaned):
+                        question = entry.get('question') if isinstance(entry, dict) else None
+                        cleaned.append({"agent": agent_key, "question": question or ""})
+                    else:
+                        logger.warning(f"Invalid next_agents entry: {entry}, dropping")
+                result['next_agents'] = cleaned or None
+                if cleaned and not result.get('next_agent'):
+                    result['next_agent'] = cleaned[0]['agent']
+                    result['question_for_agent'] = cleaned[0]['question']
                     
             # Enforce confidence is float
             try:
@@ -149,15 +312,11 @@ class ArbitratorAgent(BaseAgent):
                 logger.warning(f"Failed to parse confidence: {result.get('confidence')}")
                 result['confidence'] = 0.0
             
+            # Only dispatch decisions are reused; FINAL conclusions always come from the LLM
+            if result['status'] == 'DISCUSSION' and result.get('next_agent'):
+                routing_cache.put_async(cache_key, result)
+            
             return result
             
         except ValueError:
-            return {
-                "status": "ERROR",
-                "decision": "解析错误",
-                "confidence": 0.0,
-                "next_agent": None,
-                "question_for_agent": None,
-                "reasoning": "LLM输出格式解析失败",
-                "raw_output": response_text if 'response_text' in locals() else "No response"
-            }
+            return _error_result(response_text)
@@ -1,12 +1,187 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
 import json
-import re
 import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from backend.core.fuzzy_json import fuzzy_loads
+from backend.core.json_stream import StreamingJsonParser
 from backend.core.llm_service import llm_service
+from backend.core.single_flight import request_key
+from backend.skills.registry import get_skill_registry
 
 logger = logging.getLogger(__name__)
 
+# Shared pool for agent work that overlaps other agents' LLM calls (the OpenAI client is
+# thread-safe and pools its HTTP connections, so calls from these threads run concurrently)
+_AGENT_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AGENT_POOL_WORKERS", "8")),
+    thread_name_prefix="agent"
+)
+
+
+def submit_with_logger(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """
+    Run fn on the shared agent pool with the caller's analysis logger made current on the
+    worker thread, so LLM calls made there are recorded in the same analysis log.
+    """
+    from backend.core.analysis_logger import get_current_logger, set_current_logger, clear_current_logger
+    
+    analysis_log = get_current_logger()
+    
+    def run():
+        set_current_logger(analysis_log)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            clear_current_logger()
+    
+    return _AGENT_POOL.submit(run)
+
+
+# Work started ahead of need (speculative tool calls, specialist prewarming), shared by all
+# agents. Separate from _AGENT_POOL so an agent waiting on its own speculative call can
+# never starve the pool it runs on.
+_SPECULATIVE_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SPECULATIVE_POOL_WORKERS", "4")),
+    thread_name_prefix="speculative"
+)
+
+
+def submit_speculative(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """
+    Run fn on the shared speculative pool. Callers cancel() the Future when the result
+    turns out not to be needed; only side-effect-free work may be submitted.
+    """
+    return _SPECULATIVE_POOL.submit(fn, *args, **kwargs)
+
+
+# Opt-in memo of think() replies: identical (model, temperature, system prompt, prompt)
+# within THINK_CACHE_TTL seconds reuses the earlier reply. Off by default because
+# sampling is not deterministic; meant for replay / evaluation runs and retries.
+THINK_CACHE_TTL = float(os.getenv("THINK_CACHE_TTL", "0"))
+THINK_CACHE_SIZE = int(os.getenv("THINK_CACHE_SIZE", "256"))
+
+
+class _ThinkCache:
+    """Thread-safe LRU of successful think() replies with a TTL: key -> (expires, text, prompt tokens)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def put(self, key: str, text: str, prompt_tokens: int = 0):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, text, prompt_tokens)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+_THINK_CACHE = _ThinkCache(THINK_CACHE_SIZE, THINK_CACHE_TTL)
+
+
+# Tool-result keys that never help the LLM answer (charts are summarized separately)
+_PROMPT_DROPPED_PREFIXES = ('debug_', 'raw_')
+_PROMPT_DROPPED_KEYS = frozenset({'visualization'})
+
+
+def _prompt_view(obj: Any, ndigits: int) -> Any:
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float):
+        return round(obj, ndigits)
+    if isinstance(obj, dict):
+        return {
+            k: _prompt_view(v, ndigits) for k, v in obj.items()
+            if not (isinstance(k, str) and (k in _PROMPT_DROPPED_KEYS or k.startswith(_PROMPT_DROPPED_PREFIXES)))
+        }
+    if isinstance(obj, (list, tuple)):
+        return [_prompt_view(v, ndigits) for v in obj]
+    return obj
+
+
+def compact_for_prompt(obj: Any, ndigits: int = 3) -> str:
+    """
+    Minified JSON of a tool result for embedding in a prompt: debug_* / raw_* and
+    visualization payloads are dropped and floats are rounded to ndigits.
+    """
+    return json.dumps(_prompt_view(obj, ndigits), separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+# Raw LLM output quoted in format-error results and logs is cut to this many characters
+ERROR_EXCERPT_CHARS = 512
+
+
+def error_excerpt(text: Optional[str], limit: int = ERROR_EXCERPT_CHARS) -> str:
+    """text cut to limit characters (with a marker) for error payloads."""
+    text = text or ""
+    return text if len(text) <= limit else text[:limit] + f"…[{len(text) - limit} more chars]"
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = "?？!！。.,，;；:：~～ "
+
+
+def normalize_question(question: str) -> str:
+    """Cache form of a question: lowercase, whitespace collapsed, trailing punctuation dropped."""
+    return _WHITESPACE_RE.sub(' ', question).strip().lower().rstrip(_TRAILING_PUNCTUATION)
+
+
+@lru_cache(maxsize=256)
+def _matched_tools(skill_packs: Tuple[str, ...], registry_version: int, question: str) -> Tuple[Dict[str, Any], ...]:
+    """Keyword-matched tools per (skill packs, registry version, normalized question)."""
+    return tuple(get_skill_registry().match_tools_by_keywords(question, list(skill_packs)))
+
+
+@lru_cache(maxsize=256)
+def _tools_prompt(skill_packs: Tuple[str, ...], registry_version: int, question: Optional[str]) -> str:
+    """Tool description prompt per (skill packs, registry version, normalized question)."""
+    tools = get_skill_registry().list_tools_for_agent(list(skill_packs))
+    if not tools:
+        return "无可用工具"
+    
+    # Find matching tools if question provided
+    matched_names = set()
+    if question:
+        matched_names = {t['name'] for t in _matched_tools(skill_packs, registry_version, question)}
+    
+    lines = []
+    for tool in tools:
+        highlight = " ⭐推荐" if tool['name'] in matched_names else ""
+        lines.append(f"### {tool['name']}{highlight}")
+        lines.append(f"- 功能: {tool.get('description', 'N/A')}")
+        lines.append(f"- 触发词: {', '.join(tool.get('trigger_keywords', []))}")
+        lines.append(f"- 使用场景: {tool.get('use_cases', 'N/A')}")
+        
+        # Add parameter info
+        params = tool.get('parameters', {}).get('properties', {})
+        if params:
+            param_strs = [f"{k}({v.get('type', 'any')})" for k, v in params.items()]
+            lines.append(f"- 参数: {', '.join(param_strs)}")
+        lines.append("")
+    
+    return "\n".join(lines)
+
 
 class BaseAgent(ABC):
     """
@@ -43,6 +218,14 @@ class BaseAgent(ABC):
         """
         pass
 
+    def analyze_async(self, data: Dict[str, Any], context: Optional[str] = None) -> Future:
+        """
+        analyze() on the shared agent pool. Returns a concurrent Future; independent
+        agents submitted together run their LLM calls concurrently
+        (use asyncio.wrap_future to await it from async code).
+        """
+        return submit_with_logger(self.analyze, data, context)
+
     # =========================================================================
     # Tool/Skill Methods
     # =========================================================================
@@ -54,13 +237,13 @@ class BaseAgent(ABC):
         Returns:
             List of tool metadata dicts
         """
-        from backend.skills.registry import get_skill_registry
         registry = get_skill_registry()
         return registry.list_tools_for_agent(self.skill_packs)
     
     def match_tools_for_question(self, question: str) -> List[Dict[str, Any]]:
         """
         Match tools based on trigger keywords in the question.
+        Memoized per normalized question until the skill registry reloads.
         
         Args:
             question: User's question or context
@@ -68,14 +251,14 @@ class BaseAgent(ABC):
         Returns:
             List of matched tool metadata dicts
         """
-        from backend.skills.registry import get_skill_registry
         registry = get_skill_registry()
-        return registry.match_tools_by_keywords(question, self.skill_packs)
+        return list(_matched_tools(tuple(self.skill_packs), registry.version, normalize_question(question)))
     
     def build_tools_prompt(self, question: str = None) -> str:
         """
         Build a prompt section describing available tools.
         Dynamically generated - no hardcoding needed!
+        Memoized per normalized question until the skill registry reloads.
         
         Args:
             question: Optional user question to highlight matching tools
@@ -83,32 +266,9 @@ class BaseAgent(ABC):
         Returns:
             Formatted string describing available tools
         """
-        tools = self.get_available_tools()
-        if not tools:
-            return "无可用工具"
-        
-        # Find matching tools if question provided
-        matched_names = set()
-        if question:
-            matched = self.match_tools_for_question(question)
-            matched_names = {t['name'] for t in matched}
-        
-        lines = []
-        for tool in tools:
-            highlight = " ⭐推荐" if tool['name'] in matched_names else ""
-            lines.append(f"### {tool['name']}{highlight}")
-            lines.append(f"- 功能: {tool.get('description', 'N/A')}")
-            lines.append(f"- 触发词: {', '.join(tool.get('trigger_keywords', []))}")
-            lines.append(f"- 使用场景: {tool.get('use_cases', 'N/A')}")
-            
-            # Add parameter info
-            params = tool.get('parameters', {}).get('properties', {})
-            if params:
-                param_strs = [f"{k}({v.get('type', 'any')})" for k, v in params.items()]
-                lines.append(f"- 参数: {', '.join(param_strs)}")
-            lines.append("")
-        
-        return "\n".join(lines)
+        registry = get_skill_registry()
+        return _tools_prompt(tuple(self.skill_packs), registry.version,
+                             normalize_question(question) if question else None)
     
     def execute_tool(self, tool_name: str, log_data: Dict[str, Any] = None, **kwargs) -> Dict[str, Any]:
         """
@@ -122,7 +282,6 @@ class BaseAgent(ABC):
         Returns:
             Tool execution result
         """
-        from backend.skills.registry import get_skill_registry
         registry = get_skill_registry()
         
         # Inject log_data if the tool expects it
@@ -145,36 +304,50 @@ class BaseAgent(ABC):
     # LLM Interaction Methods
     # =========================================================================
 
-    def think(self, prompt: str, system_prompt_override: Optional[str] = None) -> str:
+    def think(self, prompt: str, static_context: Optional[str] = None,
+              system_prompt_override: Optional[str] = None) -> str:
         """
-        Use the LLM to process a prompt.
+        Use the LLM to process a prompt. With THINK_CACHE_TTL set, an identical request
+        made within the TTL returns the earlier reply without an LLM call.
         
         Args:
-            prompt: The user query or data description.
+            prompt: The user query or data description (the per-call, volatile part).
+            static_context: Optional instructions that stay the same across calls (team roster,
+                            tool list, rules, output format). Appended to the system prompt so
+                            the request starts with a byte-stable prefix the provider can cache.
             system_prompt_override: Optional override for the agent's persona.
             
         Returns:
             The raw text response from the LLM.
         """
-        import time
         from backend.core.analysis_logger import get_current_logger
         
-        system_prompt = system_prompt_override or self.role_description
-        
         # Construct message history
         messages = [{"role": "user", "content": prompt}]
+        system_prompt = system_prompt_override or self.role_description
+        
+        analysis_log = get_current_logger()
+        cache_key = None
+        if THINK_CACHE_TTL > 0:
+            cache_key = request_key(getattr(self.llm, 'model', None), getattr(self.llm, 'temperature', None),
+                                    system_prompt, static_context, prompt)
+            hit = _THINK_CACHE.get(cache_key)
+            if hit is not None:
+                logger.info(f"Agent {self.name} reused a cached reply")
+                if analysis_log:
+                    analysis_log.log_cache_hit(tokens_saved=hit[1])
+                return hit[0]
         
         logger.info(f"Agent {self.name} is thinking...")
         
         # Time the LLM call
         start_time = time.time()
-        response = self.llm.chat(messages, system_prompt=system_prompt)
+        response = self.llm.chat(messages, system_prompt=system_prompt, static_context=static_context)
         duration_ms = int((time.time() - start_time) * 1000)
         
         # Log LLM call to analysis logger
-        analysis_log = get_current_logger()
+        usage = response.get('usage') or {}
         if analysis_log and response['success']:
-            usage = response.get('usage', {})
             analysis_log.log_llm_call(
                 agent_name=self.name,
                 prompt_tokens=usage.get('prompt_tokens', 0),
@@ -183,32 +356,99 @@ class BaseAgent(ABC):
                 model=self.llm.model if hasattr(self.llm, 'model') else 'unknown'
             )
         
+        if cache_key is not None and response['success']:
+            _THINK_CACHE.put(cache_key, response['content'], usage.get('prompt_tokens', 0))
+        
         if response['success']:
             return response['content']
         else:
             logger.error(f"Agent {self.name} failed to think: {response.get('error')}")
             return "I encountered an error while processing this request."
 
+    def think_stream(self, prompt: str, static_context: Optional[str] = None,
+                     system_prompt_override: Optional[str] = None) -> Iterator[str]:
+        """
+        Streaming variant of think(): yields response chunks as the LLM produces them,
+        so callers can act on early output before generation finishes.
+        If the call fails before any output, yields the same error text think() returns;
+        a failure after partial output is re-raised, so a cut-off reply is never
+        mistaken for a complete one.
+        """
+        from backend.core.analysis_logger import get_current_logger
+        
+        messages = [{"role": "user", "content": prompt}]
+        
+        logger.info(f"Agent {self.name} is thinking (streaming)...")
+        
+        start_time = time.time()
+        produced = False
+        failed = False
+        stream = None
+        try:
+            stream = self.llm.chat_stream(messages, system_prompt=system_prompt_override or self.role_description,
+                                          static_context=static_context)
+            for chunk in stream:
+                produced = True
+                yield chunk
+        except Exception as e:
+            failed = True
+            logger.error(f"Agent {self.name} failed to think: {e}")
+            if produced:
+                raise
+            yield "I encountered an error while processing this request."
+        finally:
+            # Also reached when the caller stops reading early: closing the LLM stream
+            # ends the remaining decode
+            if stream is not None and hasattr(stream, 'close'):
+                stream.close()
+            # Streamed responses carry no usage block; record the call and its duration
+            analysis_log = get_current_logger()
+            if analysis_log and not failed:
+                analysis_log.log_llm_call(
+                    agent_name=self.name,
+                    duration_ms=int((time.time() - start_time) * 1000),
+                    model=self.llm.model if hasattr(self.llm, 'model') else 'unknown'
+                )
+
+    def think_decision(self, prompt: str, static_context: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Stage-1 helper for the tool-use protocol: streams the reply and returns
+        (decision, response_text). A {"action": "tool_use", "tool_name", "parameters"}
+        decision is returned as soon as those fields are complete, and the rest of the
+        decode is cancelled, so the tool can start while the model would still be writing.
+        Any other reply is parsed in full; decision is None if it is not valid JSON or
+        the stream broke off before the reply was complete.
+        """
+        parser = StreamingJsonParser()
+        chunks = []
+        stream = self.think_stream(prompt, static_context=static_context)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                fields = parser.push(chunk)
+                if fields.get("action") == "tool_use" and "tool_name" in fields and "parameters" in fields:
+                    return parser.get_partial(), "".join(chunks)
+        except Exception:
+            # Already logged by think_stream
+            return None, "".join(chunks)
+        finally:
+            stream.close()
+        
+        response_text = "".join(chunks)
+        try:
+            return self.parse_json_response(response_text), response_text
+        except ValueError:
+            return None, response_text
+
     def parse_json_response(self, response_text: str) -> Dict[str, Any]:
         """
         Robustly parse JSON from LLM response.
         """
         try:
-            # First, try to clean code blocks
-            clean_text = response_text.replace("```json", "").replace("```", "").strip()
-            return json.loads(clean_text)
-        except json.JSONDecodeError:
-            # If that fails, try to find the first '{' and last '}'
-            try:
-                match = re.search(r'(\{.*\})', response_text, re.DOTALL)
-                if match:
-                    json_str = match.group(1)
-                    return json.loads(json_str)
-            except json.JSONDecodeError:
-                pass
-            
-            # If all else fails
-            logger.error(f"Failed to decode JSON from {self.name}: {response_text}")
+            # One balanced-brace scan plus, only if needed, one repair pass
+            return fuzzy_loads(response_text)
+        except ValueError:
+            logger.error("Failed to decode JSON from %s: %s", self.name, error_excerpt(response_text))
             raise ValueError("LLM output format error")
 
     # =========================================================================
@@ -1,10 +1,39 @@
 from typing import Dict, Any, Optional
-from backend.agents.base_agent import BaseAgent
+from backend.agents.base_agent import BaseAgent, compact_for_prompt, error_excerpt, submit_speculative
+from backend.agents.result_cache import cached_analyze
+from backend.core.curve_mapper import get_curve_mapper
+from backend.skills.registry import get_skill_registry
+from backend.core.log_data import as_log_data
+from backend.core.json_stream import StreamingJsonParser
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+_STATIC_STAGE_1 = """
+        Available Skills:
+        {skills_prompt}
+        
+        Task:
+        1. Identify the fluid content (Oil, Water, Gas, Tight).
+        2. Use tools to find specific high/low resistivity zones if asked.
+        3. If you lack critical lithology info (Porosity, Permeability) to make a definitive judgment, state that in your reasoning, BUT still provide your best electrical interpretation (e.g., "High Resistivity suggests potential hydrocarbon, pending porosity confirmation").
+        
+        IMPORTANT: You may think and analyze in any language, but your final 'reasoning' field MUST be in Chinese (中文).
+        
+        Response Format (JSON):
+        Option A: {{ "action": "tool_use", "tool_name": "...", "parameters": {{ ... }} }}
+        Option B: {{ "action": "final_answer", "fluid_type": "...", "confidence": ..., "reasoning": "中文解释..." }}
+        """
+
+
+def _run_tool(skill_registry, tool_name: str, data: Dict[str, Any], params: Dict[str, Any]) -> str:
+    try:
+        tool_result = skill_registry.execute_tool(tool_name, log_data=data, **params)
+        return compact_for_prompt(tool_result)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
 class ElectricalAgent(BaseAgent):
     """
     Agent responsible for identifying fluid content (Oil/Water) 
@@ -24,29 +53,37 @@ class ElectricalAgent(BaseAgent):
             3. Archie's Equation principles apply: High Porosity + High Resistivity = Good Pay Zone.
             4. Provide a confidence score (0.0-1.0) and clear reasoning."""
         )
+        # Static Stage-1 prompt (skill list, task, format), rebuilt only when the skill registry reloads
+        self._static_prompt_key = None
+        self._static_prompt = ""
+    
+    def _get_static_prompt(self, skill_registry) -> str:
+        key = (skill_registry, skill_registry.version)
+        if self._static_prompt_key != key:
+            skills_prompt = json.dumps([{
+                "name": s['name'],
+                "description": s['description'],
+                "parameters": s['parameters']
+            } for s in skill_registry.list_skills()], separators=(',', ':'), ensure_ascii=False)
+            self._static_prompt = _STATIC_STAGE_1.format(skills_prompt=skills_prompt)
+            self._static_prompt_key = key
+        return self._static_prompt
 
+    @cached_analyze
     def analyze(self, data: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze log data to determine fluid content, utilizing Skills for precise calculation.
         """
         curves = data.get('curves', {})
         
-        # 1. Curve Mapping & Tools
-        from backend.core.curve_mapper import get_curve_mapper
-        from backend.skills.registry import get_skill_registry
-        
+        # 1. Curve Mapping & Tools (process-wide singletons; the mapping file is only
+        # re-read when it has changed on disk)
         mapper = get_curve_mapper()
-        mapper.reload()
+        mapper.reload_if_changed()
         skill_registry = get_skill_registry()
         
-        mapping = mapper.map_curves(list(curves.keys()))
-        matched = mapping['matched']
-        
-        def get_curve_name(standard_type):
-            for orig, std in matched.items():
-                if std == standard_type:
-                    return orig
-            return None
+        # Standard type -> first matching curve, memoized per curve set (O(1) per lookup below)
+        get_curve_name = mapper.curves_by_type(curves.keys()).get
         
         # Map critical curves for fluid analysis
         # Note: We need Deep vs Shallow separation to see invasion profiles
@@ -57,81 +94,92 @@ class ElectricalAgent(BaseAgent):
         }
         
         # 2. Data Summary (Progressive Disclosure)
+        all_stats = as_log_data(data).stats()
         stats = []
         for c_type, c_name in curve_map.items():
-            if c_name and c_name in curves:
-                vals = [v for v in curves[c_name] if v is not None]
-                if vals:
-                    avg = sum(vals)/len(vals)
-                    max_val = max(vals)
-                    stats.append(f"{c_type}({c_name}): avg={avg:.2f}, max={max_val:.2f}")
+            c_stats = all_stats.get(c_name)
+            if c_stats:
+                stats.append(f"{c_type}({c_name}): avg={c_stats['mean']:.2f}, max={c_stats['max']:.2f}")
         
         data_desc = f"Available Resistivity Curves: {stats}" if stats else "No Resistivity Curves Found."
 
         # 3. Skill Selection Stage
-        skills = skill_registry.list_skills()
-        skills_prompt = json.dumps([{
-            "name": s['name'],
-            "description": s['description'],
-            "parameters": s['parameters']
-        } for s in skills], indent=2)
+        # Skill list, task and format are identical across calls: sent as the static
+        # (cacheable) system context; only the data summary and user context vary per call
+        static_stage_1 = self._get_static_prompt(skill_registry)
         
         prompt_stage_1 = f"""
         Analyze the following electrical log summary:
         {data_desc}
         
         User Context: {context if context else "General fluid analysis"}
-        
-        Available Skills:
-        {skills_prompt}
-        
-        Task:
-        1. Identify the fluid content (Oil, Water, Gas, Tight).
-        2. Use tools to find specific high/low resistivity zones if asked.
-        3. If you lack critical lithology info (Porosity, Permeability) to make a definitive judgment, state that in your reasoning, BUT still provide your best electrical interpretation (e.g., "High Resistivity suggests potential hydrocarbon, pending porosity confirmation").
-        
-        IMPORTANT: You may think and analyze in any language, but your final 'reasoning' field MUST be in Chinese (中文).
-        
-        Response Format (JSON):
-        Option A: {{ "action": "tool_use", "tool_name": "...", "parameters": {{ ... }} }}
-        Option B: {{ "action": "final_answer", "fluid_type": "...", "confidence": ..., "reasoning": "中文解释..." }}
         """
         
-        response_text_1 = self.think(prompt_stage_1)
-        
+        # Stream Stage 1; as soon as tool_name and parameters are both complete the tool
+        # starts in the background, so it has usually finished when the stream ends.
+        # Tools with side effects (chart files) only ever run for the final decision.
+        speculative = {}
+        
+        def on_field(key: str, value: Any):
+            fields = parser.get_partial()
+            if speculative or fields.get("action") != "tool_use":
+                return
+            tool_name, params = fields.get("tool_name"), fields.get("parameters")
+            if isinstance(tool_name, str) and isinstance(params, dict) and not skill_registry.has_side_effects(tool_name):
+                speculative["call"] = (tool_name, params)
+                speculative["future"] = submit_speculative(_run_tool, skill_registry, tool_name, data, params)
+        
+        parser = StreamingJsonParser(on_field=on_field)
+        chunks = []
         try:
-            decision = self.parse_json_response(response_text_1)
-        except ValueError:
+            for chunk in self.think_stream(prompt_stage_1, static_context=static_stage_1):
+                chunks.append(chunk)
+                parser.push(chunk)
+            decision = self.parse_json_response("".join(chunks))
+        except Exception:
+            # Not valid JSON, or the stream broke off mid-reply (logged by think_stream):
+            # a cut-off reply is never taken as the decision
+            if speculative:
+                speculative["future"].cancel()
+            response_text_1 = "".join(chunks)
             return {
                 "fluid_type": "Unknown",
                 "confidence": 0.0,
-                "reasoning": f"Format Error: {response_text_1}"
+                "reasoning": f"Format Error: {error_excerpt(response_text_1)}"
             }
 
         # 4. Execution Stage
         if decision.get("action") == "tool_use":
             tool_name = decision.get("tool_name")
-            params = decision.get("parameters", {})
-            try:
-                tool_result = skill_registry.execute_skill(tool_name, log_data=data, **params)
-                tool_output = json.dumps(tool_result, indent=2)
-            except Exception as e:
-                tool_output = f"Error: {str(e)}"
-                
+            params = decision.get("parameters") or {}
+            if speculative.get("call") == (tool_name, params):
+                tool_output = speculative["future"].result()
+            else:
+                if speculative:
+                    speculative["future"].cancel()
+                tool_output = _run_tool(skill_registry, tool_name, data, params)
+            
+            # Same system prompt as Stage 1 (provider prefix-cache hit); the user message
+            # carries only the tool result and the original question
             prompt_stage_2 = f"""
-            Tool Result: {tool_output}
+            Tool Result ({tool_name}): {tool_output}
+            
+            Original Question: {context if context else "General fluid analysis"}
+            
             Based on this, answer the user's fluid question.
             IMPORTANT: Your 'reasoning' field MUST be in Chinese (中文).
             JSON: {{ "fluid_type": "...", "confidence": ..., "reasoning": "中文解释..." }}
             """
             
-            response_text_2 = self.think(prompt_stage_2)
+            response_text_2 = self.think(prompt_stage_2, static_context=static_stage_1)
             try:
                 return self.parse_json_response(response_text_2)
             except ValueError:
                  return {"fluid_type": "Unknown", "confidence": 0.0, "reasoning": "Synthesis Error"}
         
         else:
+            if speculative:
+                speculative["future"].cancel()
             return {
                 "fluid_type": decision.get("fluid_type", "Unknown"),
                 "confidence": decision.get("confidence", 0.5),
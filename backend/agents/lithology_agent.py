@@ -1,10 +1,62 @@
+from functools import lru_cache
 from typing import Dict, Any, Optional
-from backend.agents.base_agent import BaseAgent
+from backend.agents.base_agent import BaseAgent, compact_for_prompt, error_excerpt
+from backend.agents.result_cache import cached_analyze
+from backend.core.curve_mapper import get_curve_mapper
+from backend.core.log_data import as_log_data
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Tool results at or above this confidence are answered from a template, without Stage 2
+FAST_SYNTHESIS_MIN_CONFIDENCE = 0.6
+
+# Returned without any LLM call when none of GR / RHOB / NPHI / DT has usable samples
+_NO_DATA_RESULT = {
+    "lithology": "Unknown",
+    "confidence": 0.0,
+    "reasoning": "未找到可用的岩性曲线 (GR / RHOB / NPHI / DT)，无法进行岩性分析。"
+}
+
+# Per-call part of the Stage-1 prompt, sent after the static context; only these slots
+# change between calls
+_STAGE_1_TEMPLATE = """
+        分析以下测井数据层段:
+        {data_desc}
+        
+        用户问题: {user_question}
+        
+        ## 推荐工具检测结果
+        {matched_banner}
+        """
+
+# Stage-1 rules and output format, followed by the tool list: identical on every call
+# (until the skill registry reloads), sent as static context so the provider can reuse
+# the cached prefix
+_STATIC_STAGE_1 = """
+        ## 分析规则
+        1. 如果工具出现在"推荐工具检测结果"中，**必须优先使用**该工具
+        2. 如果用户问到"交会"、"Vsh"、"曲线形态"等关键词，使用对应工具
+        3. 如果不确定岩性，使用 analyze_crossplot 工具。
+        4. **如果用户提到"图版"、"骨架线"或进行中子-密度交会分析，请在 analyze_crossplot 中设置 parameter 'overlay_type': 'ND'**
+        5. 如果问题超出岩性分析范围（如流体、饱和度），ESCALATE
+        
+        IMPORTANT: 你可以用任何语言思考，但'reasoning'字段必须用中文。
+        
+        ## 输出格式 (严格JSON)
+        方案A (调用工具): { "action": "tool_use", "tool_name": "...", "parameters": { ... } }
+        方案B (直接回答): { "action": "final_answer", "lithology": "...", "confidence": ..., "reasoning": "中文解释..." }
+        方案C (升级问题): { "action": "escalate", "reason": "中文解释为何无法单独回答", "suggested_experts": ["ExpertKey"] }
+        
+        ## 可用工具
+        """
+
+
+@lru_cache(maxsize=8)
+def _static_stage_1(tools_prompt: str) -> str:
+    return _STATIC_STAGE_1 + tools_prompt
+
 
 class LithologyAgent(BaseAgent):
     """
@@ -29,6 +81,7 @@ class LithologyAgent(BaseAgent):
             skill_packs=["lithology-classification"]  # Assigned skill pack
         )
 
+    @cached_analyze
     def analyze(self, data: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze log data to determine lithology, utilizing available tools dynamically.
@@ -36,93 +89,59 @@ class LithologyAgent(BaseAgent):
         curves = data.get('curves', {})
         
         # 1. Curve Mapping & Preparation
-        from backend.core.curve_mapper import get_curve_mapper
-        
         mapper = get_curve_mapper()
-        mapper.reload()
+        mapper.reload_if_changed()  # one stat call; re-reads the file only if it changed
         
-        mapping = mapper.map_curves(list(curves.keys()))
-        matched = mapping['matched']
+        # Identify key curves ({standard_type: first matching curve}, memoized per curve set)
+        by_type = mapper.curves_by_type(curves.keys())
+        curve_map = {k: by_type.get(k) for k in ('DEPTH', 'GR', 'RHOB', 'NPHI', 'DT')}
         
-        def get_curve_name(standard_type):
-            for orig, std in matched.items():
-                if std == standard_type:
-                    return orig
-            return None
-            
-        # Identify key curves
-        curve_map = {
-            'DEPTH': get_curve_name('DEPTH'),
-            'GR': get_curve_name('GR'),
-            'RHOB': get_curve_name('RHOB'),
-            'NPHI': get_curve_name('NPHI'),
-            'DT': get_curve_name('DT')
-        }
-        
-        # 2. Prepare Data Summary
-        depth_values = curves.get(curve_map['DEPTH'], [])
-        if depth_values:
-            depth_start = min(depth_values)
-            depth_end = max(depth_values)
-            depth_summary = f"Depth Range: {depth_start:.2f}m - {depth_end:.2f}m"
+        # 2. Prepare Data Summary: every mapped curve (depth included) reduced in one call
+        all_stats = as_log_data(data).stats()
+        
+        # Nothing to classify without a single usable lithology curve: skip tools and LLM
+        if not any(all_stats.get(c_name) for c_type, c_name in curve_map.items() if c_type != 'DEPTH' and c_name):
+            return dict(_NO_DATA_RESULT)
+        
+        depth_key = curve_map.get('DEPTH')
+        depth_stats = all_stats.get(depth_key) if depth_key else None
+        if depth_stats:
+            depth_summary = f"Depth Range: {depth_stats['min']:.2f}m - {depth_stats['max']:.2f}m"
         else:
             depth_summary = "Depth Range: Unknown"
             
         # Curve statistics
         stats = []
         for c_type, c_name in curve_map.items():
-            if c_name and c_name in curves:
-                vals = [v for v in curves[c_name] if v is not None]
-                if vals:
-                    avg = sum(vals)/len(vals)
-                    stats.append(f"{c_type}({c_name}): avg={avg:.2f}")
+            c_stats = all_stats.get(c_name)
+            if c_stats:
+                stats.append(f"{c_type}({c_name}): avg={c_stats['mean']:.2f}")
         
         data_desc = f"{depth_summary}\nAvailable Curves: {stats}"
 
         # 3. Build Tools Prompt Dynamically (NO HARDCODING!)
+        # The full tool list goes in the static context; the question only picks the banner
         user_question = context or "General lithology analysis"
-        tools_prompt = self.build_tools_prompt(question=user_question)
+        static_stage_1 = _static_stage_1(self.build_tools_prompt())
         
         # Check for matching tools
         matched_tools = self.match_tools_for_question(user_question)
         matched_tool_names = [t['name'] for t in matched_tools]
 
-        prompt_stage_1 = f"""
-        分析以下测井数据层段:
-        {data_desc}
-        
-        用户问题: {user_question}
-        
-        ## 可用工具
-        {tools_prompt}
-        
-        ## 分析规则
-        1. 如果工具被标记为 ⭐推荐，**必须优先使用**该工具
-        2. 如果用户问到"交会"、"Vsh"、"曲线形态"等关键词，使用对应工具
-        3. 如果不确定岩性，使用 analyze_crossplot 工具。
-        4. **如果用户提到"图版"、"骨架线"或进行中子-密度交会分析，请在 analyze_crossplot 中设置 parameter 'overlay_type': 'ND'**
-        5. 如果问题超出岩性分析范围（如流体、饱和度），ESCALATE
-        
-        ## 推荐工具检测结果
-        {"**检测到推荐工具**: " + str(matched_tool_names) + " - 请使用这些工具!" if matched_tool_names else "未检测到特定工具匹配，根据问题自行判断"}
-        
-        IMPORTANT: 你可以用任何语言思考，但'reasoning'字段必须用中文。
-        
-        ## 输出格式 (严格JSON)
-        方案A (调用工具): {{ "action": "tool_use", "tool_name": "...", "parameters": {{ ... }} }}
-        方案B (直接回答): {{ "action": "final_answer", "lithology": "...", "confidence": ..., "reasoning": "中文解释..." }}
-        方案C (升级问题): {{ "action": "escalate", "reason": "中文解释为何无法单独回答", "suggested_experts": ["ExpertKey"] }}
-        """
-        
-        response_text_1 = self.think(prompt_stage_1)
-        
-        try:
-            decision = self.parse_json_response(response_text_1)
-        except ValueError:
+        prompt_stage_1 = _STAGE_1_TEMPLATE.format_map({
+            'data_desc': data_desc,
+            'user_question': user_question,
+            'matched_banner': (f"**检测到推荐工具**: {matched_tool_names} - 请使用这些工具!" if matched_tool_names
+                               else "未检测到特定工具匹配，根据问题自行判断"),
+        })
+        
+        # Streamed: a tool call is dispatched as soon as its name and parameters are complete
+        decision, response_text_1 = self.think_decision(prompt_stage_1, static_context=static_stage_1)
+        if decision is None:
             return {
                 "lithology": "Unknown", 
                 "confidence": 0.0, 
-                "reasoning": f"Format Error in Stage 1: {response_text_1}"
+                "reasoning": f"Format Error in Stage 1: {error_excerpt(response_text_1)}"
             }
             
         # 4. Execution Stage
@@ -141,15 +160,9 @@ class LithologyAgent(BaseAgent):
             tool_name = decision.get("tool_name")
             params = decision.get("parameters", {})
             
-            # DEBUG LOGGING (Temporary)
-            print(f"DEBUG: LithologyAgent calling {tool_name}")
-            print(f"DEBUG: Params before patch: {params}")
-            print(f"DEBUG: Curve Map: {curve_map}")
-            
-            # --- PATCH REMOVED: Auto-injection handled by tool internal logic ---
-            
-            print(f"DEBUG: Params after patch: {params}")
-            
+            # Lazy %-formatting: params / curve_map are only repr'd when DEBUG is enabled
+            logger.debug("LithologyAgent calling %s; params=%r curve_map=%r", tool_name, params, curve_map)
+
             # Execute tool using BaseAgent method
             tool_result = self.execute_tool(tool_name, log_data=data, **params)
             
@@ -160,13 +173,22 @@ class LithologyAgent(BaseAgent):
                 # Leave a placeholder so LLM knows a chart was generated
                 tool_result["visualization_summary"] = "Chart generated successfully. Data hidden from prompt to save tokens."
             
-            tool_output = json.dumps(tool_result, indent=2, ensure_ascii=False)
-                
-            # 5. Second Pass: Synthesis
+            # 5. Second Pass: Synthesis (skipped when the tool already gave a confident answer)
+            result = self._fast_synthesize(tool_name, tool_result)
+            if result is not None:
+                logger.info(f"LithologyAgent: {tool_name} result synthesized without a second LLM call")
+                result['tool_used'] = tool_name
+                result['tool_result'] = tool_result
+                return result
+            
+            tool_output = compact_for_prompt(tool_result)
+            
+            # Same system prompt as Stage 1 (provider prefix-cache hit); the user message
+            # carries only the tool result and the original question
             prompt_stage_2 = f"""
             用户问题: {user_question}
             使用的工具: {tool_name}
-            工具参数: {params}
+            工具参数: {compact_for_prompt(params)}
             工具结果: 
             {tool_output}
             
@@ -175,7 +197,7 @@ class LithologyAgent(BaseAgent):
             返回JSON: {{ "lithology": "...", "confidence": ..., "reasoning": "中文解释..." }}
             """
             
-            response_text_2 = self.think(prompt_stage_2)
+            response_text_2 = self.think(prompt_stage_2, static_context=static_stage_1)
             try:
                 result = self.parse_json_response(response_text_2)
                 result['tool_used'] = tool_name
@@ -193,7 +215,7 @@ class LithologyAgent(BaseAgent):
                 return {
                     "lithology": "Unknown", 
                     "confidence": 0.0, 
-                    "reasoning": f"Format Error in Stage 2: {response_text_2}"
+                    "reasoning": f"Format Error in Stage 2: {error_excerpt(response_text_2)}"
                 }
         
         else:
@@ -203,3 +225,28 @@ class LithologyAgent(BaseAgent):
                 "confidence": decision.get("confidence", 0.5),
                 "reasoning": decision.get("reasoning", "No reasoning provided.")
             }
+
+    def _fast_synthesize(self, tool_name: str, tool_result: Any) -> Optional[Dict[str, Any]]:
+        """
+        Deterministic Stage 2 for the ND / M-N crossplot classification, whose confidence
+        comes from the tool itself. Returns None (use the LLM) for anything else, including
+        charts, errors and low-confidence results.
+        """
+        if not isinstance(tool_result, dict) or "error" in tool_result or "visualization_summary" in tool_result:
+            return None
+        
+        if tool_name != "analyze_crossplot":
+            return None
+        
+        lithology = tool_result.get("interpretation")
+        confidence = tool_result.get("confidence")
+        distribution = tool_result.get("lithology_distribution")
+        if not lithology or not isinstance(confidence, (int, float)) or not distribution:
+            return None
+        shares = "，".join(f"{k} {v}%" for k, v in sorted(distribution.items(), key=lambda kv: -kv[1]) if v)
+        reasoning = (f"{tool_result.get('plot_type', '')}交会图分析 {tool_result.get('data_points', 0)} 个数据点，"
+                     f"主要岩性为 {lithology}。岩性分布: {shares}。")
+
+        if confidence < FAST_SYNTHESIS_MIN_CONFIDENCE:
+            return None
+        return {"lithology": lithology, "confidence": float(confidence), "reasoning": reasoning}
@@ -0,0 +1,158 @@
+"""
+Memory Controller - 讨论记录压缩
+
+Keeps the discussion record handed to the Arbitrator within a token budget. The last
+K turns are kept verbatim (local memory: the raw reasoning the next decision depends on);
+earlier turns are reduced to an extractive summary: the user's own notes verbatim and
+each other turn's headline (speaker, confidence / status, first line of reasoning).
+Over budget, the oldest headlines go first; the user's notes are always kept.
+
+Turn summaries are cached by content hash, and a turn's summary never depends on its
+neighbours, so the summarized prefix grows by appending as the window slides and stays
+byte-identical between rounds (provider prefix caches keep hitting).
+No LLM call is involved.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Turns written by the user; kept verbatim even when summarized
+_USER_PREFIXES = ("User Note:", "User Follow-up:")
+
+_CJK_RE = re.compile(r'[　-〿㐀-鿿＀-￯]')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count without a tokenizer: one per CJK character, one per 4 other characters."""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@lru_cache(maxsize=8)
+def _turn_start_re(speakers: Tuple[str, ...]) -> "re.Pattern":
+    names = sorted({*speakers, "Arbitrator", "User Note", "User Follow-up"}, key=len, reverse=True)
+    return re.compile(r'^(?:%s):' % '|'.join(re.escape(n) for n in names), re.MULTILINE)
+
+
+def split_turns(context: str, speakers: Iterable[str] = ()) -> List[str]:
+    """
+    Split a joined discussion record back into turns. A turn starts at a line beginning
+    with a known speaker prefix; continuation lines stay with their turn.
+    """
+    if not context:
+        return []
+    starts = [m.start() for m in _turn_start_re(tuple(sorted(speakers))).finditer(context)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return [context[a:b].rstrip('\n') for a, b in zip(starts, starts[1:] + [len(context)])]
+
+
+class MemoryController:
+    """Bounded sliding window over the discussion record with cached extractive summaries."""
+
+    def __init__(self, keep_last: int = 6, summary_chars: int = 120, cache_size: int = 512):
+        """
+        Args:
+            keep_last: Number of most recent turns kept verbatim.
+            summary_chars: Maximum length of one summarized turn.
+            cache_size: Number of turn summaries kept.
+        """
+        self.keep_last = keep_last
+        self.summary_chars = summary_chars
+        self.cache_size = cache_size
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def summarize_turn(self, turn: str) -> str:
+        """One-line extractive summary of a turn (cached by content hash)."""
+        key = hashlib.blake2b(turn.encode('utf-8'), digest_size=16).hexdigest()
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+                return summary
+
+        if turn.startswith(_USER_PREFIXES):
+            summary = turn
+        else:
+            lines = [line.strip() for line in turn.splitlines() if line.strip()]
+            head = lines[0] if lines else ""
+            if len(head) > self.summary_chars:
+                head = head[:self.summary_chars].rstrip() + "…"
+            # Keep the Arbitrator's dispatch line: it records who was asked what
+            summary = " ".join([head, *(line for line in lines[1:] if line.startswith("->"))])
+
+        with self._lock:
+            self._summaries[key] = summary
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def compress(self, history: Union[str, Sequence[str]], budget_tokens: int,
+                 speakers: Iterable[str] = ()) -> str:
+        """
+        Discussion record within budget_tokens. A record that already fits is returned
+        unchanged; otherwise older turns are summarized, and if that is still too long the
+        oldest summaries and then the oldest verbatim turns are dropped (user notes stay).
+
+        Args:
+            history: Turns as a list, or the joined record (split with split_turns).
+            budget_tokens: Target size, estimated with estimate_tokens().
+            speakers: Agent keys that start turns, used when history is a string.
+        """
+        if isinstance(history, str):
+            text = history
+            turns = split_turns(history, speakers)
+        else:
+            turns = list(history)
+            text = "\n".join(turns)
+        if estimate_tokens(text) <= budget_tokens:
+            return text
+
+        keep = min(self.keep_last, len(turns))
+        older, recent = turns[:len(turns) - keep], turns[len(turns) - keep:]
+        # Oldest non-user summaries are dropped in blocks of keep_last turns, so the
+        # summarized prefix changes only once per block rather than every round
+        stride = max(self.keep_last, 1)
+        dropped = 0
+
+        def render() -> str:
+            lines = []
+            omitted = 0
+            for i, turn in enumerate(older):
+                if i < dropped and not turn.startswith(_USER_PREFIXES):
+                    omitted += 1
+                else:
+                    lines.append(f"- {self.summarize_turn(turn)}")
+            parts = []
+            if older:
+                parts.append("[早期讨论摘要]")
+                if omitted:
+                    parts.append(f"(更早的 {omitted} 条已省略)")
+                parts.extend(lines)
+                parts.append("[最近讨论]")
+            parts.extend(recent)
+            return "\n".join(parts)
+
+        result = render()
+        while estimate_tokens(result) > budget_tokens:
+            if dropped < len(older):
+                dropped = min(dropped + stride, len(older))
+            elif len(recent) > 1:
+                older.append(recent.pop(0))
+                dropped = len(older)
+            else:
+                break
+            result = render()
+
+        logger.debug(f"Discussion record compressed: {estimate_tokens(text)} -> {estimate_tokens(result)} tokens")
+        return result
@@ -1,10 +1,45 @@
 from typing import Dict, Any, Optional
-from backend.agents.base_agent import BaseAgent
+from backend.agents.base_agent import BaseAgent, compact_for_prompt, error_excerpt, submit_speculative
+from backend.agents.result_cache import cached_analyze
+from backend.core.curve_mapper import get_curve_mapper
+from backend.core.log_data import as_log_data
 import json
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Tool parameter -> standard curve type injected from the curve mapping before a tool runs
+_TOOL_CURVE_PARAMS = {
+    "analyze_crossplot": (("rhob_curve", "RHOB"), ("nphi_curve", "NPHI"), ("dt_curve", "DT")),
+    "calculate_vsh": (("gr_curve", "GR"),),
+}
+
+# Returned without any LLM call when none of the mineralogy curves is present
+_NO_DATA_RESULT = {
+    "primary_lithology": "Unknown",
+    "secondary_lithology": "None",
+    "clay_type": "Unknown",
+    "organic_content": "Unknown",
+    "mineral_composition": {},
+    "confidence": 0.0,
+    "reasoning": "未找到可用的矿物分析曲线 (RHOB / NPHI / DT / GR / PE / 能谱伽马)，无法进行矿物组分分析。"
+}
+
+# A single keyword-recommended tool is prefetched while Stage 1 is still being decided
+# (set MINERALOGY_SPECULATIVE_TOOLS=0 to disable). Only side-effect-free tools whose call
+# with just the mapped curves is a complete analysis are prefetched.
+_PREFETCH_TOOLS = frozenset({"calculate_vsh"})
+SPECULATIVE_TOOLS = os.getenv("MINERALOGY_SPECULATIVE_TOOLS", "1") != "0"
+
+
+def _with_curve_params(tool_name: str, params: Dict[str, Any], curve_map: Dict[str, Any]) -> Dict[str, Any]:
+    """params with the mapped curve names injected (overwriting the LLM's names)."""
+    for param, std_type in _TOOL_CURVE_PARAMS.get(tool_name, ()):
+        if curve_map.get(std_type):
+            params[param] = curve_map[std_type]
+    return params
+
 
 class MineralogyAgent(BaseAgent):
     """
@@ -43,26 +78,19 @@ class MineralogyAgent(BaseAgent):
             skill_packs=["lithology-classification"]  # Added skill pack
         )
 
+    @cached_analyze
     def analyze(self, data: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze mineralogy curves, utilizing available tools dynamically.
         """
         curves = data.get('curves', {})
-        depth = curves.get('DEPTH', [])
         
         # 1. Curve Mapping
-        from backend.core.curve_mapper import get_curve_mapper
         mapper = get_curve_mapper()
-        mapper.reload()
-        
-        mapping = mapper.map_curves(list(curves.keys()))
-        matched = mapping['matched']
+        mapper.reload_if_changed()  # one stat call; re-reads the file only if it changed
         
-        def get_curve_name(standard_type):
-            for orig, std in matched.items():
-                if std == standard_type:
-                    return orig
-            return None
+        # {standard_type: first matching curve}, memoized per curve set: O(1) per lookup
+        get_curve_name = mapper.curves_by_type(curves.keys()).get
         
         # Identify key curves & Map for later tool injection
         curve_map = {
@@ -78,27 +106,36 @@ class MineralogyAgent(BaseAgent):
             'VOL_SHALE': get_curve_name('VOL_SHALE') or get_curve_name('VOL_CLAY')
         }
         
+        # No mineralogy curve at all: nothing to analyze, skip the statistics, tools and LLM
+        if not any(c_name in curves for c_type, c_name in curve_map.items() if c_type != 'DEPTH' and c_name):
+            return dict(_NO_DATA_RESULT)
+        
         # 2. Data Summary
+        # Every curve reduced in one pass, on the LogData packed once for this request
+        all_stats = as_log_data(data).stats()
         available_curves = []
         curve_stats = {}
         
         for std_type, curve_name in curve_map.items():
             if curve_name and curve_name in curves:
-                vals = [v for v in curves[curve_name] if v is not None]
-                if vals:
+                c_stats = all_stats.get(curve_name)
+                if c_stats:
                     available_curves.append(f"{std_type} ({curve_name})")
                     curve_stats[std_type] = {
                         'curve': curve_name,
-                        'min': round(min(vals), 4),
-                        'max': round(max(vals), 4),
-                        'avg': round(sum(vals) / len(vals), 4)
+                        'min': round(c_stats['min'], 4),
+                        'max': round(c_stats['max'], 4),
+                        'avg': round(c_stats['mean'], 4)
                     }
 
+        depth_stats = all_stats.get('DEPTH')
+        depth_range = f"{depth_stats['min']:.1f} - {depth_stats['max']:.1f} m" if depth_stats else "Unknown"
+
         data_summary = f"""
-        Depth Range: {min(depth):.1f} - {max(depth):.1f} m
+        Depth Range: {depth_range}
         Available Curves: {', '.join(available_curves) if available_curves else 'None'}
         Curve Statistics:
-        {json.dumps(curve_stats, indent=2, ensure_ascii=False)}
+        {json.dumps(curve_stats, separators=(',', ':'), ensure_ascii=False)}
         """
         
         user_question = context or "Mineralogy analysis"
@@ -134,15 +171,24 @@ class MineralogyAgent(BaseAgent):
         Option B (Direct Answer): {{ "action": "final_answer", "primary_lithology": "...", "secondary_lithology": "...", "clay_type": "...", "organic_content": "...", "mineral_composition": {{...}}, "confidence": ..., "reasoning": "中文解释..." }}
         """
 
-        response_text = self.think(prompt_stage_1)
-        
-        try:
-            decision = self.parse_json_response(response_text)
-        except ValueError:
+        # Prefetch: with exactly one recommended tool, run it with the mapped curves and
+        # default parameters now; the result is used only if Stage 1 picks the same call
+        speculative = None
+        if SPECULATIVE_TOOLS and len(matched_tool_names) == 1 and matched_tool_names[0] in _PREFETCH_TOOLS:
+            spec_name = matched_tool_names[0]
+            spec_params = _with_curve_params(spec_name, {}, curve_map)
+            spec_future = submit_speculative(self.execute_tool, spec_name, log_data=data, **spec_params)
+            speculative = (spec_name, spec_params, spec_future)
+
+        # Streamed: a tool call is dispatched as soon as its name and parameters are complete
+        decision, response_text = self.think_decision(prompt_stage_1)
+        if decision is None:
+            if speculative:
+                speculative[2].cancel()
             return {
                 "primary_lithology": "Unknown",
                 "confidence": 0.0,
-                "reasoning": f"Format Error in Stage 1: {response_text}"
+                "reasoning": f"Format Error in Stage 1: {error_excerpt(response_text)}"
             }
             
         # 4. Execution Logic
@@ -152,26 +198,18 @@ class MineralogyAgent(BaseAgent):
             tool_name = decision.get("tool_name")
             params = decision.get("parameters", {})
             
-            # --- PATCH: Auto-inject mapped curve aliases ---
-            # 1. Map for analyze_crossplot
-            if tool_name == "analyze_crossplot":
-                # Forcibly overwrite with mapped names if available
-                if curve_map.get('RHOB'):
-                    params['rhob_curve'] = curve_map['RHOB']
-                if curve_map.get('NPHI'):
-                    params['nphi_curve'] = curve_map['NPHI']
-                if curve_map.get('DT'):
-                    params['dt_curve'] = curve_map['DT']
-            
-            # 2. Map for calculate_vsh
-            elif tool_name == "calculate_vsh":
-                if curve_map.get('GR'):
-                    params['gr_curve'] = curve_map['GR']
-            # -----------------------------------------------
-
-            # Execute Tool
-            tool_result = self.execute_tool(tool_name, log_data=data, **params)
-            tool_output = json.dumps(tool_result, indent=2, ensure_ascii=False)
+            # --- PATCH: Auto-inject mapped curve aliases (overwrites the LLM's names) ---
+            params = _with_curve_params(tool_name, params, curve_map)
+
+            # Execute Tool (or take the prefetched result of the identical call)
+            if speculative and speculative[:2] == (tool_name, params):
+                logger.info(f"MineralogyAgent: using prefetched {tool_name} result")
+                tool_result = speculative[2].result()
+            else:
+                if speculative:
+                    speculative[2].cancel()
+                tool_result = self.execute_tool(tool_name, log_data=data, **params)
+            tool_output = compact_for_prompt(tool_result)
             
             # 5. Synthesis (Stage 2)
             prompt_stage_2 = f"""
@@ -193,11 +231,13 @@ class MineralogyAgent(BaseAgent):
                 return {
                     "primary_lithology": "Unknown",
                     "confidence": 0.0,
-                    "reasoning": f"Format Error in Stage 2: {response_text_2}"
+                    "reasoning": f"Format Error in Stage 2: {error_excerpt(response_text_2)}"
                 }
         
         else:
             # Direct Answer
+            if speculative:
+                speculative[2].cancel()
             return {
                 "primary_lithology": decision.get("primary_lithology", "Unknown"),
                 "secondary_lithology": decision.get("secondary_lithology", "None"),
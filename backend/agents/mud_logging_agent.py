@@ -1,10 +1,23 @@
 from typing import Dict, Any, Optional
-from backend.agents.base_agent import BaseAgent
+from backend.agents.base_agent import BaseAgent, error_excerpt
+from backend.agents.result_cache import cached_analyze
+from backend.core.curve_mapper import get_curve_mapper
+from backend.core.log_data import as_log_data
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Returned without any LLM call when no mud log curve has usable samples
+_NO_DATA_RESULT = {
+    "gas_show": "Unknown",
+    "fluid_interpretation": "Unknown",
+    "rop_break": False,
+    "gas_ratios": {},
+    "confidence": 0.0,
+    "reasoning": "本层段没有可用的录井曲线 (全烃、色谱组分、ROP)，无法进行录井解释。"
+}
+
 
 class MudLoggingAgent(BaseAgent):
     """
@@ -44,27 +57,19 @@ class MudLoggingAgent(BaseAgent):
             }"""
         )
 
+    @cached_analyze
     def analyze(self, data: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze mud logging curves.
         """
         curves = data.get('curves', {})
-        depth = curves.get('DEPTH', [])
         
         # 1. Curve Mapping
-        from backend.core.curve_mapper import get_curve_mapper
         mapper = get_curve_mapper()
-        mapper.reload()
-        
-        mapping = mapper.map_curves(list(curves.keys()))
-        matched = mapping['matched']
+        mapper.reload_if_changed()  # one stat call; re-reads the file only if it changed
         
-        def get_curve_name(standard_type):
-            for orig, std in matched.items():
-                # Supports multiple gas components
-                if std == standard_type:
-                    return orig
-            return None
+        # {standard_type: first matching curve}, memoized per curve set: O(1) per lookup
+        get_curve_name = mapper.curves_by_type(curves.keys()).get
         
         # 2. Identify keys
         tg_curve = get_curve_name('GAS_TOTAL')
@@ -73,36 +78,47 @@ class MudLoggingAgent(BaseAgent):
         c3_curve = get_curve_name('GAS_C3')
         rop_curve = get_curve_name('ROP')
         
-        # 3. Data Summary
-        available_curves = []
-        curve_stats = {}
-        
-        for std_type, curve_name in [
+        relevant = [(std_type, curve_name) for std_type, curve_name in [
             ('GAS_TOTAL', tg_curve),
             ('GAS_C1', c1_curve),
             ('GAS_C2', c2_curve),
             ('GAS_C3', c3_curve),
             ('ROP', rop_curve)
-        ]:
-            if curve_name and curve_name in curves:
-                vals = [v for v in curves[curve_name] if v is not None]
-                if vals:
-                    available_curves.append(f"{std_type} ({curve_name})")
-                    curve_stats[std_type] = {
-                        'curve': curve_name,
-                        'min': round(min(vals), 4),
-                        'max': round(max(vals), 4),
-                        'avg': round(sum(vals) / len(vals), 4)
-                    }
+        ] if curve_name and curve_name in curves]
+        # No mud log curve at all: nothing to interpret, skip the statistics and the LLM
+        if not relevant:
+            return dict(_NO_DATA_RESULT)
+        
+        # 3. Data Summary
+        # Every curve reduced in one pass, on the LogData packed once for this request
+        all_stats = as_log_data(data).stats()
+        available_curves = []
+        curve_stats = {}
+        
+        for std_type, curve_name in relevant:
+            c_stats = all_stats.get(curve_name)
+            if c_stats:
+                available_curves.append(f"{std_type} ({curve_name})")
+                curve_stats[std_type] = {
+                    'curve': curve_name,
+                    'min': round(c_stats['min'], 4),
+                    'max': round(c_stats['max'], 4),
+                    'avg': round(c_stats['mean'], 4)
+                }
+        if not available_curves:
+            return dict(_NO_DATA_RESULT)
+
+        depth_stats = all_stats.get('DEPTH')
+        depth_range = f"{depth_stats['min']:.1f} - {depth_stats['max']:.1f} m" if depth_stats else "Unknown"
 
         # 4. Context for LLM
         data_summary = f"""
-        Depth Range: {min(depth):.1f} - {max(depth):.1f} m
+        Depth Range: {depth_range}
         
         Available Mud Log Curves: {', '.join(available_curves) if available_curves else 'None'}
         
         Curve Statistics:
-        {json.dumps(curve_stats, indent=2, ensure_ascii=False)}
+        {json.dumps(curve_stats, separators=(',', ':'), ensure_ascii=False)}
         """
         
         user_question = ""
@@ -113,33 +129,23 @@ class MudLoggingAgent(BaseAgent):
                     break
 
         # 5. Prompt
-        if not available_curves:
-            prompt = f"""
-            Analyze mud logging data.
-            NO mud logging curves (Total Gas, Chromatography, ROP) are available for this interval.
-            
-            State that no data is available.
-            
-            Return ONLY a JSON object with keys: gas_show, fluid_interpretation, rop_break, gas_ratios, confidence, reasoning.
-            """
-        else:
-            prompt = f"""
-            Analyze the Mud Logging data for this well interval.
-            
-            {data_summary}
-            
-            User Question: {user_question}
-            
-            Tasks:
-            1. Evaluate Total Gas levels (Is it effectively zero, background, or a show?)
-            2. If Components (C1, C2, C3) exists, calculate wetness or ratios to guess fluid type.
-            3. Check ROP. If ROP is significantly higher (lower value if unit is h/m, higher if m/h - CHECK UNIT) than typical, it might be a drilling break.
-               * Note on ROP units: Usually m/h (higher is faster) or min/m (lower is faster). Look at the magnitude.
-               * Assume m/h here unless specified otherwise.
-            
-            LANGUAGE RULE: You may analyze in any language, but 'reasoning' field MUST be in Chinese.
-            Return ONLY a JSON object with keys: gas_show, fluid_interpretation, rop_break, gas_ratios, confidence, reasoning.
-            """
+        prompt = f"""
+        Analyze the Mud Logging data for this well interval.
+        
+        {data_summary}
+        
+        User Question: {user_question}
+        
+        Tasks:
+        1. Evaluate Total Gas levels (Is it effectively zero, background, or a show?)
+        2. If Components (C1, C2, C3) exists, calculate wetness or ratios to guess fluid type.
+        3. Check ROP. If ROP is significantly higher (lower value if unit is h/m, higher if m/h - CHECK UNIT) than typical, it might be a drilling break.
+           * Note on ROP units: Usually m/h (higher is faster) or min/m (lower is faster). Look at the magnitude.
+           * Assume m/h here unless specified otherwise.
+        
+        LANGUAGE RULE: You may analyze in any language, but 'reasoning' field MUST be in Chinese.
+        Return ONLY a JSON object with keys: gas_show, fluid_interpretation, rop_break, gas_ratios, confidence, reasoning.
+        """
 
         response_text = self.think(prompt)
         
@@ -154,5 +160,5 @@ class MudLoggingAgent(BaseAgent):
                 "gas_ratios": {},
                 "confidence": 0.0,
                 "reasoning": "LLM输出格式解析失败",
-                "raw_output": response_text
+                "raw_output": error_excerpt(response_text)
             }
@@ -1,5 +1,9 @@
 from typing import Dict, Any, Optional
-from backend.agents.base_agent import BaseAgent
+from backend.agents.base_agent import BaseAgent, compact_for_prompt, error_excerpt
+from backend.agents.result_cache import cached_analyze
+from backend.core.curve_mapper import get_curve_mapper
+from backend.core.log_data import as_log_data
+from backend.skills.registry import get_skill_registry
 import json
 import logging
 
@@ -56,29 +60,20 @@ class ReservoirPropertyAgent(BaseAgent):
             }"""
         )
 
+    @cached_analyze
     def analyze(self, data: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze log data to evaluate reservoir properties.
         """
         curves = data.get('curves', {})
-        depth = curves.get('DEPTH', [])
         
         # 1. Curve Mapping & Preparation
-        from backend.core.curve_mapper import get_curve_mapper
-        from backend.skills.registry import get_skill_registry
-        
         mapper = get_curve_mapper()
-        mapper.reload()
+        mapper.reload_if_changed()  # one stat call; re-reads the file only if it changed
         skill_registry = get_skill_registry()
         
-        mapping = mapper.map_curves(list(curves.keys()))
-        matched = mapping['matched']
-        
-        def get_curve_name(standard_type):
-            for orig, std in matched.items():
-                if std == standard_type:
-                    return orig
-            return None
+        # {standard_type: first matching curve}, memoized per curve set: O(1) per lookup
+        get_curve_name = mapper.curves_by_type(curves.keys()).get
         
         # 2. Identify available property curves
         porosity_curve = get_curve_name('POR_EFF') or get_curve_name('POR_TOTAL')
@@ -88,6 +83,8 @@ class ReservoirPropertyAgent(BaseAgent):
         sonic_curve = get_curve_name('DT')
         
         # Build data summary for LLM
+        # Every curve reduced in one pass, on the LogData packed once for this request
+        all_stats = as_log_data(data).stats()
         available_curves = []
         curve_stats = {}
         
@@ -99,44 +96,46 @@ class ReservoirPropertyAgent(BaseAgent):
             ('DT', sonic_curve)
         ]:
             if curve_name and curve_name in curves:
-                vals = [v for v in curves[curve_name] if v is not None]
-                if vals:
+                c_stats = all_stats.get(curve_name)
+                if c_stats:
                     available_curves.append(f"{std_type} ({curve_name})")
                     curve_stats[std_type] = {
                         'curve': curve_name,
-                        'min': round(min(vals), 4),
-                        'max': round(max(vals), 4),
-                        'avg': round(sum(vals) / len(vals), 4)
+                        'min': round(c_stats['min'], 4),
+                        'max': round(c_stats['max'], 4),
+                        'avg': round(c_stats['mean'], 4)
                     }
         
-        # 3. Try to use skills for precise calculation
+        # 3. Try to use skills for precise calculation (on the same packed block the
+        # statistics above came from, so the curves are not converted again)
         skill_results = {}
         if porosity_curve:
             try:
-                result = skill_registry.execute_skill(
+                result = skill_registry.execute_tool(
                     "find_extreme_values",
-                    {
-                        "curve_name": porosity_curve,
-                        "extreme_type": "max",
-                        "log_data": {"curves": curves, "depth": depth}
-                    }
+                    log_data=data,
+                    curve_name=porosity_curve,
+                    mode="max"
                 )
-                if result.get("success"):
+                if isinstance(result, dict) and "error" not in result:
                     skill_results["max_porosity"] = result
             except Exception as e:
                 logger.debug(f"Skill execution failed: {e}")
         
+        depth_stats = all_stats.get('DEPTH')
+        depth_range = f"{depth_stats['min']:.1f} - {depth_stats['max']:.1f} m" if depth_stats else "Unknown"
+
         # 4. Build prompt for LLM
         data_summary = f"""
-        Depth Range: {min(depth):.1f} - {max(depth):.1f} m
+        Depth Range: {depth_range}
         
         Available Curves: {', '.join(available_curves) if available_curves else 'Limited data'}
         
         Curve Statistics:
-        {json.dumps(curve_stats, indent=2, ensure_ascii=False)}
+        {json.dumps(curve_stats, separators=(',', ':'), ensure_ascii=False)}
         
         Skill Results (if any):
-        {json.dumps(skill_results, indent=2, ensure_ascii=False)}
+        {compact_for_prompt(skill_results)}
         """
         
         user_question = ""
@@ -199,5 +198,5 @@ class ReservoirPropertyAgent(BaseAgent):
                 "net_pay": {"thickness_m": 0, "intervals": []},
                 "confidence": 0.0,
                 "reasoning": "LLM输出格式解析失败",
-                "raw_output": response_text if 'response_text' in locals() else "No response"
+                "raw_output": error_excerpt(response_text)
             }
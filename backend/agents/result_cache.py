@@ -0,0 +1,137 @@
+"""
+Result Cache - 智能体分析结果缓存
+
+Re-analyzing the same well data with the same context (replays, evaluation runs,
+re-renders) returns the earlier result instead of another LLM round-trip. Off by
+default: replies are sampled, so a user retry should get a fresh answer. Set
+RESULT_CACHE_TTL (seconds) to enable it.
+
+Keys are (agent name, data fingerprint, context hash); curves are fingerprinted from
+the packed LogData block that the agent reads anyway, not re-converted per curve.
+"""
+
+import copy
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from backend.core.log_data import as_log_data, with_log_data
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "0"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "128"))
+
+
+def data_fingerprint(data: Optional[Dict[str, Any]]) -> str:
+    """Stable digest of an agent's input data; curves are hashed from the LogData buffer."""
+    h = hashlib.blake2b(digest_size=16)
+    for key in sorted(data or {}):
+        if key in ('curves', 'log_data'):
+            continue  # hashed below, from the packed block
+        h.update(key.encode('utf-8'))
+        h.update(json.dumps(data[key], sort_keys=True, default=str).encode('utf-8'))
+    log = as_log_data(data)
+    h.update(json.dumps(log.names()).encode('utf-8'))
+    h.update(log.data.tobytes())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU of agent results with a TTL, with the prompt tokens each one cost."""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(agent_name: str, data: Optional[Dict[str, Any]], context: Optional[str]) -> Tuple[str, str, str]:
+        context_hash = hashlib.blake2b((context or "").encode('utf-8'), digest_size=16).hexdigest()
+        return agent_name, data_fingerprint(data), context_hash
+
+    def get(self, key) -> Optional[Tuple[Dict[str, Any], int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[1]), entry[2]
+
+    def put(self, key, result: Dict[str, Any], prompt_tokens: int = 0):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(result), prompt_tokens)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_result_cache = None
+
+def get_result_cache() -> ResultCache:
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+    return _result_cache
+
+
+def _is_cacheable(result: Any) -> bool:
+    """Errors and zero-confidence fallbacks (format/parse failures) are never cached."""
+    if not isinstance(result, dict) or result.get('status') == 'ERROR' or 'error' in result:
+        return False
+    try:
+        return float(result.get('confidence') or 0.0) > 0.0
+    except (TypeError, ValueError):
+        return False
+
+
+def cached_analyze(analyze):
+    """
+    Decorator for specialist analyze(data, context) methods: with RESULT_CACHE_TTL set,
+    identical (agent, data, context) within the TTL returns the cached result. Pass
+    bypass_cache=True to force a fresh analysis.
+    """
+    @functools.wraps(analyze)
+    def wrapper(self, data: Dict[str, Any], context: Optional[str] = None, bypass_cache: bool = False):
+        from backend.core.analysis_logger import get_current_logger, thread_prompt_tokens
+
+        if RESULT_CACHE_TTL <= 0 or not isinstance(data, Mapping):
+            return analyze(self, data, context)
+
+        # Pack once: the fingerprint and the analysis below read the same LogData
+        data = with_log_data(data)
+        cache = get_result_cache()
+        key = cache.make_key(self.name, data, context)
+
+        if not bypass_cache:
+            hit = cache.get(key)
+            if hit is not None:
+                result, tokens_saved = hit
+                logger.info(f"Agent {self.name} result cache hit (~{tokens_saved} prompt tokens saved)")
+                analysis_log = get_current_logger()
+                if analysis_log:
+                    analysis_log.log_cache_hit(tokens_saved=tokens_saved)
+                return result
+
+        # This thread's own LLM usage: other fanned-out agents log to the same logger
+        tokens_before = thread_prompt_tokens()
+        result = analyze(self, data, context)
+        if _is_cacheable(result):
+            cache.put(key, result, thread_prompt_tokens() - tokens_before)
+        return result
+
+    return wrapper
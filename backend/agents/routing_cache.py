@@ -0,0 +1,155 @@
+"""
+Routing Cache - 仲裁者调度决策缓存
+
+Stores the Arbitrator's dispatch decisions ({status, next_agent, question_for_agent, ...})
+keyed on the user question, the tail of the discussion and the specialist roster, so a
+repeated discussion state is routed without another LLM round-trip.
+
+Exact (normalized) keys always work. Semantic matching is opt-in: set
+ROUTING_CACHE_EMBED_MODEL to a sentence-transformers model name and keys whose
+embeddings reach the cosine threshold (ROUTING_CACHE_THRESHOLD, default 0.85) also hit.
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # optional semantic matching
+    SentenceTransformer = None
+
+logger = logging.getLogger(__name__)
+
+# (normalized user question, normalized context tail, sorted specialist keys)
+RoutingKey = Tuple[str, str, Tuple[str, ...]]
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _normalize(text: Optional[str]) -> str:
+    return _WHITESPACE_RE.sub(' ', text or '').strip().lower()
+
+
+def build_routing_key(
+    user_question: Optional[str],
+    context: Optional[str],
+    specialist_keys: Iterable[str],
+    tail_lines: int = 3
+) -> RoutingKey:
+    """
+    Routing key for a discussion state. The context tail holds the last speaker's
+    message, so the same question at a different point of the discussion gets its own key.
+    """
+    tail = (context or '').rstrip().rsplit('\n', tail_lines)[-tail_lines:]
+    return (_normalize(user_question), _normalize('\n'.join(tail)), tuple(sorted(specialist_keys)))
+
+
+class RoutingCache:
+    """LRU cache of Arbitrator routing decisions with optional embedding similarity."""
+
+    def __init__(self, maxsize: int = 256, threshold: float = 0.85, embed_model: Optional[str] = None):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.embed_model = embed_model if SentenceTransformer is not None else None
+        if embed_model and self.embed_model is None:
+            logger.warning("sentence-transformers not installed, routing cache uses exact keys only")
+
+        self._entries: "OrderedDict[RoutingKey, Dict[str, Any]]" = OrderedDict()
+        self._embeddings: Dict[RoutingKey, np.ndarray] = {}
+        self._encoder = None
+        self._lock = threading.RLock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="routing-cache")
+
+    def _get_encoder(self):
+        """Load the embedding model on first use; disables semantic matching if that fails."""
+        if self.embed_model is None:
+            return None
+        with self._lock:
+            if self._encoder is None and self.embed_model is not None:
+                try:
+                    self._encoder = SentenceTransformer(self.embed_model)
+                except Exception as e:
+                    logger.warning(f"Failed to load routing cache embed model {self.embed_model}: {e}")
+                    self.embed_model = None
+            return self._encoder
+
+    def _embed(self, key: RoutingKey) -> Optional[np.ndarray]:
+        encoder = self._get_encoder()
+        if encoder is None:
+            return None
+        try:
+            return np.asarray(encoder.encode(f"{key[0]}\n{key[1]}", normalize_embeddings=True), dtype=np.float64)
+        except Exception as e:
+            logger.warning(f"Routing cache embedding failed: {e}")
+            return None
+
+    def get(self, key: RoutingKey) -> Optional[Dict[str, Any]]:
+        """Cached decision for key (a copy), or None. Semantic hits require the same roster."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return dict(value)
+            if not self._embeddings:
+                return None
+
+        query = self._embed(key)
+        if query is None:
+            return None
+
+        with self._lock:
+            best_key, best_score = None, self.threshold
+            for cached_key, vec in self._embeddings.items():
+                if cached_key[2] != key[2]:
+                    continue
+                score = float(np.dot(query, vec))
+                if score >= best_score:
+                    best_key, best_score = cached_key, score
+            if best_key is None:
+                return None
+            logger.debug(f"Routing cache semantic hit (cos={best_score:.3f})")
+            self._entries.move_to_end(best_key)
+            return dict(self._entries[best_key])
+
+    def put(self, key: RoutingKey, value: Dict[str, Any]):
+        """Store a decision, evicting the least recently used entry when full."""
+        vec = self._embed(key)
+        with self._lock:
+            self._entries[key] = dict(value)
+            self._entries.move_to_end(key)
+            if vec is not None:
+                self._embeddings[key] = vec
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self._embeddings.pop(evicted, None)
+
+    def put_async(self, key: RoutingKey, value: Dict[str, Any]):
+        """put() on a background thread, so embedding a new key never delays routing."""
+        self._writer.submit(self.put, key, dict(value))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._embeddings.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_routing_cache = None
+
+def get_routing_cache() -> RoutingCache:
+    global _routing_cache
+    if _routing_cache is None:
+        _routing_cache = RoutingCache(
+            threshold=float(os.getenv("ROUTING_CACHE_THRESHOLD", "0.85")),
+            embed_model=os.getenv("ROUTING_CACHE_EMBED_MODEL") or None
+        )
+    return _routing_cache
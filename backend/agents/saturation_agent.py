@@ -1,5 +1,8 @@
 from typing import Dict, Any, Optional
-from backend.agents.base_agent import BaseAgent
+from backend.agents.base_agent import BaseAgent, error_excerpt
+from backend.agents.result_cache import cached_analyze
+from backend.core.curve_mapper import get_curve_mapper
+from backend.core.log_data import as_log_data
 import json
 import logging
 
@@ -49,26 +52,19 @@ class SaturationAgent(BaseAgent):
             }"""
         )
 
+    @cached_analyze
     def analyze(self, data: Dict[str, Any], context: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze log data to calculate fluid saturation.
         """
         curves = data.get('curves', {})
-        depth = curves.get('DEPTH', [])
         
         # 1. Curve Mapping
-        from backend.core.curve_mapper import get_curve_mapper
         mapper = get_curve_mapper()
-        mapper.reload()
+        mapper.reload_if_changed()  # one stat call; re-reads the file only if it changed
         
-        mapping = mapper.map_curves(list(curves.keys()))
-        matched = mapping['matched']
-        
-        def get_curve_name(standard_type):
-            for orig, std in matched.items():
-                if std == standard_type:
-                    return orig
-            return None
+        # {standard_type: first matching curve}, memoized per curve set: O(1) per lookup
+        get_curve_name = mapper.curves_by_type(curves.keys()).get
         
         # 2. Identify keys for saturation calculation
         # Resistivity
@@ -83,6 +79,8 @@ class SaturationAgent(BaseAgent):
         so_curve = get_curve_name('SAT_OIL')
         
         # 3. Data Summary
+        # Every curve reduced in one pass, on the LogData packed once for this request
+        all_stats = as_log_data(data).stats()
         available_curves = []
         curve_stats = {}
         
@@ -93,27 +91,30 @@ class SaturationAgent(BaseAgent):
             ('SAT_OIL', so_curve)
         ]:
             if curve_name and curve_name in curves:
-                vals = [v for v in curves[curve_name] if v is not None]
-                if vals:
+                c_stats = all_stats.get(curve_name)
+                if c_stats:
                     available_curves.append(f"{std_type} ({curve_name})")
                     curve_stats[std_type] = {
                         'curve': curve_name,
-                        'min': round(min(vals), 4),
-                        'max': round(max(vals), 4),
-                        'avg': round(sum(vals) / len(vals), 4)
+                        'min': round(c_stats['min'], 4),
+                        'max': round(c_stats['max'], 4),
+                        'avg': round(c_stats['mean'], 4)
                     }
 
         # 4. Context for LLM
         # Check if Porosity Expert has already run (it might be in context)
         # But for now, we assume we might need to estimate Phi if not provided directly
         
+        depth_stats = all_stats.get('DEPTH')
+        depth_range = f"{depth_stats['min']:.1f} - {depth_stats['max']:.1f} m" if depth_stats else "Unknown"
+
         data_summary = f"""
-        Depth Range: {min(depth):.1f} - {max(depth):.1f} m
+        Depth Range: {depth_range}
         
         Available Curves: {', '.join(available_curves) if available_curves else 'Limited data'}
         
         Curve Statistics:
-        {json.dumps(curve_stats, indent=2, ensure_ascii=False)}
+        {json.dumps(curve_stats, separators=(',', ':'), ensure_ascii=False)}
         """
         
         user_question = ""
@@ -195,5 +196,5 @@ class SaturationAgent(BaseAgent):
                 "pay_flag": False,
                 "confidence": 0.0,
                 "reasoning": "LLM输出格式解析失败",
-                "raw_output": response_text
+                "raw_output": error_excerpt(response_text)
             }
@@ -20,6 +20,15 @@ logger = logging.getLogger(__name__)
 # Thread-local storage for current analysis logger
 _current_logger = threading.local()
 
+# Prompt tokens logged from each thread: fanned-out specialists share one logger, so a
+# caller measures its own usage here rather than from the logger's totals
+_thread_usage = threading.local()
+
+
+def thread_prompt_tokens() -> int:
+    """Prompt tokens of every LLM call logged from the current thread so far."""
+    return getattr(_thread_usage, 'prompt_tokens', 0)
+
 
 @dataclass
 class LLMCallLog:
@@ -43,6 +52,9 @@ class NodeLog:
     skills_loaded: List[str] = field(default_factory=list)
     llm_call: Optional[Dict[str, Any]] = None
     confidence: Optional[float] = None
+    cache_hit: bool = False
+    tokens_saved: int = 0
+    fast_path: bool = False
     duration_ms: int = 0
     start_time: float = field(default_factory=time.time)
     
@@ -69,6 +81,9 @@ class AnalysisLogger:
         self.total_prompt_tokens = 0
         self.total_completion_tokens = 0
         
+        # Fanned-out specialists log LLM calls from worker threads
+        self._lock = threading.Lock()
+        
         logger.info(f"[AnalysisLog:{self.analysis_id}] Started")
     
     def start_node(self, node_name: str, agent_key: str = None, agent_name: str = None) -> NodeLog:
@@ -114,16 +129,31 @@ class AnalysisLogger:
             duration_ms=duration_ms
         )
         
-        if self.current_node:
-            self.current_node.llm_call = asdict(llm_log)
-        
-        self.total_llm_calls += 1
-        self.total_prompt_tokens += prompt_tokens
-        self.total_completion_tokens += completion_tokens
+        with self._lock:
+            if self.current_node:
+                self.current_node.llm_call = asdict(llm_log)
+            
+            self.total_llm_calls += 1
+            self.total_prompt_tokens += prompt_tokens
+            self.total_completion_tokens += completion_tokens
+        _thread_usage.prompt_tokens = thread_prompt_tokens() + prompt_tokens
         
         logger.info(f"[AnalysisLog:{self.analysis_id}] LLM call by {agent_name}: "
                    f"{prompt_tokens}+{completion_tokens} tokens, {duration_ms}ms")
     
+    def log_cache_hit(self, tokens_saved: int = 0):
+        """记录缓存命中 (跳过 LLM 调用)"""
+        if self.current_node:
+            self.current_node.cache_hit = True
+            self.current_node.tokens_saved += tokens_saved
+            logger.info(f"[AnalysisLog:{self.analysis_id}] Cache hit: {self.current_node.node}")
+    
+    def log_fast_path(self):
+        """记录确定性快速决策 (未调用 LLM)"""
+        if self.current_node:
+            self.current_node.fast_path = True
+            logger.info(f"[AnalysisLog:{self.analysis_id}] Fast path: {self.current_node.node}")
+    
     def log_confidence(self, confidence: float):
         """记录置信度"""
         if self.current_node:
@@ -10,9 +10,13 @@ This module provides intelligent curve name mapping functionality:
 import json
 import os
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Any, Tuple
 from pathlib import Path
 
+from backend.core.fuzzy_json import fuzzy_loads
+
 logger = logging.getLogger(__name__)
 
 # Path to the curve mapping dictionary
@@ -28,10 +32,23 @@ class CurveMapper:
         self.mapping_file = Path(mapping_file) if mapping_file else MAPPING_FILE_PATH
         self._mapping_data: Optional[Dict] = None
         self._reverse_alias_map: Optional[Dict[str, str]] = None
+        # Bumped whenever the alias map is rebuilt; lets callers key caches on it
+        self.version = 0
+        self._mtime: Optional[float] = None
+        # (curve names, version) -> read-only matched map, see matched_curves()
+        self._matched_cached = lru_cache(maxsize=128)(self._compute_matched)
+        self._by_type_cached = lru_cache(maxsize=128)(self._compute_by_type)
         self._load_mapping()
     
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return self.mapping_file.stat().st_mtime
+        except OSError:
+            return None
+    
     def _load_mapping(self) -> None:
         """Load the mapping dictionary from file."""
+        self._mtime = self._file_mtime()
         try:
             if self.mapping_file.exists():
                 with open(self.mapping_file, 'r', encoding='utf-8') as f:
@@ -41,15 +58,18 @@ class CurveMapper:
             else:
                 logger.warning(f"Mapping file not found: {self.mapping_file}")
                 self._mapping_data = {"version": "1.0", "standard_types": {}, "aliases": {}}
-                self._reverse_alias_map = {}
+                self._build_reverse_alias_map()
         except Exception as e:
             logger.error(f"Failed to load mapping file: {e}")
             self._mapping_data = {"version": "1.0", "standard_types": {}, "aliases": {}}
-            self._reverse_alias_map = {}
+            self._build_reverse_alias_map()
     
     def _build_reverse_alias_map(self) -> None:
         """Build a reverse lookup map: alias -> standard_type."""
         self._reverse_alias_map = {}
+        self.version += 1
+        self._matched_cached.cache_clear()
+        self._by_type_cached.cache_clear()
         aliases = self._mapping_data.get("aliases", {})
         
         for standard_type, alias_list in aliases.items():
@@ -63,6 +83,13 @@ class CurveMapper:
         """Reload the mapping from file (useful after external edits)."""
         self._load_mapping()
     
+    def reload_if_changed(self) -> bool:
+        """Reload only if the mapping file's mtime changed since the last load (one stat call)."""
+        if self._file_mtime() == self._mtime:
+            return False
+        self._load_mapping()
+        return True
+    
     def get_standard_types(self) -> Dict[str, Dict]:
         """Get all standard curve types with their descriptions."""
         return self._mapping_data.get("standard_types", {})
@@ -114,6 +141,30 @@ class CurveMapper:
             "curve_details": curve_details
         }
     
+    def _compute_matched(self, curve_names: Tuple[str, ...], version: int) -> Mapping[str, str]:
+        return MappingProxyType(self.map_curves(list(curve_names))['matched'])
+    
+    def matched_curves(self, curve_names: Iterable[str]) -> Mapping[str, str]:
+        """
+        map_curves(curve_names)['matched'] as a read-only {original_name: standard_type},
+        memoized per curve-name tuple and mapping version: an agent re-analyzing the same
+        well reuses one result until the mapping changes.
+        """
+        return self._matched_cached(tuple(curve_names), self.version)
+    
+    def _compute_by_type(self, curve_names: Tuple[str, ...], version: int) -> Mapping[str, str]:
+        by_type = {}
+        for orig, std in self._matched_cached(curve_names, version).items():
+            by_type.setdefault(std, orig)
+        return MappingProxyType(by_type)
+    
+    def curves_by_type(self, curve_names: Iterable[str]) -> Mapping[str, str]:
+        """
+        Read-only {standard_type: first matching original name} for curve_names: the inverse
+        of matched_curves(), memoized the same way, so a type lookup is one dict probe.
+        """
+        return self._by_type_cached(tuple(curve_names), self.version)
+    
     def save_user_mapping(self, original_name: str, standard_type: str) -> bool:
         """
         Save a user-confirmed mapping to the dictionary file.
@@ -253,12 +304,9 @@ async def suggest_curve_mapping_with_llm(
         
         if response.get("success") and response.get("content"):
             content = response["content"]
-            # Extract JSON from response
-            import re
-            json_match = re.search(r'\{[^{}]*\}', content, re.DOTALL)
-            if json_match:
-                suggestions = json.loads(json_match.group())
-                logger.info(f"LLM suggested mappings: {suggestions}")
+            # Extract JSON from response (fences, prose and minor format slips tolerated)
+            suggestions = fuzzy_loads(content)
+            logger.info(f"LLM suggested mappings: {suggestions}")
     except Exception as e:
         logger.error(f"LLM suggestion failed: {e}")
         # Return None for all on failure
@@ -0,0 +1,184 @@
+"""
+Fuzzy JSON - 宽松 JSON 解析
+
+Parses the JSON object out of an LLM reply. The object span is found with one
+string-aware balanced-brace scan from the first '{' (markdown fences and surrounding
+prose are ignored). A well-formed span is decoded directly; otherwise one repair pass
+rewrites the usual LLM deviations before decoding:
+  - single-quoted strings, unquoted keys
+  - Python literals True / False / None
+  - trailing commas, // and /* */ comments
+An object cut off before its closing brace is an error, unless the caller asks for a
+partial parse (then open strings and brackets are closed).
+"""
+
+import json
+from typing import Any, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_LITERALS = {
+    'true': 'true', 'True': 'true',
+    'false': 'false', 'False': 'false',
+    'null': 'null', 'None': 'null',
+    'NaN': 'NaN', 'Infinity': 'Infinity',
+}
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+def _strict_loads(text: str) -> Any:
+    """orjson when available; stdlib json is the lenient fallback (e.g. NaN literals)."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def _object_span(text: str) -> Tuple[int, int, bool]:
+    """(start, end, closed) of the outermost {...} starting at the first '{'."""
+    start = text.find('{')
+    if start < 0:
+        raise ValueError("No JSON object found")
+    depth = 0
+    quote = None
+    escape = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if quote:
+            if escape:
+                escape = False
+            elif c == '\\':
+                escape = True
+            elif c == quote:
+                quote = None
+        elif c == '"' or c == "'":
+            quote = c
+        elif c == '{' or c == '[':
+            depth += 1
+        elif c == '}' or c == ']':
+            depth -= 1
+            if depth == 0:
+                return start, i + 1, True
+    return start, len(text), False
+
+
+def _read_string(text: str, i: int, out: List[str]) -> int:
+    """Copy the string opening at text[i] as a double-quoted JSON string; returns the index after it."""
+    quote = text[i]
+    n = len(text)
+    i += 1
+    buf = ['"']
+    while i < n:
+        c = text[i]
+        if c == '\\' and i + 1 < n:
+            nxt = text[i + 1]
+            # \' is not a JSON escape; everything else passes through
+            buf.append("'" if nxt == "'" else c + nxt)
+            i += 2
+            continue
+        if c == quote:
+            i += 1
+            break
+        if c == '"':
+            buf.append('\\"')
+        elif c == '\n':
+            buf.append('\\n')
+        elif c == '\t':
+            buf.append('\\t')
+        elif c == '\r':
+            buf.append('\\r')
+        else:
+            buf.append(c)
+        i += 1
+    buf.append('"')
+    out.append(''.join(buf))
+    return i
+
+
+def _repair(span: str, partial: bool = False) -> str:
+    """One lexer pass rewriting JSON-ish text into strict JSON (closing cut-off output if partial)."""
+    out: List[str] = []
+    stack: List[str] = []
+    i = 0
+    n = len(span)
+    while i < n:
+        c = span[i]
+        if c == '"' or c == "'":
+            i = _read_string(span, i, out)
+            continue
+        if c.isspace():
+            i += 1
+            continue
+        if c == '/' and i + 1 < n and span[i + 1] in '/*':
+            if span[i + 1] == '/':
+                end = span.find('\n', i)
+                i = n if end < 0 else end + 1
+            else:
+                end = span.find('*/', i + 2)
+                i = n if end < 0 else end + 2
+            continue
+        if c == '{' or c == '[':
+            stack.append(_CLOSERS[c])
+            out.append(c)
+        elif c == '}' or c == ']':
+            if out and out[-1] == ',':
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(c)
+        elif c.isdigit() or c in '-+.':
+            j = i + 1
+            while j < n and (span[j].isdigit() or span[j] in 'eE+-.'):
+                j += 1
+            out.append(span[i:j].lstrip('+') or '0')
+            i = j
+            continue
+        elif c == '_' or c == '$' or c.isalpha():
+            j = i + 1
+            while j < n and (span[j] == '_' or span[j] == '$' or span[j].isalnum()):
+                j += 1
+            word = span[i:j]
+            out.append(_LITERALS.get(word) or json.dumps(word))
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    if not partial:
+        return ''.join(out)
+    # Cut-off output: drop a dangling separator or key, then close whatever is still open
+    while out and out[-1] in (',', ':'):
+        out.pop()
+    if stack and stack[-1] == '}' and len(out) >= 2 and out[-1][0] == '"' and out[-2] in ('{', ','):
+        out.pop()
+        if out[-1] == ',':
+            out.pop()
+    out.extend(reversed(stack))
+    return ''.join(out)
+
+
+def fuzzy_loads(text: Optional[str], partial: bool = False) -> Any:
+    """
+    Parse the JSON object embedded in an LLM reply, tolerating common format slips.
+    With partial=True an unterminated object is closed and its complete fields returned.
+    Raises ValueError if nothing usable is found, or if the object is unterminated
+    and partial is False.
+    """
+    if not text:
+        raise ValueError("Empty response")
+    start, end, closed = _object_span(text)
+    span = text[start:end]
+    if closed:
+        try:
+            return _strict_loads(span)
+        except ValueError:
+            pass
+    elif not partial:
+        raise ValueError("Unterminated JSON object")
+    return json.loads(_repair(span, partial))
@@ -0,0 +1,123 @@
+"""
+Streaming JSON Parser - 流式 JSON 解析
+
+Incrementally scans an LLM reply as it streams in and exposes every top-level field of
+the JSON object as soon as its value is complete, so callers can act on early fields
+(e.g. the Arbitrator's next_agent) while the model is still writing later ones.
+Text before the first '{' (markdown fences, preamble) is skipped. Each character is
+scanned once; each completed field is decoded once.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Top-level scanner states
+_EXPECT_KEY, _IN_KEY, _EXPECT_COLON, _IN_VALUE = range(4)
+
+
+class StreamingJsonParser:
+    """Stack-depth scanner over a growing buffer; see get_partial() for the result."""
+
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]] = None):
+        """
+        Args:
+            on_field: Optional callback(key, value), called once per top-level field
+                      as soon as that field is complete.
+        """
+        self.on_field = on_field
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = _EXPECT_KEY
+        self._key: Optional[str] = None
+        self._mark = 0
+        self._fields: Dict[str, Any] = {}
+        self.done = False
+
+    def push(self, chunk: str) -> Dict[str, Any]:
+        """Feed the next chunk; returns the fields completed so far."""
+        if self.done or not chunk:
+            return self._fields
+        self._text += chunk
+        text = self._text
+
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if not self._started:
+                if c == '{':
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == _IN_KEY:
+                        self._key = self._decode(text[self._mark:i + 1])
+                        self._state = _EXPECT_COLON
+                continue
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._state == _EXPECT_KEY:
+                    self._mark = i
+                    self._state = _IN_KEY
+            elif c == '{' or c == '[':
+                self._depth += 1
+            elif c == '}' or c == ']':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_field(text, i)
+                    self.done = True
+                    self._pos = i + 1
+                    return self._fields
+            elif self._depth == 1:
+                if c == ':' and self._state == _EXPECT_COLON:
+                    self._state = _IN_VALUE
+                    self._mark = i + 1
+                elif c == ',' and self._state == _IN_VALUE:
+                    self._finish_field(text, i)
+                    self._state = _EXPECT_KEY
+
+        self._pos = len(text)
+        return self._fields
+
+    def get_partial(self) -> Dict[str, Any]:
+        """Top-level fields whose values are complete (a copy)."""
+        return dict(self._fields)
+
+    def _finish_field(self, text: str, end: int):
+        if self._state != _IN_VALUE or self._key is None:
+            return
+        raw = text[self._mark:end].strip()
+        if not raw:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            logger.debug(f"Streaming JSON: could not decode field {self._key!r}")
+            return
+        key, self._key = self._key, None
+        self._fields[key] = value
+        if self.on_field:
+            try:
+                self.on_field(key, value)
+            except Exception as e:
+                logger.warning(f"Streaming JSON field callback failed: {e}")
+
+    @staticmethod
+    def _decode(raw: str) -> Optional[str]:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
@@ -2,11 +2,20 @@ import os
 import time
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional, Any, Callable, Union
+from typing import List, Dict, Optional, Any, Callable, Iterator, Union
 from functools import wraps
+import httpx
 from openai import OpenAI
 from dotenv import load_dotenv
 
+try:
+    import h2  # noqa: F401  optional: lets the pooled client negotiate HTTP/2
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+from backend.core.single_flight import SingleFlight, request_key
+
 # Load environment variables from project root
 project_root = Path(__file__).resolve().parent.parent.parent
 env_path = project_root / ".env"
@@ -16,6 +25,20 @@ load_dotenv(dotenv_path=env_path)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Connection pool shared by every agent thread: kept-alive connections skip the TCP/TLS
+# handshake, and the limits sit well above AGENT_POOL_WORKERS so agents never queue for one
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "32"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+
+def _pooled_http_client() -> httpx.Client:
+    return httpx.Client(
+        http2=_HTTP2,
+        limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE),
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0),
+    )
+
 def retry_on_failure(max_retries=3, delay=1, backoff=2):
     """Wrapper for retrying function calls on failure."""
     def decorator(func):
@@ -58,7 +81,8 @@ class LLMService:
             try:
                 self.client = OpenAI(
                     api_key=self.api_key,
-                    base_url=self.base_url
+                    base_url=self.base_url,
+                    http_client=_pooled_http_client()
                 )
                 logger.info(f"LLMService initialized with base_url: {self.base_url}")
             except Exception as e:
@@ -69,15 +93,41 @@ class LLMService:
         self.max_tokens = 4096
         self.temperature = 0.7
         self.top_p = 0.9
+        # Identical requests issued concurrently share one API call
+        self._single_flight = SingleFlight()
+
+    @staticmethod
+    def _system_prompt(system_prompt: Optional[str], static_context: Optional[str]) -> Optional[str]:
+        """system_prompt followed by static_context, so every call shares the same leading bytes."""
+        if static_context:
+            return f"{system_prompt}\n\n{static_context}" if system_prompt else static_context
+        return system_prompt
+
+    def _request_key(self, messages: List[Dict[str, str]], system_prompt: Optional[str],
+                     temperature: Optional[float]) -> str:
+        return request_key(self.model, system_prompt, messages, temperature or self.temperature)
 
-    @retry_on_failure(max_retries=3, delay=1, backoff=2)
     def chat(self, 
              messages: List[Dict[str, str]], 
              system_prompt: Optional[str] = None, 
-             temperature: Optional[float] = None) -> Dict[str, Any]:
+             temperature: Optional[float] = None,
+             static_context: Optional[str] = None) -> Dict[str, Any]:
         """
-        Send a chat request to the LLM.
+        Send a chat request to the LLM. static_context (rules, tool lists) is appended to
+        the system prompt. A request identical to one still in flight waits for that
+        call's response instead of issuing another.
         """
+        system_prompt = self._system_prompt(system_prompt, static_context)
+        return self._single_flight.do(
+            self._request_key(messages, system_prompt, temperature),
+            lambda: self._chat(messages, system_prompt, temperature)
+        )
+
+    @retry_on_failure(max_retries=3, delay=1, backoff=2)
+    def _chat(self, 
+              messages: List[Dict[str, str]], 
+              system_prompt: Optional[str] = None, 
+              temperature: Optional[float] = None) -> Dict[str, Any]:
         if not self.client:
             return {
                 "content": "[MOCK RESPONSE] LLMService not initialized with API Key.",
@@ -125,6 +175,52 @@ class LLMService:
                 "success": False
             }
 
+    def chat_stream(self, 
+                    messages: List[Dict[str, str]], 
+                    system_prompt: Optional[str] = None, 
+                    temperature: Optional[float] = None,
+                    static_context: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream a chat response from the LLM, yielding content chunks as they arrive.
+        static_context is appended to the system prompt, as in chat(). A request
+        identical to a stream still in flight replays that stream.
+        Raises if the client is not initialized or the request fails.
+        """
+        if not self.client:
+            raise RuntimeError("LLMService not initialized with API Key.")
+        
+        system_prompt = self._system_prompt(system_prompt, static_context)
+        return self._single_flight.stream(
+            self._request_key(messages, system_prompt, temperature),
+            lambda: self._chat_stream(messages, system_prompt, temperature)
+        )
+
+    def _chat_stream(self, 
+                     messages: List[Dict[str, str]], 
+                     system_prompt: Optional[str] = None, 
+                     temperature: Optional[float] = None) -> Iterator[str]:
+        full_messages = []
+        if system_prompt:
+            full_messages.append({"role": "system", "content": system_prompt})
+        full_messages.extend(messages)
+        
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=full_messages,
+            max_tokens=self.max_tokens,
+            temperature=temperature or self.temperature,
+            top_p=self.top_p,
+            stream=True
+        )
+        try:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the HTTP response stops generation when the caller stops early
+            if hasattr(response, 'close'):
+                response.close()
+
     def stream_chat(self, 
                    messages: List[Dict[str, str]], 
                    system_prompt: Optional[str] = None, 
@@ -140,29 +236,14 @@ class LLMService:
         Returns:
             The complete accumulated response string.
         """
-        full_messages = []
-        if system_prompt:
-            full_messages.append({"role": "system", "content": system_prompt})
-        full_messages.extend(messages)
-        
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=full_messages,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                stream=True
-            )
-            
-            full_content = ""
-            for chunk in response:
-                if chunk.choices[0].delta.content:
-                    token = chunk.choices[0].delta.content
-                    full_content += token
-                    if callback:
-                        callback(token)
+            parts = []
+            for token in self.chat_stream(messages, system_prompt=system_prompt):
+                parts.append(token)
+                if callback:
+                    callback(token)
             
-            return full_content
+            return "".join(parts)
         except Exception as e:
             logger.error(f"LLM streaming request failed: {str(e)}")
             raise e
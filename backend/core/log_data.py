@@ -0,0 +1,198 @@
+"""
+Columnar (SoA) well log container.
+
+Skill scripts accept either the usual {'curves': {name: values}} dict or a LogData.
+Building a LogData once and passing it to several tools avoids re-coercing every
+curve and re-scanning it for NaN in each tool. with_log_data() packs the curves of a
+request once and carries the LogData along with the dict form, so every agent and
+tool handed that dict reuses it; a tool handed a plain dict packs only the curves it reads.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # optional accelerator
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+
+class LogData:
+    """
+    All numeric curves of a well in one float64 block of shape (n_curves, n_samples).
+    Each curve is a contiguous row, returned as a read-only view; columns maps name -> row.
+    """
+
+    __slots__ = ('data', 'columns', '_finite', '_stats')
+
+    def __init__(self, data: np.ndarray, columns: Dict[str, int]):
+        self.data = data
+        self.columns = columns
+        self._finite: Dict[str, np.ndarray] = {}
+        self._stats: Optional[Dict[str, Optional[Dict[str, float]]]] = None
+
+    @classmethod
+    def from_curves(cls, curves: Mapping[str, Any]) -> 'LogData':
+        """
+        Pack a {name: list | ndarray} mapping. None gaps become NaN, shorter curves are
+        NaN-padded to the longest one, and non-numeric curves are left out.
+        """
+        arrays = {}
+        for name, values in curves.items():
+            try:
+                arr = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                logger.debug(f"Skipping non-numeric curve {name}")
+                continue
+            if arr.ndim == 1:
+                arrays[name] = arr
+
+        n_samples = max((a.size for a in arrays.values()), default=0)
+        data = np.full((len(arrays), n_samples), np.nan)
+        for row, arr in enumerate(arrays.values()):
+            data[row, :arr.size] = arr
+        data.flags.writeable = False
+        return cls(data, {name: row for row, name in enumerate(arrays)})
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def names(self) -> List[str]:
+        """Curve names in input order."""
+        return list(self.columns)
+
+    def get_curve(self, name: str) -> np.ndarray:
+        """Read-only view of one curve."""
+        return self.data[self.columns[name]]
+
+    def finite(self, name: str) -> np.ndarray:
+        """Read-only isfinite mask of one curve, computed once and reused."""
+        mask = self._finite.get(name)
+        if mask is None:
+            mask = np.isfinite(self.get_curve(name))
+            mask.flags.writeable = False
+            self._finite[name] = mask
+        return mask
+
+    @property
+    def curves(self) -> Dict[str, np.ndarray]:
+        """{name: curve view}, for code that still reads log_data['curves']."""
+        return {name: self.data[row] for name, row in self.columns.items()}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access to 'curves' so a LogData can stand in for the dict form."""
+        return self.curves if key == 'curves' else default
+
+    def stats(self) -> Dict[str, Optional[Dict[str, float]]]:
+        """
+        count / min / max / mean of every curve over its finite samples, in one pass over
+        the block; None for a curve with no finite samples. Computed once and shared:
+        treat the result as read-only.
+        """
+        if self._stats is None:
+            if not self.columns:
+                self._stats = {}
+            else:
+                count, lo, hi, mean = _row_stats(self.data)
+                self._stats = {
+                    name: {'count': int(count[row]), 'min': float(lo[row]), 'max': float(hi[row]),
+                           'mean': float(mean[row])} if count[row] else None
+                    for name, row in self.columns.items()
+                }
+        return self._stats
+
+
+def _row_stats_loop(data: np.ndarray):
+    # Single fused pass per row: finiteness test, count, min, max and sum together
+    n_rows, n_samples = data.shape
+    count = np.zeros(n_rows, dtype=np.int64)
+    lo = np.full(n_rows, np.nan)
+    hi = np.full(n_rows, np.nan)
+    mean = np.full(n_rows, np.nan)
+    for r in range(n_rows):
+        c = 0
+        total = 0.0
+        r_lo = np.inf
+        r_hi = -np.inf
+        for i in range(n_samples):
+            v = data[r, i]
+            if np.isfinite(v):
+                c += 1
+                total += v
+                if v < r_lo:
+                    r_lo = v
+                if v > r_hi:
+                    r_hi = v
+        if c > 0:
+            count[r] = c
+            lo[r] = r_lo
+            hi[r] = r_hi
+            mean[r] = total / c
+    return count, lo, hi, mean
+
+
+def _row_stats_numpy(data: np.ndarray):
+    n_rows = data.shape[0]
+    count = np.zeros(n_rows, dtype=np.int64)
+    lo = np.full(n_rows, np.nan)
+    hi = np.full(n_rows, np.nan)
+    mean = np.full(n_rows, np.nan)
+    for r in range(n_rows):
+        vals = data[r][np.isfinite(data[r])]
+        if vals.size:
+            count[r] = vals.size
+            lo[r] = vals.min()
+            hi[r] = vals.max()
+            mean[r] = vals.mean()
+    return count, lo, hi, mean
+
+
+# No fastmath: it assumes NaN-free input and could drop the isfinite test. Serial on
+# purpose: a handful of curves is far below what a parallel region pays back.
+# cache=True keeps the compiled kernel in __pycache__, so only the first process ever
+# pays the compile on its first request.
+if njit is not None:
+    _row_stats = njit(nogil=True, cache=True)(_row_stats_loop)
+else:
+    _row_stats = _row_stats_numpy
+
+
+def with_log_data(data: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Shallow copy of a {'curves': {...}} dict carrying its packed LogData under 'log_data'.
+    The input is left untouched (it is part of the checkpointed workflow state).
+    """
+    if isinstance(data.get('log_data'), LogData):
+        return data
+    return {**data, 'log_data': LogData.from_curves(data.get('curves') or {})}
+
+
+def as_log_data(log_data: Any, names: Optional[Iterable[str]] = None) -> LogData:
+    """
+    Return log_data as a LogData: the one carried by a with_log_data() dict, else the
+    {'curves': {...}} dict form packed now. When packing, only the curves in names are
+    included (all of them if names is None); absent names are skipped.
+    """
+    if isinstance(log_data, LogData):
+        return log_data
+    if not isinstance(log_data, Mapping):
+        return LogData.from_curves({})
+    packed = log_data.get('log_data')
+    if isinstance(packed, LogData):
+        return packed
+    curves = log_data.get('curves') or {}
+    if names is not None:
+        curves = {name: curves[name] for name in names if name in curves}
+    return LogData.from_curves(curves)
+
+
+def curve_names(log_data: Any) -> List[str]:
+    """Curve names of log_data in input order, without packing anything."""
+    if isinstance(log_data, Mapping) and not isinstance(log_data.get('log_data'), LogData):
+        return list(log_data.get('curves') or {})
+    return as_log_data(log_data).names()
+
@@ -0,0 +1,163 @@
+"""
+Single Flight - 相同请求并发去重
+
+Concurrent identical calls (same key) share one execution: the first caller runs it,
+later callers arriving while it is still in flight wait for and receive the same result.
+Nothing is kept once the call completes; this only collapses in-flight duplicates
+(e.g. a double-submitted analysis), it is not a cache.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(*parts: Any) -> str:
+    """sha1 over the JSON form of the request parts (model, system prompt, messages, ...)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class _StreamFlight:
+    """Chunks of one in-flight stream, replayed to every subscriber as they arrive."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.cond = threading.Condition()
+
+    def join(self):
+        with self.cond:
+            self.subscribers += 1
+
+    def has_subscribers(self) -> bool:
+        with self.cond:
+            return self.subscribers > 0
+
+    def publish(self, chunk: str):
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def close(self, error: Optional[BaseException] = None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def subscribe(self) -> Iterator[str]:
+        """Every chunk from the first; the caller must have join()ed first."""
+        i = 0
+        try:
+            while True:
+                with self.cond:
+                    while i >= len(self.chunks) and not self.done:
+                        self.cond.wait()
+                    if i < len(self.chunks):
+                        chunk = self.chunks[i]
+                    elif self.error is not None:
+                        raise self.error
+                    else:
+                        return
+                i += 1
+                yield chunk
+        finally:
+            with self.cond:
+                self.subscribers -= 1
+
+
+def _drain(flight: _StreamFlight, upstream: Iterator[str]):
+    """Finish an upstream stream its first caller stopped reading, for the callers that joined it."""
+    error: Optional[BaseException] = None
+    try:
+        for chunk in upstream:
+            if not flight.has_subscribers():
+                break  # every joined caller has stopped reading too
+            flight.publish(chunk)
+    except BaseException as e:
+        error = e
+    finally:
+        if hasattr(upstream, 'close'):
+            upstream.close()
+        flight.close(error)
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._streams: Dict[str, _StreamFlight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """fn(), or the result of the identical call already in flight."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            logger.info("Single-flight: joined an identical in-flight LLM call")
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stream(self, key: str, fn: Callable[[], Iterable[str]]) -> Iterator[str]:
+        """Chunks of fn(), or of the identical stream already in flight (from its first chunk)."""
+        with self._lock:
+            flight = self._streams.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._streams[key] = _StreamFlight()
+            else:
+                flight.join()
+        if not leader:
+            logger.info("Single-flight: joined an identical in-flight LLM stream")
+            yield from flight.subscribe()
+            return
+
+        upstream = iter(fn())
+        error: Optional[BaseException] = None
+        handed_off = False
+        try:
+            for chunk in upstream:
+                flight.publish(chunk)
+                yield chunk
+        except GeneratorExit:
+            # The first caller stopped early (think_decision does once a tool call is
+            # parsed): callers that joined still get the whole stream, drained in the background
+            with self._lock:
+                self._streams.pop(key, None)
+                handed_off = flight.has_subscribers()
+            if handed_off:
+                threading.Thread(target=_drain, args=(flight, upstream), daemon=True,
+                                 name="llm-stream-drain").start()
+            elif hasattr(upstream, 'close'):
+                upstream.close()
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if not handed_off:
+                with self._lock:
+                    self._streams.pop(key, None)
+                flight.close(error)
@@ -17,22 +17,27 @@ Graph Topology:
                                              [END]
 """
 
-from typing import TypedDict, Annotated, List, Dict, Any, Optional
+from typing import TypedDict, Annotated, List, Dict, Any, Optional, Tuple
 import operator
 import logging
 import re
 from langgraph.graph import StateGraph, END
 
+from backend.agents.base_agent import submit_with_logger
 from backend.agents.agent_loader import (
     load_agents, 
     get_agent_instance, 
     get_router_keywords,
     get_specialist_agents
 )
+from backend.core.log_data import with_log_data
 from backend.db.checkpointer import MongoDBSaver
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on specialists run concurrently in one Arbitrator fan-out
+MAX_FAN_OUT = 3
+
 
 class AgentState(TypedDict):
     """State shared across all nodes in the workflow."""
@@ -138,45 +143,50 @@ def router_node(state: AgentState) -> Dict[str, Any]:
     return {"router_decision": target}
 
 
-def specialist_node(state: AgentState) -> Dict[str, Any]:
-    # ... (imports unchanged)
-    from backend.agents.skill_loader import build_agent_context
-    from backend.agents.agent_loader import get_agent_skills
-    from backend.core.analysis_logger import get_current_logger
-    
-    # ... (determine agent unchanged)
+def _fan_out(arb_output: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(agent_key, question) pairs from the Arbitrator's next_agents, capped at MAX_FAN_OUT."""
+    return [
+        (d["agent"], d.get("question") or "")
+        for d in (arb_output.get("next_agents") or [])[:MAX_FAN_OUT]
+    ]
+
+
+def _dispatch_list(state: AgentState) -> List[Tuple[str, str]]:
+    """
+    (agent_key, question) pairs to run this round: the Arbitrator's next_agents fan-out
+    when it asked for several independent analyses, else its next_agent, else the router's pick.
+    """
     arb_output = state.get("arbitrator_output")
     
     if arb_output and arb_output.get("next_agent"):
+        dispatches = _fan_out(arb_output)
+        if len(dispatches) > 1:
+            logger.info(f"--- Specialist Node (Fan-out: {[k for k, _ in dispatches]}) ---")
+            return dispatches
         agent_key = arb_output["next_agent"]
-        question = arb_output.get("question_for_agent", "")
         logger.info(f"--- Specialist Node (Dispatched: {agent_key}) ---")
-    else:
-        agent_key = state.get("router_decision", "LithologyExpert")
-        question = ""
-        logger.info(f"--- Specialist Node (Routed: {agent_key}) ---")
+        return [(agent_key, arb_output.get("question_for_agent", ""))]
+    
+    agent_key = state.get("router_decision", "LithologyExpert")
+    logger.info(f"--- Specialist Node (Routed: {agent_key}) ---")
+    return [(agent_key, "")]
+
+
+def _run_specialist(data: Dict[str, Any], agent_key: str, question: str, discussion_sanitized: str,
+                    analysis_log=None) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Run one specialist; returns (discussion message, result or None if the agent is missing)."""
+    from backend.agents.skill_loader import build_agent_context
+    from backend.agents.agent_loader import get_agent_skills
     
-    # Get agent instance (unchanged)
     agent = get_agent_instance(agent_key)
     if not agent:
         logger.error(f"Agent not found: {agent_key}")
-        return {
-            "discussion_history": [f"Error: Agent {agent_key} not found"],
-            "agent_results": state.get("agent_results", {})
-        }
-    
-    # Get agent display name (unchanged)
-    agent_name = get_specialist_agents().get(agent_key, {}).get('name', agent_key)
-    
-    # Log node start (unchanged)
-    analysis_log = get_current_logger()
-    if analysis_log:
-        analysis_log.start_node("specialist", agent_key=agent_key, agent_name=agent_name)
+        return f"Error: Agent {agent_key} not found", None
     
-    # Build context (unchanged)
+    # Build context
     agent_skills = get_agent_skills(agent_key)
     
-    # Log skills (unchanged)
+    # Log skills
     if analysis_log:
         for skill in agent_skills:
             analysis_log.log_skill_loaded(skill)
@@ -184,30 +194,70 @@ def specialist_node(state: AgentState) -> Dict[str, Any]:
     skills_context = build_agent_context(agent_skills)
     
     # Combine: skills context + SANITIZED discussion history + question
-    discussion_sanitized = sanitize_history_text(state.get("discussion_history", []))
-    
     full_context = f"{skills_context}\n\n## 分析讨论\n{discussion_sanitized}"
     if question:
         full_context += f"\n\nArbitrator Question: {question}"
     
     # Run analysis
-    result = agent.analyze(state["input_data"], full_context)
+    result = agent.analyze(data, full_context)
     
-    # ... (rest of function unchanged)
+    # Format message
     confidence = result.get('confidence', 0.0)
+    reasoning = result.get('reasoning', str(result))
+    return f"{agent_key}: Conf={confidence}. {reasoning}", result
+
+
+def specialist_node(state: AgentState) -> Dict[str, Any]:
+    from backend.core.analysis_logger import get_current_logger
+    
+    dispatches = _dispatch_list(state)
+    agent_keys = [k for k, _ in dispatches]
+    
+    # Get agent display name(s)
+    specialists = get_specialist_agents()
+    agent_name = "、".join(specialists.get(k, {}).get('name', k) for k in agent_keys)
+    
+    # Log node start (a fan-out is one node listing every dispatched agent)
+    analysis_log = get_current_logger()
     if analysis_log:
-        analysis_log.log_confidence(confidence)
+        analysis_log.start_node("specialist", agent_key=",".join(agent_keys), agent_name=agent_name)
     
-    # Format message
-    reasoning = result.get('reasoning', str(result))
-    msg = f"{agent_key}: Conf={confidence}. {reasoning}"
+    # SANITIZED discussion history, shared by every dispatched agent
+    discussion_sanitized = sanitize_history_text(state.get("discussion_history", []))
+    
+    # Curves packed once and handed to every dispatched agent and the tools they call
+    data = with_log_data(state["input_data"])
+    
+    if len(dispatches) == 1:
+        agent_key, question = dispatches[0]
+        outcomes = [_run_specialist(data, agent_key, question, discussion_sanitized, analysis_log)]
+    else:
+        # Independent analyses on the shared agent pool: wall time is the slowest
+        # specialist, not the sum
+        futures = [
+            submit_with_logger(_run_specialist, data, agent_key, question, discussion_sanitized, analysis_log)
+            for agent_key, question in dispatches
+        ]
+        outcomes = [f.result() for f in futures]
     
-    # Update agent_results
     agent_results = state.get("agent_results", {}).copy()
-    agent_results[agent_key] = result
+    messages = []
+    confidences = []
+    for agent_key, (msg, result) in zip(agent_keys, outcomes):
+        messages.append(msg)
+        if result is not None:
+            agent_results[agent_key] = result
+            confidences.append(result.get('confidence', 0.0))
+    
+    # Log confidence (the weakest one when several agents ran)
+    if analysis_log and confidences:
+        try:
+            analysis_log.log_confidence(min(confidences))
+        except TypeError:
+            analysis_log.log_confidence(confidences[0])
     
     return {
-        "discussion_history": [msg],
+        "discussion_history": messages,
         "agent_results": agent_results,
         "arbitrator_output": None  # Clear for next round
     }
@@ -251,9 +301,14 @@ def arbitrator_node(state: AgentState) -> Dict[str, Any]:
     
     msg = f"Arbitrator: Status={status}. Decision={decision} (Conf: {confidence}). {reasoning}"
     if next_agent:
-        msg += f"\n-> Dispatching to: {next_agent}"
-        if question:
-            msg += f" with question: {question}"
+        # Record every agent the specialist node will run, so the next round sees them all
+        dispatches = _fan_out(result)
+        if len(dispatches) <= 1:
+            dispatches = [(next_agent, question)]
+        for agent_key, agent_question in dispatches:
+            msg += f"\n-> Dispatching to: {agent_key}"
+            if agent_question:
+                msg += f" with question: {agent_question}"
     
     # Finalize log if this is the final decision
     finalized_log = None
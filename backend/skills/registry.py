@@ -3,10 +3,18 @@ import importlib.util
 import json
 import yaml
 import os
+import re
+import sys
+import threading
 from typing import Dict, Any, List, Optional
 import logging
 from pathlib import Path
 
+try:
+    import ahocorasick  # optional: pyahocorasick keyword automaton
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,12 +43,20 @@ class SkillRegistry:
             
         self.skill_packs: Dict[str, Dict[str, Any]] = {}
         self.tools: Dict[str, Dict[str, Any]] = {}
+        self._modules: Dict[str, Any] = {}  # script_path -> loaded module
+        self._module_lock = threading.Lock()
+        self._keyword_index = None
+        self._last_keyword_hits = None  # (question_lower, frozenset of tool ids)
+        # Bumped on every reload; lets callers key derived caches (e.g. prompts) on it
+        self.version = 0
         self.reload()
 
     def reload(self):
         """Scans the skills directory and loads all available skills."""
+        self.version += 1
         self.skill_packs = {}
         self.tools = {}
+        self._modules = {}
         
         if not os.path.exists(self.skills_dir):
             logger.warning(f"Skills directory not found: {self.skills_dir}")
@@ -55,6 +71,63 @@ class SkillRegistry:
                 except Exception as e:
                     logger.error(f"Failed to load skill from {skill_path}: {e}")
 
+        self._build_keyword_index()
+
+    def _build_keyword_index(self):
+        """
+        Precompile every tool's trigger_keywords into one matcher so a question is
+        scanned once: an Aho-Corasick automaton when pyahocorasick is installed,
+        otherwise a single longest-first regex alternation.
+        """
+        self._last_keyword_hits = None
+        kw_tools: Dict[str, set] = {}  # lowercased keyword -> ids of tool dicts
+        always = set()  # tools with an empty keyword match every question
+        for tool in self.list_tools_for_agent(list(self.skill_packs)):
+            for kw in tool.get('trigger_keywords', []) or []:
+                kw = str(kw).lower()
+                if kw:
+                    kw_tools.setdefault(kw, set()).add(id(tool))
+                else:
+                    always.add(id(tool))
+
+        automaton = pattern = None
+        if kw_tools and ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for kw, ids in kw_tools.items():
+                automaton.add_word(kw, frozenset(ids))
+            automaton.make_automaton()
+            hit_tools = None
+        else:
+            # The regex reports only the longest keyword starting at each position;
+            # every shorter keyword matching there is a prefix of it, so credit those too
+            hit_tools = {
+                kw: frozenset().union(*(ids for other, ids in kw_tools.items() if kw.startswith(other)))
+                for kw in kw_tools
+            }
+            if kw_tools:
+                alternation = '|'.join(re.escape(kw) for kw in sorted(kw_tools, key=len, reverse=True))
+                pattern = re.compile(f'(?=({alternation}))')
+        self._keyword_index = (automaton, pattern, hit_tools, frozenset(always))
+
+    def _tool_ids_matching(self, user_question: str) -> frozenset:
+        """Ids of tools whose trigger keywords occur in the question (last result memoized)."""
+        question_lower = user_question.lower()
+        last = self._last_keyword_hits
+        if last is not None and last[0] == question_lower:
+            return last[1]
+        
+        automaton, pattern, hit_tools, always = self._keyword_index
+        hits = set(always)
+        if automaton is not None:
+            for _, ids in automaton.iter(question_lower):
+                hits |= ids
+        elif pattern is not None:
+            for m in pattern.finditer(question_lower):
+                hits |= hit_tools[m.group(1)]
+        hits = frozenset(hits)
+        self._last_keyword_hits = (question_lower, hits)
+        return hits
+
     def _load_skill(self, skill_path: str, skill_dir_name: str):
         """Loads a single skill from its directory."""
         
@@ -141,18 +214,11 @@ class SkillRegistry:
         else:
             candidate_tools = list(self.tools.values())
         
-        matched = []
-        question_lower = user_question.lower()
-        
-        for tool in candidate_tools:
-            keywords = tool.get('trigger_keywords', [])
-            for kw in keywords:
-                if kw.lower() in question_lower:
-                    matched.append(tool)
-                    break 
-        return matched
+        hits = self._tool_ids_matching(user_question)
+        return [tool for tool in candidate_tools if id(tool) in hits]
 
-    def execute_tool(self, tool_name: str, **kwargs) -> Any:
+    def _resolve_tool(self, tool_name: str):
+        """(script_path, module_name, func_name) for a registered tool."""
         tool_info = self.tools.get(tool_name)
         if not tool_info:
             raise ValueError(f"Tool '{tool_name}' not found.")
@@ -179,17 +245,55 @@ class SkillRegistry:
             
         if not os.path.exists(script_path):
              raise ImportError(f"Script not found for tool {tool_name}: {script_path}")
+        
+        return script_path, module_name, func_name
+
+    def _load_module(self, script_path: str):
+        """Import a tool script once per registry so module-level caches persist."""
+        module = self._modules.get(script_path)
+        if module is None:
+            with self._module_lock:
+                module = self._modules.get(script_path)
+                if module is None:
+                    # Registered in sys.modules under a name unique to the script: Numba
+                    # kernels cached on disk (cache=True) re-import their module by name
+                    rel_path = os.path.splitext(os.path.relpath(script_path, self.skills_dir))[0]
+                    qualified_name = "_skill_" + re.sub(r'\W', '_', rel_path)
+                    spec = importlib.util.spec_from_file_location(qualified_name, script_path)
+                    if not (spec and spec.loader):
+                        raise ImportError(f"Could not load spec for {script_path}")
+                    module = importlib.util.module_from_spec(spec)
+                    sys.modules[qualified_name] = module
+                    try:
+                        spec.loader.exec_module(module)
+                    except BaseException:
+                        sys.modules.pop(qualified_name, None)
+                        raise
+                    self._modules[script_path] = module
+        return module
+
+    def has_side_effects(self, tool_name: str) -> bool:
+        """True if the tool is declared with side_effects (e.g. writes files), so it must not run speculatively."""
+        tool_info = self.tools.get(tool_name)
+        return bool(tool_info and tool_info.get('side_effects'))
+
+    def preload_tools_for_agent(self, agent_skill_packs: List[str]):
+        """Import the scripts behind an agent's tools ahead of use (JIT compiles, lookup tables)."""
+        for tool in self.list_tools_for_agent(agent_skill_packs):
+            try:
+                script_path, _, _ = self._resolve_tool(tool['name'])
+                self._load_module(script_path)
+            except Exception as e:
+                logger.warning(f"Failed to preload tool {tool.get('name')}: {e}")
+
+    def execute_tool(self, tool_name: str, **kwargs) -> Any:
+        script_path, _, func_name = self._resolve_tool(tool_name)
              
-        # Dynamic Import
+        # Dynamic Import (loaded once per registry so module-level caches persist)
         try:
-            spec = importlib.util.spec_from_file_location(module_name, script_path)
-            if spec and spec.loader:
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                func = getattr(module, func_name)
-                return func(**kwargs)
-            else:
-                raise ImportError(f"Could not load spec for {script_path}")
+            module = self._load_module(script_path)
+            func = getattr(module, func_name)
+            return func(**kwargs)
         except Exception as e:
             logger.error(f"Error executing tool {tool_name}: {e}")
             raise e
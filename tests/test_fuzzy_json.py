@@ -0,0 +1,63 @@
+import sys
+import os
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.core.fuzzy_json import fuzzy_loads
+
+
+def test_plain_object():
+    assert fuzzy_loads('{"action": "final_answer", "confidence": 0.8}') == {
+        "action": "final_answer", "confidence": 0.8
+    }
+
+
+def test_fenced_with_prose():
+    text = (
+        "Here is my analysis:\n"
+        "```json\n"
+        '{"lithology": "Sandstone", "reasoning": "低GR {干净砂岩}"}\n'
+        "```\n"
+        "Let me know if you need more."
+    )
+    assert fuzzy_loads(text) == {"lithology": "Sandstone", "reasoning": "低GR {干净砂岩}"}
+
+
+def test_trailing_commas():
+    text = '{"action": "tool_use", "parameters": {"curve": "GR", "modes": ["max", "min",],},}'
+    assert fuzzy_loads(text) == {
+        "action": "tool_use", "parameters": {"curve": "GR", "modes": ["max", "min"]}
+    }
+
+
+def test_truncated_reply_is_an_error():
+    # A reply cut off (e.g. at max_tokens) must not become a valid decision
+    with pytest.raises(ValueError):
+        fuzzy_loads('{"action":"tool_use","tool_name":"analyze_cro')
+    with pytest.raises(ValueError):
+        fuzzy_loads('{"lithology": "Shale", "reasoning": "高GR值表明')
+
+
+def test_partial_inside_nested_object():
+    res = fuzzy_loads('{"action": "tool_use", "tool_name": "calculate_vsh", "parameters": {"gr_min": 20, "method"',
+                      partial=True)
+    assert res == {"action": "tool_use", "tool_name": "calculate_vsh", "parameters": {"gr_min": 20}}
+
+
+def test_partial_after_separator():
+    res = fuzzy_loads('{"confidence": 0.7, "intervals": [{"top": 3790.0, "bottom": 3795.5},', partial=True)
+    assert res == {"confidence": 0.7, "intervals": [{"top": 3790.0, "bottom": 3795.5}]}
+
+
+def test_python_style_output():
+    text = "{'status': 'FINAL', next_agent: None, 'fast_path': True, // comment\n 'note': 'it\\'s'}"
+    assert fuzzy_loads(text) == {"status": "FINAL", "next_agent": None, "fast_path": True, "note": "it's"}
+
+
+def test_no_object():
+    with pytest.raises(ValueError):
+        fuzzy_loads("I cannot answer that.")
+    with pytest.raises(ValueError):
+        fuzzy_loads("")
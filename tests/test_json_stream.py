@@ -0,0 +1,82 @@
+import sys
+import os
+import json
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.core.json_stream import StreamingJsonParser
+
+TOOL_CALL = {
+    "action": "tool_use",
+    "tool_name": "analyze_crossplot",
+    "parameters": {"x_expression": "NPHI", "filter_query": "GR < 60, \"clean\" {sand}", "bounds": [0, {"max": 0.45}]},
+    "reasoning": "中子-密度交会, 检查 \"挖掘效应\"",
+}
+REPLY = "```json\n" + json.dumps(TOOL_CALL, ensure_ascii=False) + "\n```"
+
+
+def _feed(parser, chunks):
+    seen = []
+    for chunk in chunks:
+        seen.append(dict(parser.push(chunk)))
+    return seen
+
+
+def test_every_split_point():
+    # Two chunks split at every offset, including inside strings, escapes and nested parameters
+    for cut in range(len(REPLY) + 1):
+        parser = StreamingJsonParser()
+        _feed(parser, [REPLY[:cut], REPLY[cut:]])
+        assert parser.done
+        assert parser.get_partial() == TOOL_CALL, f"split at {cut}"
+
+
+def test_character_stream():
+    parser = StreamingJsonParser()
+    _feed(parser, list(REPLY))
+    assert parser.get_partial() == TOOL_CALL
+
+
+def test_split_inside_string_with_separators():
+    # The comma, brace and escaped quote inside the string must not end the field
+    parser = StreamingJsonParser()
+    fields = parser.push('{"action": "tool_use", "tool_name": "calc, {x}')
+    assert fields == {"action": "tool_use"}
+    fields = parser.push(' \\"y\\"", "parameters": {}}')
+    assert fields["tool_name"] == 'calc, {x} "y"'
+    assert parser.done
+
+
+def test_nested_parameters_complete_only_when_closed():
+    parser = StreamingJsonParser()
+    parser.push('{"action": "tool_use", "tool_name": "find_extreme_values", "parameters": {"curve_name": "PHIE", ')
+    assert "parameters" not in parser.get_partial()
+    parser.push('"window": {"top": 3790, "bottom": [3795.5')
+    assert "parameters" not in parser.get_partial()
+    fields = parser.push(']}, "mode": "max"}, "reasoning": "...')
+    assert fields["parameters"] == {"curve_name": "PHIE", "window": {"top": 3790, "bottom": [3795.5]}, "mode": "max"}
+    # The trailing field is still open, so the tool call can be dispatched already
+    assert "reasoning" not in fields
+    assert not parser.done
+
+
+def test_on_field_called_once_per_field():
+    calls = []
+    parser = StreamingJsonParser(on_field=lambda k, v: calls.append(k))
+    _feed(parser, [REPLY[i:i + 7] for i in range(0, len(REPLY), 7)])
+    assert calls == ["action", "tool_name", "parameters", "reasoning"]
+
+
+def test_text_after_object_is_ignored():
+    parser = StreamingJsonParser()
+    parser.push('{"next_agent": "LithologyExpert"}')
+    assert parser.push(' trailing {"next_agent": "Other"}') == {"next_agent": "LithologyExpert"}
+
+
+def test_get_partial_is_a_copy():
+    parser = StreamingJsonParser()
+    parser.push('{"status": "DISCUSSION", ')
+    partial = parser.get_partial()
+    partial["status"] = "changed"
+    assert parser.get_partial() == {"status": "DISCUSSION"}
@@ -0,0 +1,58 @@
+import sys
+import os
+import random
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backend.skills.registry as registry_module
+from backend.skills.registry import SkillRegistry
+
+FILLER = ["请", "分析", "3790m", "井段", "的", " ", "GR", "and", "曲线", "?"]
+
+
+def _substring_match(tools, question):
+    """The original per-tool substring loop the keyword index replaced."""
+    question_lower = question.lower()
+    return [tool for tool in tools
+            if any(str(kw).lower() in question_lower for kw in tool.get('trigger_keywords', []) or [])]
+
+
+def _questions(keywords, n=300, seed=7):
+    rng = random.Random(seed)
+    questions = list(keywords) + [kw.upper() for kw in keywords]
+    for _ in range(n):
+        parts = rng.sample(FILLER, 3) + rng.sample(keywords, rng.randint(0, 3))
+        # Keyword fragments and overlaps (prefixes of longer keywords) are the tricky cases
+        parts += [kw[:rng.randint(1, len(kw))] for kw in rng.sample(keywords, 2)]
+        rng.shuffle(parts)
+        questions.append("".join(parts))
+    return questions
+
+
+def _check_against_substring_loop(registry):
+    tools = registry.list_tools()
+    keywords = sorted({str(kw) for tool in tools for kw in tool.get('trigger_keywords', []) or []})
+    assert keywords
+    for question in _questions(keywords):
+        expected = [t['name'] for t in _substring_match(tools, question)]
+        assert [t['name'] for t in registry.match_tools_by_keywords(question)] == expected, question
+
+
+def test_matches_substring_loop():
+    _check_against_substring_loop(SkillRegistry())
+
+
+def test_regex_fallback_matches_substring_loop(monkeypatch):
+    # Without pyahocorasick the index is a longest-first regex that credits prefix keywords
+    monkeypatch.setattr(registry_module, "ahocorasick", None)
+    registry = SkillRegistry()
+    assert registry._keyword_index[0] is None
+    _check_against_substring_loop(registry)
+
+
+def test_overlapping_keywords():
+    registry = SkillRegistry()
+    # "速度交会" contains "交会"; both must credit analyze_crossplot, and "Vp vs Vs" is case-insensitive
+    for question in ["做速度交会", "vp VS vs 图"]:
+        assert "analyze_crossplot" in [t['name'] for t in registry.match_tools_by_keywords(question)]
@@ -0,0 +1,34 @@
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.core.log_data import LogData, as_log_data, curve_names, with_log_data
+
+DATA = {"curves": {"DEPTH": [1.0, 2.0, 3.0], "GR": [40.0, None, 80.0], "RT": [5.0, 6.0, 7.0], "ZONE": ["a", "b", "c"]}}
+
+
+def test_plain_dict_packs_only_requested_curves():
+    log = as_log_data(DATA, ("GR", "DEPTH", "MISSING"))
+    assert log.names() == ["GR", "DEPTH"]
+    assert np.isnan(log.get_curve("GR")[1])
+    # Without names every numeric curve is packed
+    assert as_log_data(DATA).names() == ["DEPTH", "GR", "RT"]
+
+
+def test_with_log_data_packs_once():
+    data = with_log_data(DATA)
+    assert "log_data" not in DATA
+    assert isinstance(data["log_data"], LogData)
+    assert data["log_data"].names() == ["DEPTH", "GR", "RT"]
+    # The carried block is returned whatever names are asked for
+    assert as_log_data(data, ("GR",)) is data["log_data"]
+    assert with_log_data(data) is data
+
+
+def test_curve_names():
+    assert curve_names(DATA) == ["DEPTH", "GR", "RT", "ZONE"]
+    assert curve_names(with_log_data(DATA)) == ["DEPTH", "GR", "RT"]
+    assert curve_names(LogData.from_curves({"GR": [1.0]})) == ["GR"]
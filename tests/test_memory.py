@@ -0,0 +1,97 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.memory import MemoryController, estimate_tokens, split_turns
+
+SPEAKERS = ["LithologyExpert", "ElectricalExpert"]
+
+
+def _turns(n):
+    """User note, then alternating specialist / arbitrator turns with long reasoning."""
+    turns = ["User Note: 请判断 3790-3800m 的岩性和流体"]
+    for i in range(1, n):
+        if i % 2:
+            turns.append(f"LithologyExpert: Conf=0.7. Round {i} reasoning " + "x" * 400)
+        else:
+            turns.append(f"Arbitrator: Status=DISCUSSION. Decision=d{i} (Conf: 0.5). " + "y" * 400
+                         + f"\n-> Dispatching to: ElectricalExpert with question: q{i}")
+    return turns
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("岩性分析") == 4
+
+
+def test_split_turns_keeps_continuation_lines():
+    record = "\n".join([
+        "User Note: q",
+        "LithologyExpert: Conf=0.8. line one",
+        "line two",
+        "Arbitrator: Status=DISCUSSION.",
+        "-> Dispatching to: ElectricalExpert",
+    ])
+    assert split_turns(record, SPEAKERS) == [
+        "User Note: q",
+        "LithologyExpert: Conf=0.8. line one\nline two",
+        "Arbitrator: Status=DISCUSSION.\n-> Dispatching to: ElectricalExpert",
+    ]
+    # Unknown speakers stay with the previous turn
+    assert split_turns("Arbitrator: a\nSomeoneElse: b") == ["Arbitrator: a\nSomeoneElse: b"]
+
+
+def test_record_within_budget_is_unchanged():
+    turns = _turns(4)
+    assert MemoryController(keep_last=2).compress(turns, budget_tokens=10_000) == "\n".join(turns)
+
+
+def test_window_boundary():
+    turns = _turns(6)
+    memory = MemoryController(keep_last=2, summary_chars=60)
+    result = memory.compress(turns, budget_tokens=400)
+    summary, recent = result.split("[最近讨论]\n")
+
+    # The last keep_last turns are verbatim, in order; the turn just before them is summarized
+    assert recent == "\n".join(turns[-2:])
+    assert turns[-3] not in result
+    assert f"- {memory.summarize_turn(turns[-3])}" in summary
+    # Summaries are cut to summary_chars, but keep the Arbitrator's dispatch line
+    arbitrator_summary = memory.summarize_turn(turns[2])
+    assert arbitrator_summary.endswith("-> Dispatching to: ElectricalExpert with question: q2")
+    assert "…" in arbitrator_summary
+    assert estimate_tokens(result) <= 400
+
+
+def test_dropped_turns_keep_user_notes():
+    turns = _turns(12)
+    memory = MemoryController(keep_last=2, summary_chars=60)
+    result = memory.compress(turns, budget_tokens=420)
+
+    # The oldest summaries are dropped in blocks of keep_last (turns 0-3) and counted...
+    assert "(更早的 3 条已省略)" in result
+    for dropped in turns[1:4]:
+        assert memory.summarize_turn(dropped) not in result
+    assert memory.summarize_turn(turns[4]) in result
+    # ...but the user's note survives verbatim
+    assert f"- {turns[0]}" in result
+    assert result.endswith("\n".join(turns[-2:]))
+    assert estimate_tokens(result) <= 420
+
+
+def test_summarized_prefix_is_stable_as_window_slides():
+    memory = MemoryController(keep_last=2, summary_chars=60)
+    turns = _turns(8)
+    before = memory.compress(turns[:7], budget_tokens=400)
+    after = memory.compress(turns, budget_tokens=400)
+    assert after.startswith(before.split("[最近讨论]")[0])
+
+
+def test_tiny_budget_keeps_last_turn():
+    turns = _turns(5)
+    result = MemoryController(keep_last=3).compress(turns, budget_tokens=10)
+    assert result.endswith(turns[-1])
+    assert f"- {turns[0]}" in result
@@ -0,0 +1,69 @@
+import sys
+import os
+import json
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.mineralogy_agent import MineralogyAgent
+
+DATA = {"curves": {
+    "DEPTH": [3790.0, 3790.5, 3791.0, 3791.5],
+    "GR": [35.0, 40.0, 95.0, 110.0],
+    "RHOB": [2.35, 2.40, 2.55, 2.60],
+}}
+SYNTHESIS = {"primary_lithology": "Sandstone", "confidence": 0.8, "reasoning": "泥质含量低"}
+
+
+class ScriptedLLM:
+    """Stage 1 streams the given decision; Stage 2 returns a fixed synthesis."""
+    model = "fake"
+    temperature = 0.0
+
+    def __init__(self, decision):
+        self.decision = json.dumps(decision)
+
+    def chat_stream(self, messages, system_prompt=None, static_context=None):
+        for i in range(0, len(self.decision), 8):
+            yield self.decision[i:i + 8]
+
+    def chat(self, messages, system_prompt=None, static_context=None):
+        return {"success": True, "content": json.dumps(SYNTHESIS, ensure_ascii=False), "usage": {}}
+
+
+def _run(decision, question):
+    agent = MineralogyAgent()
+    agent.llm = ScriptedLLM(decision)
+    calls = []
+    execute_tool = agent.execute_tool
+
+    def counting_execute_tool(tool_name, log_data=None, **params):
+        calls.append((tool_name, params))
+        return execute_tool(tool_name, log_data=log_data, **params)
+
+    agent.execute_tool = counting_execute_tool
+    return agent.analyze(DATA, context=question), calls
+
+
+def test_prefetched_vsh_is_used():
+    decision = {"action": "tool_use", "tool_name": "calculate_vsh", "parameters": {"gr_curve": "GR"}}
+    result, calls = _run(decision, "计算泥质含量")
+    # Only the prefetch ran: Stage 1 picked the same call
+    assert calls == [("calculate_vsh", {"gr_curve": "GR"})]
+    assert result["tool_used"] == "calculate_vsh"
+    assert result["primary_lithology"] == "Sandstone"
+
+
+def test_different_call_runs_again():
+    decision = {"action": "tool_use", "tool_name": "calculate_vsh",
+                "parameters": {"gr_curve": "GR", "method": "linear"}}
+    result, calls = _run(decision, "计算泥质含量")
+    assert ("calculate_vsh", {"gr_curve": "GR", "method": "linear"}) in calls
+    assert result["tool_used"] == "calculate_vsh"
+
+
+def test_crossplot_is_not_prefetched():
+    decision = {"action": "final_answer", "primary_lithology": "Sandstone", "confidence": 0.6, "reasoning": "无需工具"}
+    result, calls = _run(decision, "做个交会图")
+    assert calls == []
+    assert result["primary_lithology"] == "Sandstone"
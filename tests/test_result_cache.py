@@ -0,0 +1,81 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backend.agents.result_cache as result_cache
+from backend.agents.result_cache import ResultCache, cached_analyze, data_fingerprint
+from backend.core.log_data import with_log_data
+
+DATA = {"curves": {"DEPTH": [1.0, 2.0, 3.0], "GR": [40.0, None, 80.0]}, "well": "W-1"}
+
+
+class CountingAgent:
+    name = "CountingExpert"
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    @cached_analyze
+    def analyze(self, data, context=None):
+        self.calls += 1
+        return {**self.result, "details": {"intervals": [3790.0]}}
+
+
+def _enable(monkeypatch, ttl=60.0):
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_TTL", ttl)
+    monkeypatch.setattr(result_cache, "_result_cache", ResultCache(maxsize=8, ttl=ttl))
+
+
+def test_off_by_default(monkeypatch):
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_TTL", 0.0)
+    agent = CountingAgent({"confidence": 0.8})
+    agent.analyze(DATA, "q")
+    agent.analyze(DATA, "q")
+    assert agent.calls == 2
+
+
+def test_hit_and_miss(monkeypatch):
+    _enable(monkeypatch)
+    agent = CountingAgent({"confidence": 0.8})
+    first = agent.analyze(DATA, "q")
+    assert agent.analyze(DATA, "q") == first
+    assert agent.calls == 1
+    # Another context or other curve values are a different key
+    agent.analyze(DATA, "other question")
+    agent.analyze({**DATA, "curves": {**DATA["curves"], "GR": [40.0, 50.0, 80.0]}}, "q")
+    assert agent.calls == 3
+
+
+def test_bypass(monkeypatch):
+    _enable(monkeypatch)
+    agent = CountingAgent({"confidence": 0.8})
+    agent.analyze(DATA, "q")
+    agent.analyze(DATA, "q", bypass_cache=True)
+    assert agent.calls == 2
+
+
+def test_errors_are_not_cached(monkeypatch):
+    _enable(monkeypatch)
+    for result in ({"status": "ERROR", "confidence": 0.5}, {"error": "boom"}, {"confidence": 0.0}):
+        agent = CountingAgent(result)
+        agent.analyze(DATA, "q")
+        agent.analyze(DATA, "q")
+        assert agent.calls == 2
+
+
+def test_results_are_copies(monkeypatch):
+    _enable(monkeypatch)
+    agent = CountingAgent({"confidence": 0.8})
+    first = agent.analyze(DATA, "q")
+    first["details"]["intervals"].append(9999.0)
+    assert agent.analyze(DATA, "q")["details"]["intervals"] == [3790.0]
+    assert agent.calls == 1
+
+
+def test_fingerprint_ignores_packing():
+    # A dict already carrying its LogData hashes like the plain dict
+    assert data_fingerprint(with_log_data(DATA)) == data_fingerprint(DATA)
+    assert data_fingerprint(DATA) != data_fingerprint({**DATA, "well": "W-2"})
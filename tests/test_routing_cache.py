@@ -0,0 +1,107 @@
+import sys
+import os
+import logging
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backend.agents.routing_cache as routing_cache
+from backend.agents.routing_cache import RoutingCache, build_routing_key
+
+ROSTER = ["LithologyExpert", "ElectricalExpert"]
+DECISION = {"status": "DISCUSSION", "next_agent": "ElectricalExpert", "question_for_agent": "流体类型?"}
+
+
+class FakeEncoder:
+    """Bag-of-characters embedding: similar texts get similar unit vectors."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def encode(self, text, normalize_embeddings=True):
+        vec = np.zeros(256)
+        for ch in text:
+            vec[ord(ch) % 256] += 1.0
+        return vec / np.linalg.norm(vec)
+
+
+def test_build_routing_key_normalizes():
+    context = "User Note: q\nLithologyExpert: Conf=0.8.\nArbitrator: Status=DISCUSSION.\n-> Dispatching to: X\n"
+    key = build_routing_key("  What  IS the\nfluid? ", context, reversed(ROSTER))
+    assert key[0] == "what is the fluid?"
+    # Only the last tail_lines lines of the discussion are part of the key
+    assert key[1] == "lithologyexpert: conf=0.8. arbitrator: status=discussion. -> dispatching to: x"
+    assert key[2] == ("ElectricalExpert", "LithologyExpert")
+
+
+def test_exact_key_hit_and_miss():
+    cache = RoutingCache()
+    key = build_routing_key("fluid?", "Arbitrator: a", ROSTER)
+    assert cache.get(key) is None
+    cache.put(key, DECISION)
+
+    hit = cache.get(build_routing_key("FLUID?", "Arbitrator:   a", ROSTER))
+    assert hit == DECISION
+    # Callers get a copy
+    hit["next_agent"] = "changed"
+    assert cache.get(key) == DECISION
+    # Another discussion state or roster is a different key
+    assert cache.get(build_routing_key("fluid?", "Arbitrator: b", ROSTER)) is None
+    assert cache.get(build_routing_key("fluid?", "Arbitrator: a", ROSTER[:1])) is None
+
+
+def test_lru_eviction():
+    cache = RoutingCache(maxsize=2)
+    keys = [build_routing_key(f"q{i}", "", ROSTER) for i in range(3)]
+    cache.put(keys[0], DECISION)
+    cache.put(keys[1], DECISION)
+    cache.get(keys[0])  # refresh: keys[1] is now the oldest
+    cache.put(keys[2], DECISION)
+    assert len(cache) == 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+
+
+def test_put_async():
+    cache = RoutingCache()
+    key = build_routing_key("q", "", ROSTER)
+    cache.put_async(key, DECISION)
+    cache._writer.submit(lambda: None).result()  # single writer: earlier puts are done
+    assert cache.get(key) == DECISION
+
+
+def test_without_sentence_transformers(monkeypatch, caplog):
+    monkeypatch.setattr(routing_cache, "SentenceTransformer", None)
+    with caplog.at_level(logging.WARNING, logger=routing_cache.__name__):
+        cache = RoutingCache(embed_model="all-MiniLM-L6-v2")
+    assert cache.embed_model is None
+    assert "sentence-transformers not installed" in caplog.text
+
+    key = build_routing_key("what is the fluid?", "", ROSTER)
+    cache.put(key, DECISION)
+    assert cache.get(key) == DECISION
+    # No semantic fallback: a near-identical question misses
+    assert cache.get(build_routing_key("what is the fluid ?", "", ROSTER)) is None
+
+
+def test_semantic_hit_requires_same_roster(monkeypatch):
+    monkeypatch.setattr(routing_cache, "SentenceTransformer", FakeEncoder)
+    cache = RoutingCache(threshold=0.95, embed_model="fake")
+    cache.put(build_routing_key("what is the fluid type here?", "", ROSTER), DECISION)
+
+    assert cache.get(build_routing_key("what is the fluid type here ?", "", ROSTER)) == DECISION
+    assert cache.get(build_routing_key("what is the fluid type here ?", "", ROSTER[:1])) is None
+    assert cache.get(build_routing_key("计算泥质含量", "", ROSTER)) is None
+
+
+def test_encoder_load_failure_disables_semantic_matching(monkeypatch):
+    def broken(name):
+        raise OSError("model not found")
+
+    monkeypatch.setattr(routing_cache, "SentenceTransformer", broken)
+    cache = RoutingCache(embed_model="missing-model")
+    key = build_routing_key("q", "", ROSTER)
+    cache.put(key, DECISION)
+    assert cache.embed_model is None
+    assert cache.get(key) == DECISION
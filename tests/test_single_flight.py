@@ -0,0 +1,131 @@
+import sys
+import os
+import queue
+import threading
+import time
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.core.single_flight import SingleFlight
+
+END = object()
+
+
+class Upstream:
+    """LLM stream stand-in: yields what the test puts on the queue; an exception is raised."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.closed = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self._gen()
+
+    def _gen(self):
+        try:
+            while True:
+                item = self.queue.get(timeout=5)
+                if item is END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self.closed.set()
+
+
+def _not_called():
+    raise AssertionError("a follower must not start its own stream")
+
+
+def _follow(flight, key):
+    """Start a follower on a thread; returns (thread, received, errors) once it has joined."""
+    received, errors = [], []
+
+    def run():
+        try:
+            for chunk in flight.stream(key, _not_called):
+                received.append(chunk)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not flight._streams[key].has_subscribers():
+        assert time.monotonic() < deadline, "follower did not join"
+        time.sleep(0.001)
+    return thread, received, errors
+
+
+def test_follower_gets_the_whole_stream():
+    flight, upstream = SingleFlight(), Upstream()
+    leader = flight.stream("k", upstream)
+    upstream.queue.put("a")
+    assert next(leader) == "a"
+
+    # Joins after the first chunk, still receives it
+    thread, received, errors = _follow(flight, "k")
+    upstream.queue.put("b")
+    upstream.queue.put(END)
+    assert list(leader) == ["b"]
+    thread.join(5)
+    assert received == ["a", "b"]
+    assert not errors
+    assert upstream.calls == 1
+    assert "k" not in flight._streams
+
+
+def test_leader_detaching_hands_off_to_background_drain():
+    flight, upstream = SingleFlight(), Upstream()
+    leader = flight.stream("k", upstream)
+    upstream.queue.put("a")
+    assert next(leader) == "a"
+    thread, received, errors = _follow(flight, "k")
+
+    leader.close()
+    # The key is free at once; the upstream keeps running for the follower
+    assert "k" not in flight._streams
+    assert not upstream.closed.is_set()
+    upstream.queue.put("b")
+    upstream.queue.put(END)
+    thread.join(5)
+    assert received == ["a", "b"]
+    assert not errors
+    assert upstream.closed.wait(5)
+
+
+def test_upstream_error_reaches_followers():
+    flight, upstream = SingleFlight(), Upstream()
+    leader = flight.stream("k", upstream)
+    upstream.queue.put("a")
+    assert next(leader) == "a"
+    thread, received, errors = _follow(flight, "k")
+
+    upstream.queue.put(ConnectionError("connection reset"))
+    with pytest.raises(ConnectionError):
+        next(leader)
+    thread.join(5)
+    assert received == ["a"]
+    assert len(errors) == 1 and isinstance(errors[0], ConnectionError)
+
+
+def test_early_close_without_followers_closes_upstream():
+    flight, upstream = SingleFlight(), Upstream()
+    leader = flight.stream("k", upstream)
+    upstream.queue.put("a")
+    assert next(leader) == "a"
+
+    leader.close()
+    assert upstream.closed.is_set()
+    assert "k" not in flight._streams
+
+    # The next identical request starts a new stream
+    upstream.queue.put("b")
+    upstream.queue.put(END)
+    assert list(flight.stream("k", upstream)) == ["b"]
+    assert upstream.calls == 2
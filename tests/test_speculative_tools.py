@@ -0,0 +1,82 @@
+import sys
+import os
+import json
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.electrical_agent import ElectricalAgent
+from backend.skills.registry import get_skill_registry
+
+DATA = {"curves": {
+    "DEPTH": [3790.0, 3790.5, 3791.0, 3791.5],
+    "RT": [5.0, 40.0, 60.0, 8.0],
+    "RXO": [4.0, 10.0, 12.0, 7.0],
+}}
+
+
+class ScriptedLLM:
+    """Stage 1 streams the given reply (optionally dropping the connection); Stage 2 is fixed."""
+    model = "fake"
+    temperature = 0.0
+
+    def __init__(self, reply, fail=False):
+        self.reply = reply
+        self.fail = fail
+
+    def chat_stream(self, messages, system_prompt=None, static_context=None):
+        for i in range(0, len(self.reply), 8):
+            yield self.reply[i:i + 8]
+        if self.fail:
+            raise ConnectionError("connection reset")
+
+    def chat(self, messages, system_prompt=None, static_context=None):
+        content = json.dumps({"fluid_type": "Oil", "confidence": 0.7, "reasoning": "高阻"}, ensure_ascii=False)
+        return {"success": True, "content": content, "usage": {}}
+
+
+def _run(monkeypatch, reply, fail=False):
+    registry = get_skill_registry()
+    calls = []
+    execute_tool = registry.execute_tool
+
+    def counting_execute_tool(tool_name, **kwargs):
+        calls.append(tool_name)
+        return execute_tool(tool_name, **kwargs)
+
+    monkeypatch.setattr(registry, "execute_tool", counting_execute_tool)
+    agent = ElectricalAgent()
+    agent.llm = ScriptedLLM(reply, fail)
+    return agent.analyze(DATA, context="3790m 流体性质?"), calls
+
+
+def test_crossplot_is_declared_with_side_effects():
+    registry = get_skill_registry()
+    assert registry.has_side_effects("analyze_crossplot")
+    assert not registry.has_side_effects("find_extreme_values")
+
+
+def test_side_effect_tool_runs_once(monkeypatch, tmp_path):
+    # Charts are written relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    reply = json.dumps({"action": "tool_use", "tool_name": "analyze_crossplot",
+                        "parameters": {"x_expression": "RXO", "y_expression": "RT", "color_expression": "RT"}})
+    result, calls = _run(monkeypatch, reply)
+    assert calls == ["analyze_crossplot"]
+    assert len(os.listdir(tmp_path / "backend" / "static" / "charts")) == 1
+    assert result["fluid_type"] == "Oil"
+
+
+def test_speculative_result_is_reused(monkeypatch):
+    reply = json.dumps({"action": "tool_use", "tool_name": "find_extreme_values",
+                        "parameters": {"curve_name": "RT", "mode": "max"}})
+    result, calls = _run(monkeypatch, reply)
+    assert calls == ["find_extreme_values"]
+    assert result["fluid_type"] == "Oil"
+
+
+def test_cut_off_reply_returns_format_error(monkeypatch):
+    reply = '{"action": "tool_use", "tool_name": "find_extreme_values", "parameters": {"curve_name": "RT"}, "reas'
+    result, calls = _run(monkeypatch, reply, fail=True)
+    assert result["reasoning"].startswith("Format Error")
+    assert len(calls) <= 1
@@ -0,0 +1,70 @@
+import sys
+import os
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.arbitrator_agent import ArbitratorAgent
+from backend.agents.base_agent import BaseAgent
+from backend.agents.electrical_agent import ElectricalAgent
+
+PARTIAL = '{"status": "FINAL", "decision": "3790m 为油'
+
+
+class BrokenStreamLLM:
+    """chat_stream yields the given chunks, then the connection drops."""
+    model = "fake"
+    temperature = 0.0
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def chat_stream(self, messages, system_prompt=None, static_context=None):
+        yield from self.chunks
+        raise ConnectionError("connection reset")
+
+
+class EchoAgent(BaseAgent):
+    def __init__(self):
+        super().__init__(name="Echo", role_description="test")
+
+    def analyze(self, data, context=None):
+        return {}
+
+
+def _agent(cls, chunks):
+    agent = cls()
+    agent.llm = BrokenStreamLLM(chunks)
+    return agent
+
+
+def test_failure_before_output_yields_error_text():
+    agent = _agent(EchoAgent, [])
+    assert list(agent.think_stream("q")) == ["I encountered an error while processing this request."]
+
+
+def test_failure_after_partial_output_is_raised():
+    stream = _agent(EchoAgent, [PARTIAL]).think_stream("q")
+    assert next(stream) == PARTIAL
+    with pytest.raises(ConnectionError):
+        next(stream)
+
+
+def test_think_decision_rejects_cut_off_reply():
+    decision, text = _agent(EchoAgent, [PARTIAL]).think_decision("q")
+    assert decision is None
+    assert text == PARTIAL
+
+
+def test_arbitrator_returns_error_for_cut_off_reply():
+    result = _agent(ArbitratorAgent, [PARTIAL]).analyze({}, context="User Note: 3790m 流体性质?")
+    assert result["status"] == "ERROR"
+    assert result["raw_output"] == PARTIAL
+
+
+def test_electrical_returns_format_error_for_cut_off_reply():
+    result = _agent(ElectricalAgent, ['{"action": "final_answer", "fluid_type": "O']).analyze({"curves": {}})
+    assert result["fluid_type"] == "Unknown"
+    assert result["confidence"] == 0.0
+    assert result["reasoning"].startswith("Format Error")